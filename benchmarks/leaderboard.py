@@ -0,0 +1,41 @@
+"""積分排行榜索引（RankedIndex）的查詢與更新延遲。
+
+用法（在專案根目錄執行）：
+    python -m benchmarks.leaderboard            # 預設 1,000,000 位使用者
+    python -m benchmarks.leaderboard 100000
+"""
+import random
+import sys
+import time
+
+from cogs.points_utils.leaderboard import RankedIndex
+
+DEFAULT_SIZE = 1_000_000
+OPS = 100_000
+
+
+def _per_op_us(fn, ops=OPS):
+    start = time.perf_counter()
+    for _ in range(ops):
+        fn()
+    return (time.perf_counter() - start) / ops * 1e6
+
+
+def run(size: int):
+    members = list(range(1, size + 1))
+    start = time.perf_counter()
+    index = RankedIndex((m, random.randint(0, 1_000_000)) for m in members)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    rows = [
+        ('rank(member)', _per_op_us(lambda: index.rank(random.choice(members)))),
+        ('top(random page, 10)', _per_op_us(lambda: index.top(random.randrange(size), 10))),
+        ('set(member, new score)', _per_op_us(lambda: index.set(random.choice(members), random.randint(0, 1_000_000)))),
+    ]
+    print(f"\n=== {size:,} members | build {build_ms:.0f} ms ===")
+    for name, us in rows:
+        print(f"{name:<26}{us:>10.2f} µs/op")
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_SIZE)
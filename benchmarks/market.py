@@ -0,0 +1,78 @@
+"""玩家市集撮合（Market / OrderBook）的吞吐量與正確性檢查。
+
+隨機產生限價單（價格在參考價附近、約一成是撤單），逐筆撮合並量測每筆的平均延遲，
+最後確認成交數量守恆、買賣盤沒有交叉。
+
+用法（在專案根目錄執行）：
+    python -m benchmarks.market            # 預設 100,000 筆
+    python -m benchmarks.market 1000000
+"""
+import random
+import sys
+import time
+
+from cogs.market_utils.orderbook import BUY, SELL, Market
+
+DEFAULT_ORDERS = 100_000
+USERS = 5_000
+ITEMS = ("1", "2", "3", "4")
+REFERENCE_PRICE = {"1": 20, "2": 100, "3": 120, "4": 250}
+CANCEL_RATE = 0.1
+
+
+def run(count: int, seed: int = 42):
+    rng = random.Random(seed)
+    market = Market()
+    placed = {BUY: 0, SELL: 0}
+    bought = sold = withdrawn = cancelled = fills = 0
+    latencies = []
+    rested = []  # ids that rested at some point; cancel targets are drawn from here
+
+    start = time.perf_counter()
+    for _ in range(count):
+        if rested and rng.random() < CANCEL_RATE:
+            order_id = rng.choice(rested)
+            if order_id not in market.orders:
+                continue  # Already filled or cancelled
+            t = time.perf_counter()
+            _, qty = market.cancel(order_id)
+            latencies.append(time.perf_counter() - t)
+            cancelled += qty
+            continue
+        item = rng.choice(ITEMS)
+        side = rng.choice((BUY, SELL))
+        price = max(1, round(REFERENCE_PRICE[item] * rng.uniform(0.9, 1.1)))
+        qty = rng.randint(1, 10)
+        user = rng.randrange(USERS)
+        t = time.perf_counter()
+        order, trades, self_cancelled = market.place(user, item, side, price, qty)
+        latencies.append(time.perf_counter() - t)
+        placed[side] += qty
+        if order.remaining:
+            rested.append(order.id)
+        fills += len(trades)
+        for trade in trades:
+            bought += trade.qty
+            sold += trade.qty
+            assert trade.buy.price >= trade.price >= trade.sell.price
+        withdrawn += sum(q for _, q in self_cancelled)
+    elapsed = time.perf_counter() - start
+
+    resting = sum(o.remaining for o in market.orders.values())
+    # Every unit placed either traded (counted once on each side), was withdrawn / cancelled, or still rests
+    assert placed[BUY] + placed[SELL] == bought + sold + withdrawn + cancelled + resting
+    for item in ITEMS:
+        book = market.book(item)
+        bid, ask = book.best(BUY), book.best(SELL)
+        assert not (bid and ask and bid.price >= ask.price), "買賣盤交叉"
+
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2] * 1e6
+    p99 = latencies[int(len(latencies) * 0.99)] * 1e6
+    print(f"\n=== {count:,} orders | {elapsed:.2f} s total | {count / elapsed:,.0f} orders/s ===")
+    print(f"fills {fills:,} | traded {bought:,} units | resting orders {len(market.orders):,}")
+    print(f"per op: p50 {p50:.1f} µs | p99 {p99:.1f} µs")
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ORDERS)
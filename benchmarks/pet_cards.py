@@ -0,0 +1,77 @@
+"""寵物狀態卡片（ProfileCardRenderer）冷 / 溫快取的繪製時間。需要 Pillow。
+
+用法（在專案根目錄執行）：
+    python -m benchmarks.pet_cards              # 預設 200 種不同狀態
+    python -m benchmarks.pet_cards 500 /path/to/NotoSansCJK-Regular.ttc
+
+沒有指定字型時使用 find_font 找到的中文字型；都找不到時改用 Pillow 內附的 DejaVu
+（中文會顯示成方塊，但不影響計時）。
+"""
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+
+from cogs.pet_utils import profile_card
+from cogs.pet_utils.game_config import PROJECT_ROOT, game_config
+from cogs.pet_utils.profile_card import ProfileCardRenderer, card_state
+from cogs.pet_utils.progression import exp_to_next
+
+DEFAULT_STATES = 200
+
+
+def _fallback_font():
+    from PIL import ImageFont
+    return ImageFont.truetype("DejaVuSans.ttf", 12).path
+
+
+def _states(count: int):
+    config = game_config()
+    rng = random.Random(42)
+    states = []
+    for _ in range(count):
+        meta = rng.choice(config.pet_types)
+        level = rng.randint(1, 99)
+        max_hp = meta.base_stats.hp + level * 5
+        pet = {
+            "type": meta.key, "level": level, "exp": rng.randint(0, exp_to_next(level) - 1), "nickname": None,
+            "ap": rng.randint(0, 6), "max_ap": 6,
+            "stats": {"hp": rng.randint(0, max_hp), "max_hp": max_hp, "atk": rng.randint(10, 300),
+                      "def": rng.randint(5, 200), "satiety": rng.randint(0, 100), "max_satiety": 100},
+        }
+        skills = [config.skills[i].name for i in meta.skills_up_to(level)]
+        sprite = os.path.join(PROJECT_ROOT, 'assets', 'pets', meta.image)
+        states.append(card_state(pet, meta, sprite, exp_to_next(level), skills))
+    return states
+
+
+async def _timed(renderer, states):
+    start = time.perf_counter()
+    for state in states:
+        await renderer.render(state)
+    return (time.perf_counter() - start) / len(states) * 1000
+
+
+async def run(count: int, font: str):
+    states = _states(count)
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cold = ProfileCardRenderer(cache_dir, font)
+        cold_ms = await _timed(cold, states)
+        memory_ms = await _timed(cold, states)
+        # A fresh renderer has an empty LRU, so every card comes from the disk cache
+        disk = ProfileCardRenderer(cache_dir, font)
+        disk_ms = await _timed(disk, states)
+    print(f"{count} 種狀態，字型 {os.path.basename(font)}")
+    print(f"{'cold (繪製)':<18} {cold_ms:>9.2f} ms/張  {cold.stats}")
+    print(f"{'warm (磁碟快取)':<18} {disk_ms:>9.3f} ms/張  {disk.stats}")
+    print(f"{'warm (記憶體 LRU)':<18} {memory_ms * 1000:>9.1f} µs/張")
+
+
+if __name__ == '__main__':
+    if profile_card.Image is None:
+        raise SystemExit("需要 Pillow：pip install Pillow")
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_STATES
+    font = sys.argv[2] if len(sys.argv) > 2 else (profile_card.find_font() or _fallback_font())
+    asyncio.run(run(count, font))
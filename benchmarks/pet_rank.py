@@ -0,0 +1,59 @@
+"""寵物戰力排行榜（PetRanking）的建立、查詢與更新延遲。
+
+用法（在專案根目錄執行）：
+    python -m benchmarks.pet_rank            # 預設 300,000 隻寵物
+    python -m benchmarks.pet_rank 1000000
+"""
+import random
+import sys
+import time
+
+from cogs.pet_utils.ranking import PetRanking
+
+DEFAULT_SIZE = 300_000
+OPS = 100_000
+
+
+def _per_op_us(fn, ops=OPS):
+    start = time.perf_counter()
+    for _ in range(ops):
+        fn()
+    return (time.perf_counter() - start) / ops * 1e6
+
+
+def _random_pet():
+    level = random.randint(1, 100)
+    return {"level": level, "stats": {
+        "max_hp": 80 + level * random.randint(5, 20),
+        "atk": 15 + level * random.randint(2, 8),
+        "def": 5 + level * random.randint(1, 10),
+    }}
+
+
+def run(size: int):
+    pets = {str(uid): _random_pet() for uid in range(1, size + 1)}
+    members = list(range(1, size + 1))
+    start = time.perf_counter()
+    ranking = PetRanking(pets.items())
+    build_ms = (time.perf_counter() - start) * 1000
+
+    def train():
+        # Same shape as a level up: mutate the live record, then re-rank it
+        uid = random.choice(members)
+        pet = pets[str(uid)]
+        pet["level"] = min(100, pet["level"] + 1)
+        pet["stats"]["atk"] += 3
+        ranking.update(uid, pet)
+
+    rows = [
+        ('rank(user)', _per_op_us(lambda: ranking.rank(random.choice(members)))),
+        ('page(random page, 10)', _per_op_us(lambda: ranking.page(random.randrange(size), 10))),
+        ('update(user, pet)', _per_op_us(train)),
+    ]
+    print(f"\n=== {size:,} pets | build {build_ms:.0f} ms ===")
+    for name, us in rows:
+        print(f"{name:<26}{us:>10.2f} µs/op")
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_SIZE)
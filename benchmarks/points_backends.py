@@ -0,0 +1,83 @@
+"""比較 JSON 與 SQLite 積分後端的效能。
+
+用法（在專案根目錄執行）：
+    python -m benchmarks.points_backends            # 10k / 100k / 1M 使用者
+    python -m benchmarks.points_backends 10000      # 只跑指定規模
+
+每個規模都會在暫存資料夾產生一份 points.json，SQLite 後端透過一次性匯入建立，
+接著量測：啟動載入、冷讀取單一使用者、單人更新寫回、100 人批次更新寫回。
+（JSON 後端的寫回是追加日誌 + fsync，整份快照只在壓縮時才改寫。）
+"""
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+from cogs.points_utils.backends import JsonBackend, SqliteBackend
+from cogs.points_utils.journal import PointsEntry
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+BASE_USER_ID = 100_000_000_000_000_000  # Snowflake-sized ids
+
+
+def _timed(fn, repeat=1):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000  # ms
+
+
+def _entry(user_id):
+    return PointsEntry(user_id, 1, 'bench', time.time())
+
+
+def _bench_backend(name, backend_factory, user_ids):
+    rows = {}
+    backend = None
+
+    def _open():
+        nonlocal backend
+        backend = backend_factory()
+        backend.preload()
+
+    rows['open+preload'] = _timed(_open)
+    sample = random.sample(user_ids, 100)
+    rows['get (x100 avg)'] = _timed(lambda: backend.get(random.choice(sample)), repeat=100)
+    rows['apply 1 user'] = _timed(lambda: backend.apply([_entry(sample[0])]), repeat=5)
+    rows['apply 100 users'] = _timed(lambda: backend.apply([_entry(uid) for uid in sample]), repeat=5)
+    backend.close()
+    return name, rows
+
+
+def run(size: int):
+    workdir = tempfile.mkdtemp(prefix='points_bench_')
+    try:
+        json_path = os.path.join(workdir, 'points.json')
+        user_ids = [str(BASE_USER_ID + i) for i in range(size)]
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump({uid: random.randint(0, 100_000) for uid in user_ids}, f)
+
+        db_path = os.path.join(workdir, 'points.db')
+        import_ms = _timed(lambda: SqliteBackend(db_path, import_from=json_path).close())
+
+        results = [
+            _bench_backend('json', lambda: JsonBackend(json_path), user_ids),
+            _bench_backend('sqlite', lambda: SqliteBackend(db_path), user_ids),
+        ]
+
+        print(f"\n=== {size:,} users (json import into sqlite: {import_ms:.1f} ms) ===")
+        metrics = list(results[0][1].keys())
+        print(f"{'metric':<18}" + "".join(f"{name:>14}" for name, _ in results))
+        for metric in metrics:
+            print(f"{metric:<18}" + "".join(f"{rows[metric]:>11.3f} ms" for _, rows in results))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    sizes = [int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES
+    for n in sizes:
+        run(n)
@@ -0,0 +1,80 @@
+"""比較原本每次呼叫都 `_load_points`（整份解析 points.json）的路徑與記憶體映射雜湊表。
+
+用法（在專案根目錄執行）：
+    python -m benchmarks.points_mmap            # 預設 1,000,000 位使用者
+    python -m benchmarks.points_mmap 200000
+"""
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+from cogs.points_utils.journal import PointsEntry
+from cogs.points_utils.mmap_store import MmapBackend, MmapBalanceTable
+
+DEFAULT_SIZE = 1_000_000
+BASE_USER_ID = 100_000_000_000_000_000  # Snowflake-sized ids
+
+
+def _timed(fn, repeat=1):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000  # ms
+
+
+def run(size: int):
+    workdir = tempfile.mkdtemp(prefix='points_mmap_bench_')
+    try:
+        json_path = os.path.join(workdir, 'points.json')
+        user_ids = [BASE_USER_ID + i * 4_194_304 for i in range(size)]  # Same spacing as real snowflakes
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump({str(uid): random.randint(0, 100_000) for uid in user_ids}, f, indent=4)
+        sample = random.sample(user_ids, 1000)
+
+        # Baseline: what get_points / update_points did before the write-back cache
+        def legacy_get():
+            with open(json_path, 'r', encoding='utf-8') as f:
+                return json.load(f).get(str(sample[0]), 0)
+
+        def legacy_update():
+            with open(json_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            data[str(sample[0])] = data.get(str(sample[0]), 0) + 1
+            with open(json_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=4)
+
+        rows = [
+            ('legacy _load_points get', _timed(legacy_get, repeat=3)),
+            ('legacy load+save update', _timed(legacy_update, repeat=3)),
+        ]
+
+        bin_path = os.path.join(workdir, 'points.bin')
+        rows.append(('mmap import from json', _timed(lambda: MmapBackend(bin_path, import_from=json_path).close())))
+        rows.append(('mmap open (cold)', _timed(lambda: MmapBackend(bin_path).close())))
+
+        table = MmapBalanceTable(bin_path)
+        picks = iter(sample * 100)
+        rows.append(('mmap table get', _timed(lambda: table.get(next(picks)), repeat=100_000)))
+        picks = iter(sample * 100)
+        rows.append(('mmap table add', _timed(lambda: table.add(next(picks), 1), repeat=100_000)))
+        table.close()
+
+        backend = MmapBackend(bin_path)
+        entry = [PointsEntry(str(sample[0]), 1, 'bench', time.time())]
+        rows.append(('mmap backend apply (fsync)', _timed(lambda: backend.apply(entry), repeat=20)))
+        backend.close()
+
+        print(f"\n=== {size:,} users | points.json {os.path.getsize(json_path) / 1e6:.1f} MB"
+              f" | points.bin {os.path.getsize(bin_path) / 1e6:.1f} MB ===")
+        for name, ms in rows:
+            print(f"{name:<28}{ms:>12.4f} ms")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_SIZE)
@@ -0,0 +1,87 @@
+"""!give 轉帳的併發壓力測試：大量同時轉帳後，檢查積分總量守恆且沒有人變成負數。
+
+用法（在專案根目錄執行）：
+    python -m benchmarks.points_transfer                    # sqlite，10,000 人，50,000 筆轉帳
+    python -m benchmarks.points_transfer json 1000 20000    # 後端 / 使用者數 / 轉帳筆數
+
+使用者一開始都不在快取中（sqlite / mmap），第一次轉帳會在鎖內等待背景執行緒讀取，
+因此轉帳之間會真的交錯執行；隨機配對包含 A→B 與 B→A 同時發生的情況，用來驗證不會死結。
+結束後會關閉再重新開啟後端，確認寫回磁碟的總量也一致。
+"""
+import asyncio
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+import discord
+from discord.ext import commands
+
+import cogs.points as points
+from cogs.points_utils.backends import create_backend
+
+DEFAULT_BACKEND = 'sqlite'
+DEFAULT_USERS = 10_000
+DEFAULT_TRANSFERS = 50_000
+BASE_USER_ID = 100_000_000_000_000_000  # Snowflake-sized ids
+STARTING_BALANCE = 1_000
+
+
+async def _run(kind: str, users: int, transfers: int):
+    workdir = tempfile.mkdtemp(prefix='points_transfer_')
+    try:
+        user_ids = [BASE_USER_ID + i for i in range(users)]
+        with open(os.path.join(workdir, 'points.json'), 'w', encoding='utf-8') as f:
+            json.dump({str(uid): STARTING_BALANCE for uid in user_ids}, f)
+        expected_total = users * STARTING_BALANCE
+
+        points.DATA_DIR = workdir
+        points.GUILD_DATA_DIR = os.path.join(workdir, 'guilds')
+        points.ECONOMY_MODES_FILE = os.path.join(workdir, 'economy_modes.json')
+        points.POINTS_BACKEND = kind
+        bot = commands.Bot(command_prefix='!', intents=discord.Intents.default())
+        cog = points.PointsCog(bot)
+        await bot.add_cog(cog)
+
+        async def one_transfer():
+            src, dst = random.sample(user_ids, 2)
+            return await cog.transfer(src, dst, random.randint(1, 400))
+
+        start = time.perf_counter()
+        results = await asyncio.gather(*(one_transfer() for _ in range(transfers)))
+        elapsed = time.perf_counter() - start
+
+        balances = [cog.get_points(uid) for uid in user_ids]
+        live_total = sum(balances)
+        supply = cog.global_ledger.telemetry.supply
+        await bot.remove_cog('Points')
+
+        backend = create_backend(kind, workdir)
+        stored_total = sum(backend.get(str(uid)) or 0 for uid in user_ids)
+        backend.close()
+
+        done = sum(1 for r in results if r is not None)
+        print(f"\n=== {kind} | {users:,} users | {transfers:,} concurrent transfers ===")
+        print(f"elapsed            {elapsed * 1000:>10.1f} ms ({transfers / elapsed:,.0f} transfers/s)")
+        print(f"succeeded          {done:>10,} ({transfers - done:,} rejected for insufficient funds)")
+        print(f"min balance        {min(balances):>10,}")
+        print(f"total (expected)   {expected_total:>10,}")
+        print(f"total (in memory)  {live_total:>10,}")
+        print(f"total (on disk)    {stored_total:>10,}")
+        print(f"telemetry supply   {supply:>10,}")
+        conserved = live_total == stored_total == supply == expected_total and min(balances) >= 0
+        print("OK: supply conserved" if conserved else "FAIL: supply not conserved")
+        return conserved
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    kind = args[0] if args else DEFAULT_BACKEND
+    users = int(args[1]) if len(args) > 1 else DEFAULT_USERS
+    transfers = int(args[2]) if len(args) > 2 else DEFAULT_TRANSFERS
+    sys.exit(0 if asyncio.run(_run(kind, users, transfers)) else 1)
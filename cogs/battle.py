@@ -2,27 +2,25 @@ import discord
 from discord.ext import commands
 import random
 import asyncio
-import os
-import json
+import copy
+from .pet_utils.game_config import game_config
 from .ui.battle_views import ChallengeView, PVPBattleView, BattleSkillView
 
 
 
-PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-SKILLS_FILE = os.path.join(PROJECT_ROOT, 'configs', 'skills.json')
+WIN_REWARD_EXP = 20
+LOSE_REWARD_EXP = 5
 
 class BattleCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.battles = {} # battle_id -> state
         self.battle_counter = 0
-        self.skills_db = self._load_json(SKILLS_FILE)
 
-    def _load_json(self, filepath):
-        try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except: return {}
+    @property
+    def config(self):
+        # Shared with PetCog and swapped by !reloadconfig, so always read the current one
+        return game_config()
 
     @commands.command(name="battle")
     async def battle(self, ctx, target: discord.Member):
@@ -33,11 +31,13 @@ class BattleCog(commands.Cog):
         pet_cog = self.bot.get_cog("PetCog")
         if not pet_cog: return await ctx.send("寵物系統維護中。")
 
-        p1_pet = pet_cog._get_pet(ctx.author.id)
-        p2_pet = pet_cog._get_pet(target.id)
+        p1_pet = await pet_cog._fetch_pet(ctx.author.id)
+        p2_pet = await pet_cog._fetch_pet(target.id)
 
         if not p1_pet: return await ctx.send("你還沒有領養寵物！")
         if not p2_pet: return await ctx.send(f"{target.display_name} 還沒有領養寵物！")
+        if pet_cog.away_message(p1_pet): return await ctx.send(pet_cog.away_message(p1_pet))
+        if pet_cog.away_message(p2_pet): return await ctx.send(f"{target.display_name} 的寵物正在遠征中，等牠回來再挑戰吧！")
 
         # Send Challenge
         embed = discord.Embed(title="⚔️ PVP 挑戰書", description=f"{ctx.author.mention} 向 {target.mention} 發起了挑戰！\n雙方準備好了嗎？", color=0xFF0000)
@@ -49,8 +49,9 @@ class BattleCog(commands.Cog):
         self.battle_counter += 1
         
         pet_cog = self.bot.get_cog("PetCog")
-        p1_pet = pet_cog._get_pet(p1_id)
-        p2_pet = pet_cog._get_pet(p2_id)
+        # Copies: _fetch_pet hands out the live records, the battle works on a frozen snapshot
+        p1_pet = copy.deepcopy(await pet_cog._fetch_pet(p1_id))
+        p2_pet = copy.deepcopy(await pet_cog._fetch_pet(p2_id))
 
         # Fetch User Names
         p1_user = self.bot.get_user(p1_id)
@@ -183,12 +184,12 @@ class BattleCog(commands.Cog):
         defender_id = [pid for pid in battle['turn_order'] if pid != attacker_id][0]
         defender = battle['players'][defender_id]
 
-        skill_data = self.skills_db.get(skill_name)
+        skill_data = self.config.skill(skill_name)
         if not skill_data:
              return await interaction.response.send_message("技能資料錯誤！", ephemeral=True)
              
         # Check AP
-        cost = skill_data['cost']
+        cost = skill_data.cost
         if attacker['ap'] < cost:
              return await interaction.response.send_message(f"AP 不足！需要 {cost} AP。", ephemeral=True)
 
@@ -196,9 +197,9 @@ class BattleCog(commands.Cog):
         attacker['ap'] -= cost
         
         # Calculate Damage
-        power = skill_data['power']
+        power = skill_data.power
         
-        if skill_data['category'] == 'status':
+        if skill_data.category == 'status':
              dmg = 0
              msg = f"✨ **{attacker['name']}** 使用了 **{skill_name}**！\n(狀態效果尚未實裝)"
         else:
@@ -233,33 +234,29 @@ class BattleCog(commands.Cog):
 
         # Save Results
         pet_cog = self.bot.get_cog("PetCog")
+        level_lines = []
         if pet_cog:
-            data = pet_cog._load_data()
-            
             # Update Winner
-            w_pet = data.get(str(winner_id))
+            w_pet = await pet_cog._fetch_pet(winner_id)
             if w_pet:
-                w_pet['exp'] += 20
-                if w_pet['exp'] >= (w_pet['level']**2)*50 and w_pet['level'] < 100:
-                    w_pet['exp'] -= (w_pet['level']**2)*50
-                    w_pet['level'] += 1
-                    # Simple level up stats
-                    w_pet['stats']['max_hp'] += 5
-                    w_pet['stats']['hp'] = w_pet['stats']['max_hp']
-                    w_pet['stats']['atk'] += 2
-                    w_pet['stats']['def'] += 1
-                    w_pet['ap'] = 6
+                levels, _ = pet_cog._gain_exp(w_pet, WIN_REWARD_EXP)
+                if levels:
+                    level_lines.append(f"🎉 {winner['name']} 的嘎蛙升到了 Lv.{w_pet['level']}！")
+                pet_cog._touch(w_pet)
+                pet_cog._save_pet(winner_id, w_pet)
 
             # Update Loser
-            l_pet = data.get(str(loser_id))
+            l_pet = await pet_cog._fetch_pet(loser_id)
             if l_pet:
-                l_pet['exp'] += 5
+                levels, _ = pet_cog._gain_exp(l_pet, LOSE_REWARD_EXP)
+                if levels:
+                    level_lines.append(f"🎉 {loser['name']} 的嘎蛙升到了 Lv.{l_pet['level']}！")
+                pet_cog._touch(l_pet)
                 # l_pet['stats']['hp'] = 1 # No penalty requested by user
-            
-            pet_cog._save_data(data)
-            
-        embed = discord.Embed(title="🏆 戰鬥結束！", description=f"🎉 勝利者: **{winner['name']}** (+20 EXP)\n💀 落敗者: {loser['name']} (+5 EXP)", color=0xFFD700)
-        embed.add_field(name="戰利品", value="戰鬥資料已儲存！")
+                pet_cog._save_pet(loser_id, l_pet)
+
+        embed = discord.Embed(title="🏆 戰鬥結束！", description=f"🎉 勝利者: **{winner['name']}** (+{WIN_REWARD_EXP} EXP)\n💀 落敗者: {loser['name']} (+{LOSE_REWARD_EXP} EXP)", color=0xFFD700)
+        embed.add_field(name="戰利品", value="\n".join(level_lines) or "戰鬥資料已儲存！")
         
         await interaction.response.edit_message(embed=embed, view=None)
 
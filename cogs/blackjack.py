@@ -26,10 +26,12 @@ def render_cards(cards):
 
 # --- Views ---
 class BlackjackView(discord.ui.View):
-    def __init__(self, cog: commands.Cog, owner_id: int):
+    def __init__(self, cog: commands.Cog, owner_id: int, channel_id: int):
         super().__init__(timeout=300)
         self.cog = cog
         self.owner_id = owner_id
+        self.channel_id = channel_id
+        self.table = cog.tables.get(channel_id)  # The hand this view controls
 
     async def interaction_check(self, interaction: discord.Interaction) -> bool:
         if interaction.user.id != self.owner_id:
@@ -45,6 +47,10 @@ class BlackjackView(discord.ui.View):
     async def stand_btn(self, interaction: discord.Interaction, button: discord.ui.Button):
         await self.cog.handle_stand(interaction)
 
+    async def on_timeout(self):
+        # An abandoned hand never settled before escrow existed either: release the stake
+        self.cog.abandon_table(self.channel_id, self.table)
+
 class PlayAgainView(discord.ui.View):
     """A view with a 'Play Again' button that carries over the previous bet."""
     def __init__(self, cog: commands.Cog, owner_id: int, previous_bet: int):
@@ -97,9 +103,18 @@ class BlackjackCog(commands.Cog):
         if bet < 0:
             return await channel.send('賭注必須是非負整數。')
 
-        player_points = self.points_cog.get_points(author.id)
-        if bet > player_points:
-            return await channel.send(f'你的積分不足。目前餘額：{player_points}')
+        guild_id = channel.guild.id if getattr(channel, 'guild', None) else None
+        escrow = None
+        if bet > 0:
+            escrow = await self.points_cog.reserve(author.id, bet, source="blackjack", guild_id=guild_id)
+            if not escrow:
+                return await channel.send(f'你的積分不足。目前餘額：{await self.points_cog.fetch_points(author.id, guild_id=guild_id)}')
+        else:
+            # Free hands show the balance at the end; load it now so the final embed never reads storage synchronously
+            await self.points_cog.fetch_points(author.id, guild_id=guild_id)
+
+        # A new hand replaces whatever was left on this table
+        self.abandon_table(channel.id)
 
         deck = build_shuffled_deck()
         player_hand = [deck.pop(), deck.pop()]
@@ -107,7 +122,8 @@ class BlackjackCog(commands.Cog):
 
         self.tables[channel.id] = {
             'deck': deck, 'player_hand': player_hand, 'dealer_hand': dealer_hand,
-            'bet': bet, 'owner_id': author.id, 'finished': False
+            'bet': bet, 'owner_id': author.id, 'finished': False, 'escrow': escrow,
+            'guild_id': guild_id,
         }
 
         p_val = hand_value(player_hand)
@@ -119,7 +135,7 @@ class BlackjackCog(commands.Cog):
             view = PlayAgainView(self, author.id, bet)
         else:
             embed = self._build_status_embed(self.tables[channel.id])
-            view = BlackjackView(self, author.id)
+            view = BlackjackView(self, author.id, channel.id)
 
         if is_interaction:
             # The original message with the play again button has been edited, 
@@ -155,6 +171,15 @@ class BlackjackCog(commands.Cog):
         view = PlayAgainView(self, table['owner_id'], table['bet'])
         await interaction.response.edit_message(embed=final_embed, view=view)
 
+    def abandon_table(self, channel_id: int, expected_table: dict = None):
+        """退還未完成牌局的賭注並移除牌桌（有給 expected_table 時，只在它仍是目前牌局才處理）。"""
+        table = self.tables.get(channel_id)
+        if not table or (expected_table is not None and table is not expected_table):
+            return
+        if not table.get('finished') and table.get('escrow'):
+            table['escrow'].refund()
+        del self.tables[channel_id]
+
     def _decide_result(self, p_val, d_val):
         if p_val > 21: return 'lose'
         if d_val > 21 or p_val > d_val: return 'win'
@@ -180,11 +205,10 @@ class BlackjackCog(commands.Cog):
         owner_id, bet = table['owner_id'], table['bet']
         delta = bet if result == 'win' else -bet if result == 'lose' else 0
 
-        if bet > 0 and delta != 0:
-            self.points_cog.update_points(owner_id, delta)
-        
+        # Settle the reserved stake in one write: stake back plus winnings, or nothing on a loss
+        escrow = table.get('escrow')
         table['finished'] = True
-        new_total = self.points_cog.get_points(owner_id)
+        new_total = escrow.commit(bet + delta) if escrow else self.points_cog.get_points(owner_id, guild_id=table.get('guild_id'))
 
         title, color = {'win': ('你贏了！🎉', 0x43a047), 'lose': ('你輸了。', 0xe53935), 'push': ('平手。', 0x9e9e9e)}[result]
         embed = self._build_status_embed(table, reveal_dealer=True)
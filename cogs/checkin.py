@@ -1,9 +1,12 @@
+import asyncio
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 import os
 import json
 from datetime import datetime, timezone, timedelta
 
+from .storage_utils.cold_archive import ColdArchive, TIERING_INTERVAL_HOURS, archive_cutoff, select_inactive
+
 class CheckinCog(commands.Cog):
 
     def __init__(self, bot):
@@ -13,6 +16,44 @@ class CheckinCog(commands.Cog):
         data_dir = os.path.join(root_dir, 'data')
         self.checkin_path = os.path.join(data_dir, 'checkin.json')
         self.user_checkin = self._load_json(self.checkin_path, default={})
+        self.archive = ColdArchive(os.path.join(data_dir, 'archive', 'checkin'))
+        # gzip reads/writes run in a worker thread; the archive itself is not thread-safe
+        self._archive_lock = asyncio.Lock()
+
+    async def cog_load(self):
+        self.tiering_loop.start()
+
+    async def cog_unload(self):
+        self.tiering_loop.cancel()
+
+    @tasks.loop(hours=TIERING_INTERVAL_HOURS)
+    async def tiering_loop(self):
+        """把太久沒簽到的使用者搬到冷資料區，checkin.json 只保留近期活躍的人。"""
+        cutoff = archive_cutoff()
+        if cutoff is None:
+            return
+        inactive = select_inactive(self.user_checkin, self._last_checkin_ts, cutoff)
+        if not inactive:
+            return
+        # Archive first, then drop from the hot file: a crash in between leaves a harmless duplicate
+        async with self._archive_lock:
+            await asyncio.to_thread(self.archive.archive, {uid: dict(self.user_checkin[uid]) for uid in inactive})
+        # Someone who checked in while the segment was written stays hot; the stale copy is dropped
+        current = {uid: self.user_checkin[uid] for uid in inactive if uid in self.user_checkin}
+        inactive = select_inactive(current, self._last_checkin_ts, cutoff)
+        for uid in inactive:
+            del self.user_checkin[uid]
+        revived = set(current).difference(inactive)
+        if revived:
+            async with self._archive_lock:
+                await asyncio.to_thread(self.archive.discard, revived)
+        self._save_json(self.checkin_path, self.user_checkin)
+        print(f"已封存 {len(inactive)} 位不活躍使用者的簽到資料。")
+
+    @staticmethod
+    def _last_checkin_ts(record):
+        last_iso = record.get('last_checkin_iso')
+        return datetime.fromisoformat(last_iso).timestamp() if last_iso else None
 
     @commands.Cog.listener()
     async def on_ready(self):
@@ -31,7 +72,15 @@ class CheckinCog(commands.Cog):
         user_id_int = ctx.author.id
         now = datetime.now(timezone.utc)
 
-        # Initialize user check-in data if not present
+        # Bring back an archived record (keeps first-bonus status), else initialize a new one
+        rehydrated = False
+        if user_id not in self.user_checkin and user_id in self.archive:
+            async with self._archive_lock:
+                record = await asyncio.to_thread(self.archive.load, user_id)
+            # A second !checkin may have brought it back while this one waited
+            if record is not None and user_id not in self.user_checkin:
+                self.user_checkin[user_id] = record
+                rehydrated = True
         if user_id not in self.user_checkin:
             self.user_checkin[user_id] = {
                 'last_checkin_iso': None,
@@ -64,10 +113,13 @@ class CheckinCog(commands.Cog):
             record['first_bonus_received'] = True
 
         # CRITICAL: Update points using the centralized PointsCog
-        new_total = self.points_cog.update_points(user_id_int, gained)
+        new_total = self.points_cog.update_points(user_id_int, gained, source="checkin", guild_id=ctx.guild and ctx.guild.id)
 
         # Save only the check-in data
         self._save_json(self.checkin_path, self.user_checkin)
+        if rehydrated:
+            async with self._archive_lock:
+                await asyncio.to_thread(self.archive.discard, [user_id])
 
         await ctx.send(
             f"{ctx.author.mention} 簽到成功！本次獲得：{gained} 分\n"
@@ -81,7 +81,7 @@ class GuessNumberCog(commands.Cog, name="GuessNumber"):
             attempts = state["attempts"]
             reward = 100 if attempts <= 5 else (50 if attempts <= 10 else 20)
             
-            new_total = self.points_cog.update_points(message.author.id, reward)
+            new_total = self.points_cog.update_points(message.author.id, reward, source="guess_number", guild_id=message.guild and message.guild.id)
             
             reward_text = f' 獎勵 **+{reward}** 分，' if reward > 0 else ' '
             
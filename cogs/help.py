@@ -260,6 +260,11 @@ class HelpCog(commands.Cog):
         embed = discord.Embed(title='🔧 通用指令', description="點擊下方對應的中文指令按鈕來快速執行。", color=0x2ECC71)
         embed.add_field(name=f'{prefix}checkin', value='✨ **每日簽到**: 獲取每日積分獎勵，連續簽到有加成！', inline=False)
         embed.add_field(name=f'{prefix}point', value='💰 **查詢積分**: 查詢你目前擁有的積分總額。', inline=False)
+        embed.add_field(name=f'{prefix}history [@使用者] [頁數]', value='📜 **積分紀錄**: 分頁查看最近的積分異動與來源。', inline=False)
+        embed.add_field(name=f'{prefix}give @使用者 金額', value='🤝 **轉帳**: 把自己的積分轉給同伺服器的其他成員。', inline=False)
+        embed.add_field(name=f'{prefix}leaderboard [頁數] | {prefix}rank [@使用者]', value='🏆 **排行榜**: 查看積分排行榜或某人的名次。', inline=False)
+        embed.add_field(name=f'{prefix}economy [1h|24h|7d|30d]', value='📈 **經濟報告**: 查看各功能產生 / 銷毀的積分與貨幣總量。', inline=False)
+        embed.add_field(name=f'{prefix}economymode [global|guild]', value='🏦 **經濟模式** (管理員): 讓本伺服器共用全域積分或使用獨立積分。', inline=False)
         embed.add_field(name=f'{prefix}poll', value='📊 **投票系統**: 發起一個即時互動投票。', inline=False)
         embed.add_field(name=f'{prefix}remind [時間] [事項]', value='⏰ **提醒事項**: 設定倒數計時鬧鐘 (例: 10m)。', inline=False)
         embed.add_field(name=f'{prefix}clear [數量]', value='🧹 **清除訊息**: 清除頻道訊息(預設10則)，僅限管理員。', inline=False)
@@ -278,9 +283,15 @@ class HelpCog(commands.Cog):
         embed = discord.Embed(title='🐸 嘎蛙 RPG 指令', description="專屬你的養成遊戲！點擊下方按鈕或使用指令。", color=0xE91E63)
         embed.add_field(name=f'{prefix}adopt', value='🥚 **領養**: 三選一，挑選你的命定夥伴。', inline=False)
         embed.add_field(name=f'{prefix}pet', value='🐸 **狀態**: 查看嘎蛙的能力值、屬性、技能。', inline=False)
-        embed.add_field(name=f'{prefix}train', value='⚔️ **特訓**: 消耗體力，獲得經驗與成長。', inline=False)
+        embed.add_field(name=f'{prefix}train', value='⚔️ **特訓**: 消耗體力，獲得經驗與成長。狀態卡片上的「🔁 連續特訓」一次練到體力、AP 或飽食度用完 (最多 10 回)。', inline=False)
+        embed.add_field(name=f'{prefix}petrank [頁數] | {prefix}pet rank [@使用者]', value='🏆 **戰力排行**: 先比等級、再比戰力，查看排行榜或某人的名次。', inline=False)
+        embed.add_field(name=f'{prefix}expedition [小時]', value='🧭 **遠征**: 派嘎蛙出門 1~24 小時，回來時帶回經驗、積分或食物。遠征期間不能特訓、餵食或對戰。', inline=False)
+        embed.add_field(name=f'{prefix}talk [訊息]', value='💬 **聊天**: 和嘎蛙說說話，牠會用自己的個性回覆，也會記得你們聊過的事。', inline=False)
         embed.add_field(name=f'{prefix}shop', value='🍽️ **食堂**: 查看食物價目表。', inline=False)
+        embed.add_field(name=f'{prefix}buy <編號> [數量] | {prefix}bag | {prefix}use <編號>', value='🎒 **背包**: 從食堂買食物放進背包，之後再拿出來餵嘎蛙。', inline=False)
+        embed.add_field(name=f'{prefix}market [編號]', value='🏪 **市集**: 查看行情與買賣深度；`!market buy/sell <編號> <數量> <單價>` 掛限價單，`!market orders`、`!market cancel <單號>` 管理掛單。', inline=False)
         embed.add_field(name=f'{prefix}feed [編號]', value='🍖 **餵食**: 花費積分恢復體力 (例如 `!feed 1`)。', inline=False)
+        embed.set_footer(text="嘎蛙的飽食度會隨時間下降；吃飽時 AP 與 HP 會自己慢慢回復，餓扁了就不會。")
         return embed
 
     # --- 關鍵修改：help 指令現在會向 Poker cog 請求教學內容 ---
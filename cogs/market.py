@@ -0,0 +1,514 @@
+import discord
+from discord.ext import commands, tasks
+import asyncio
+import json
+import os
+import time
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from .market_utils.inventory import Inventory
+from .market_utils.journal import MarketJournal
+from .market_utils.orderbook import BUY, SELL, Fill, Market, Order
+from .ui.pet_views import FOOD_MENU
+
+# --- Configuration ---
+COG_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(COG_DIR)
+MARKET_FILE = os.path.join(PROJECT_ROOT, 'data', 'market.json')
+INVENTORY_FILE = os.path.join(PROJECT_ROOT, 'data', 'inventory.json')
+JOURNAL_FILE = os.path.join(PROJECT_ROOT, 'data', 'market.journal')
+FLUSH_INTERVAL_SECONDS = 2.0
+RECOVERY_HISTORY_SCAN = 50  # 重播時往回找幾筆積分紀錄來判斷市集紀錄是否已經入帳
+DEPTH_LEVELS = 5           # !market <商品> 顯示買賣各幾個價位
+MAX_OPEN_ORDERS = 20       # 每人在同一個市集最多同時掛幾張單
+MAX_ORDER_QTY = 999
+MAX_PRICE = 100_000
+MAX_SHOP_QTY = 20
+
+
+class MarketCog(commands.Cog, name="Market"):
+    """背包與玩家市集。
+
+    食物可以從食堂用積分買進背包，也可以在市集掛限價單和其他玩家交易（價格優先、時間優先撮合）。
+    每個經濟體（全域或獨立經濟的伺服器）各有一個市集和一份背包，成交以該經濟體的積分結算。
+    買單在掛出時先扣下最高總價，賣單先從背包扣下商品；撤單時退回剩下的部分。
+    單號在所有市集之間不重複。伺服器改回全域經濟前，它的市集會整個撤單退款（PointsCog 呼叫 close_guild_market）；
+    改成獨立經濟後，成員仍可查看並撤掉自己留在全域市集的掛單。
+
+    每次結算（訂單、背包與積分的變動）先寫成市集日誌的一筆紀錄，撮合到寫日誌之間沒有任何 await；
+    日誌 fsync 之後才把積分記進帳本。market.json 與 inventory.json 只是定期快照，
+    當機後載入時重播日誌，積分帳本裡找不到的市集紀錄會補記一次（以紀錄時間辨認），不會重複入帳。
+    """
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.journal = MarketJournal(JOURNAL_FILE)
+        self.inventory = Inventory(INVENTORY_FILE)
+        self.inventory.replay(self.journal.records)
+        self.markets: Dict[str, Market] = self._load_markets(self.journal.records)
+        # Order ids are unique across markets, so a cancel can fall back to the global market
+        self._next_order_id = max((market.next_id for market in self.markets.values()), default=1)
+        self._dirty = bool(self.journal.records)
+        # Journal records whose points are not in the ledger yet; until then their file is never dropped
+        self._unapplied: Set[int] = {record["seq"] for record in self.journal.records}
+        self._recovering = list(self.journal.records)
+        self._last_ts = 0.0
+        self._flush_lock = asyncio.Lock()
+
+    async def cog_load(self):
+        self.flush_loop.start()
+
+    async def cog_unload(self):
+        self.flush_loop.cancel()
+        await self.flush()
+        self.journal.close()
+
+    @commands.Cog.listener()
+    async def on_ready(self):
+        await self._recover_points()
+
+    # --- Persistence ---
+    def _load_markets(self, records: Iterable[Dict]) -> Dict[str, Market]:
+        """讀 market.json 快照，再重播日誌裡比快照新的訂單變動。"""
+        try:
+            with open(MARKET_FILE, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (json.JSONDecodeError, IOError):
+            data = {}
+        if "markets" not in data:
+            # Snapshots written before the journal existed: {key: market} with nothing to replay over
+            data = {"seq": 0, "markets": data}
+        raw = {
+            key: {"next_id": snap["next_id"], "orders": {order["id"]: order for order in snap["orders"]}}
+            for key, snap in data["markets"].items()
+        }
+        for record in records:
+            if record["seq"] <= data["seq"]:
+                continue
+            if record.get("closed"):
+                raw.pop(record["key"], None)
+                continue
+            snap = raw.setdefault(record["key"], {"next_id": 1, "orders": {}})
+            for order in record["orders"]:
+                # Records carry the order as it was left; filled or withdrawn orders are gone
+                if order["remaining"]:
+                    snap["orders"][order["id"]] = order
+                else:
+                    snap["orders"].pop(order["id"], None)
+            snap["next_id"] = max(snap["next_id"], record["next_id"])
+        return {key: Market(snap["orders"].values(), snap["next_id"]) for key, snap in raw.items()}
+
+    async def _recover_points(self):
+        """把載入時日誌裡的紀錄補進積分帳本；帳本裡已經有同一時間的市集紀錄就略過。"""
+        points_cog = self.bot.get_cog("Points")
+        if not points_cog or not self._recovering:
+            return
+        records, self._recovering = self._recovering, []
+        recovered = 0
+        for record in records:
+            ledger = points_cog.get_ledger(record["guild"])
+            missing = {}
+            with ledger.in_use():
+                for user_id, delta in record["points"].items():
+                    recent = await ledger.history(int(user_id), 0, RECOVERY_HISTORY_SCAN)
+                    if not any(entry.source == record["source"] and entry.ts == record["ts"] for entry in recent):
+                        missing[int(user_id)] = delta
+            if missing:
+                points_cog.update_points_many(missing, source=record["source"], guild_id=record["guild"], ts=record["ts"])
+                recovered += len(missing)
+            self._unapplied.discard(record["seq"])
+        if recovered:
+            print(f"市集日誌重播：補記了 {recovered} 筆尚未寫進積分帳本的異動。")
+
+    def _write(self, payload: str):
+        os.makedirs(os.path.dirname(MARKET_FILE), exist_ok=True)
+        tmp_path = MARKET_FILE + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(payload)
+        os.replace(tmp_path, MARKET_FILE)
+
+    async def flush(self):
+        """寫出市集與背包的快照；積分也寫回之後，才丟掉快照已經涵蓋的日誌。"""
+        async with self._flush_lock:
+            if not self._dirty and not self.inventory.dirty and not self.journal.has_records:
+                return
+            # Only records whose points already reached the ledger may be sealed
+            if not self._unapplied:
+                self.journal.seal()
+            seq = self.journal.seq
+            if self._dirty:
+                self._dirty = False
+                payload = json.dumps(
+                    {"seq": seq, "markets": {key: market.snapshot() for key, market in self.markets.items()}},
+                    ensure_ascii=False,
+                )
+                try:
+                    await asyncio.to_thread(self._write, payload)
+                except OSError as e:
+                    print(f"寫入市集資料時發生錯誤: {e}")
+                    self._dirty = True
+                    return
+            if not await self.inventory.flush(seq) or not self.journal.has_sealed:
+                return
+            points_cog = self.bot.get_cog("Points")
+            if points_cog and await points_cog.flush():
+                await asyncio.to_thread(self.journal.drop_sealed)
+
+    @tasks.loop(seconds=FLUSH_INTERVAL_SECONDS)
+    async def flush_loop(self):
+        await self.flush()
+
+    # --- Helpers ---
+    @staticmethod
+    def _resolve_item(text: str) -> Optional[str]:
+        """以編號或名稱找商品。"""
+        if text in FOOD_MENU:
+            return text
+        for item_id, item in FOOD_MENU.items():
+            if item['name'] == text:
+                return item_id
+        return None
+
+    def _economy(self, points_cog, guild_id: Optional[int]) -> Tuple[str, Optional[int]]:
+        """回傳 (市集鍵, 結算用的 guild_id)。共用全域經濟的伺服器共用同一個市集。"""
+        ledger = points_cog.get_ledger(guild_id)
+        if ledger is points_cog.global_ledger:
+            return "global", None
+        return str(guild_id), guild_id
+
+    def _market(self, key: str) -> Market:
+        market = self.markets.get(key)
+        if market is None:
+            market = self.markets[key] = Market()
+        return market
+
+    def _journal(self, key: str, guild_id: Optional[int], source: str, deltas: Dict[int, int],
+                 bags: List[Tuple[int, str, int]], orders: Iterable[Order] = (), closed: bool = False) -> Dict:
+        """把一次結算寫成一筆日誌紀錄並回傳它。背包變動要在呼叫前已經套用到記憶體。"""
+        # Recovery recognises a record in the points ledger by its timestamp, so no two records share one
+        self._last_ts = max(time.time(), self._last_ts + 1e-6)
+        record = {
+            "ts": self._last_ts, "key": key, "guild": guild_id, "source": source,
+            "points": {str(user_id): amount for user_id, amount in deltas.items() if amount},
+            "bags": [[key, user_id, item, qty] for user_id, item, qty in bags],
+            "orders": [order.to_dict() for order in orders],
+            "next_id": self._next_order_id,
+        }
+        if closed:
+            record["closed"] = True
+        record["seq"] = self.journal.append(record)
+        self._unapplied.add(record["seq"])
+        return record
+
+    async def _commit(self, points_cog, record: Dict, escrow=None):
+        """等日誌落地之後才把紀錄的積分記進帳本（買單先前圈存的金額在這裡轉成實際扣款）。"""
+        try:
+            await asyncio.to_thread(self.journal.sync)
+        except OSError as e:
+            print(f"寫入市集日誌時發生錯誤: {e}")
+        if escrow is not None:
+            # The debit itself is part of the record's points
+            escrow.refund()
+        if record["points"]:
+            deltas = {int(user_id): amount for user_id, amount in record["points"].items()}
+            points_cog.update_points_many(deltas, source=record["source"], guild_id=record["guild"], ts=record["ts"])
+        self._unapplied.discard(record["seq"])
+
+    def _settle(self, key: str, guild_id: Optional[int], fills: List[Fill], withdrawn: List[Tuple[Order, int]],
+                deltas: Optional[Dict[int, int]] = None, bags: Optional[List[Tuple[int, str, int]]] = None,
+                placed: Optional[Order] = None, closed: bool = False) -> Dict:
+        """把成交與被撤回的掛單反映到 key 經濟體的背包，連同積分變動寫成一筆日誌紀錄並回傳。
+
+        deltas / bags 是呼叫端已經發生的變動（買單的扣款、賣單從背包扣掉的商品），會一起寫進紀錄。
+        """
+        deltas = defaultdict(int, deltas or {})
+        bags = list(bags or [])
+        touched = {placed.id: placed} if placed else {}
+        for fill in fills:
+            deltas[fill.sell.user_id] += fill.price * fill.qty
+            # The buyer escrowed its own limit price; a cheaper fill gives the difference back
+            deltas[fill.buy.user_id] += (fill.buy.price - fill.price) * fill.qty
+            self.inventory.add(key, fill.buy.user_id, fill.buy.item, fill.qty)
+            bags.append((fill.buy.user_id, fill.buy.item, fill.qty))
+            touched.update({fill.buy.id: fill.buy, fill.sell.id: fill.sell})
+        for order, qty in withdrawn:
+            self._release(deltas, bags, key, order, qty)
+            touched[order.id] = order
+        self._dirty = True
+        return self._journal(key, guild_id, "market", deltas, bags, touched.values(), closed)
+
+    def _release(self, deltas: Dict[int, int], bags: List[Tuple[int, str, int]], key: str, order: Order, qty: int):
+        """退回撤掉的數量：買單退積分，賣單退商品到 key 經濟體的背包。"""
+        if order.side == BUY:
+            deltas[order.user_id] += order.price * qty
+        else:
+            self.inventory.add(key, order.user_id, order.item, qty)
+            bags.append((order.user_id, order.item, qty))
+
+    def _reachable_markets(self, key: str, guild_id: Optional[int]) -> List[Tuple[str, Optional[int], Market]]:
+        """這個經濟體的成員能管理掛單的市集 [(市集鍵, 結算用的 guild_id, 市集)]。
+
+        獨立經濟的伺服器也包含全域市集：切換經濟模式前留在那裡的掛單仍要能撤回（退回全域積分）。
+        """
+        reachable = [(key, guild_id, self._market(key))]
+        if key != "global" and "global" in self.markets:
+            reachable.append(("global", None, self.markets["global"]))
+        return reachable
+
+    async def close_guild_market(self, guild_id: int) -> int:
+        """伺服器即將改回全域經濟：撤掉它市集裡的所有掛單並退回該伺服器的積分與背包，回傳撤掉的張數。
+
+        必須在經濟模式真正切換之前呼叫，退款才會落在這個伺服器的獨立分片。
+        """
+        points_cog = self.bot.get_cog("Points")
+        key = str(guild_id)
+        market = self.markets.get(key)
+        if not points_cog or market is None:
+            return 0
+        withdrawn = [market.cancel(order_id) for order_id in list(market.orders)]
+        del self.markets[key]
+        await self._commit(points_cog, self._settle(key, guild_id, [], withdrawn, closed=True))
+        return len(withdrawn)
+
+    # --- Shop & Inventory ---
+    @commands.command(name="shop", aliases=["食堂"])
+    async def shop(self, ctx):
+        """查看食堂的食物價目表"""
+        lines = []
+        for item_id, item in FOOD_MENU.items():
+            buff = " [BUFF]" if item['buff'] else ""
+            lines.append(f"`{item_id}` **{item['name']}** — ${item['price']} | ❤️+{item['heal']} 🍖+{item['satiety']}{buff}")
+        embed = discord.Embed(title="🍽️ 嘎蛙食堂", description="\n".join(lines), color=0xE67E22)
+        embed.set_footer(text="!buy <編號> [數量] 買進背包，!use <編號> 餵給嘎蛙，也可以到 !market 和其他玩家交易")
+        await ctx.send(embed=embed)
+
+    @commands.command(name="buy")
+    @commands.guild_only()
+    async def buy(self, ctx, item: str, qty: int = 1):
+        """從食堂買食物放進背包"""
+        item_id = self._resolve_item(item)
+        if not item_id:
+            await ctx.send("找不到這個商品，輸入 `!shop` 查看編號。")
+            return
+        if not 1 <= qty <= MAX_SHOP_QTY:
+            await ctx.send(f"一次最多買 {MAX_SHOP_QTY} 份。")
+            return
+        points_cog = self.bot.get_cog("Points")
+        if not points_cog:
+            await ctx.send("積分系統維護中。")
+            return
+        key, guild_id = self._economy(points_cog, ctx.guild.id)
+        cost = FOOD_MENU[item_id]['price'] * qty
+        escrow = await points_cog.reserve(ctx.author.id, cost, source="pet_shop", guild_id=guild_id)
+        if escrow is None:
+            await ctx.send(f"💸 積分不足！(需 ${cost})")
+            return
+        # The purchase and the bag change are journaled together, like a market settlement
+        self.inventory.add(key, ctx.author.id, item_id, qty)
+        record = self._journal(key, guild_id, "pet_shop", {ctx.author.id: -cost}, [(ctx.author.id, item_id, qty)])
+        await self._commit(points_cog, record, escrow)
+        await ctx.send(f"🛍️ 買了 **{FOOD_MENU[item_id]['name']}** x{qty}（-${cost}），已放進背包。")
+
+    @commands.command(name="bag", aliases=["背包"])
+    async def bag(self, ctx):
+        """查看背包裡的食物"""
+        points_cog = self.bot.get_cog("Points")
+        if not points_cog:
+            await ctx.send("積分系統維護中。")
+            return
+        key, _ = self._economy(points_cog, ctx.guild and ctx.guild.id)
+        bag = self.inventory.bag(key, ctx.author.id)
+        if not bag:
+            await ctx.send("背包是空的。輸入 `!shop` 看看有什麼可以買。")
+            return
+        lines = [f"`{item_id}` {FOOD_MENU[item_id]['name']} x{count}" for item_id, count in sorted(bag.items()) if item_id in FOOD_MENU]
+        embed = discord.Embed(title=f"🎒 {ctx.author.display_name} 的背包", description="\n".join(lines), color=0x95A5A6)
+        await ctx.send(embed=embed)
+
+    @commands.command(name="use")
+    async def use(self, ctx, item: str):
+        """把背包裡的食物餵給嘎蛙"""
+        points_cog = self.bot.get_cog("Points")
+        if not points_cog:
+            await ctx.send("積分系統維護中。")
+            return
+        key, _ = self._economy(points_cog, ctx.guild and ctx.guild.id)
+        item_id = self._resolve_item(item)
+        if not item_id or not self.inventory.count(key, ctx.author.id, item_id):
+            await ctx.send("背包裡沒有這個食物。")
+            return
+        pet_cog = self.bot.get_cog("PetCog")
+        if not pet_cog:
+            await ctx.send("寵物系統維護中。")
+            return
+        pet = await pet_cog._fetch_pet(ctx.author.id)
+        if not pet:
+            await ctx.send("你還沒有領養嘎蛙喔！")
+            return
+        away = pet_cog.away_message(pet)
+        if away:
+            await ctx.send(away)
+            return
+        if pet['stats']['hp'] >= pet['stats']['max_hp'] and pet['stats'].get('satiety', 0) >= 100:
+            await ctx.send("🤢 吃太飽了！")
+            return
+        item_data = FOOD_MENU[item_id]
+        self.inventory.remove(key, ctx.author.id, item_id, 1)
+        heal, sat = pet_cog.eat(pet, item_data)
+        pet_cog._touch(pet)
+        pet_cog._save_pet(ctx.author.id, pet)
+        await ctx.send(f"😋 吃了 **{item_data['name']}**！(HP +{heal} | 飽食 +{sat})")
+
+    # --- Market ---
+    def build_depth_embed(self, market: Market, item_id: str) -> discord.Embed:
+        book = market.book(item_id)
+        asks = book.depth(SELL, DEPTH_LEVELS)
+        bids = book.depth(BUY, DEPTH_LEVELS)
+        lines = [f"賣 {price:>7} × {qty}" for price, qty in reversed(asks)]
+        if asks and bids:
+            lines.append(f"──── 價差 {asks[0][0] - bids[0][0]} ────")
+        else:
+            lines.append("────────────")
+        lines += [f"買 {price:>7} × {qty}" for price, qty in bids]
+        embed = discord.Embed(title=f"🏪 市集 — {FOOD_MENU[item_id]['name']}", description=f"```\n{chr(10).join(lines)}\n```", color=0x1ABC9C)
+        embed.set_footer(text="!market buy/sell <商品> <數量> <單價> 掛單 | !market orders 查看自己的掛單")
+        return embed
+
+    def build_overview_embed(self, market: Market) -> discord.Embed:
+        lines = []
+        for item_id, item in FOOD_MENU.items():
+            book = market.book(item_id)
+            bid, ask = book.best(BUY), book.best(SELL)
+            lines.append(
+                f"`{item_id}` **{item['name']}** — 買 {bid.price if bid else '－'} / 賣 {ask.price if ask else '－'}"
+                f"（掛單 {len(book)} 張）"
+            )
+        embed = discord.Embed(title="🏪 玩家市集", description="\n".join(lines), color=0x1ABC9C)
+        embed.set_footer(text="!market <商品> 查看買賣深度")
+        return embed
+
+    @commands.group(name="market", aliases=["市集"], invoke_without_command=True)
+    @commands.guild_only()
+    async def market(self, ctx, item: Optional[str] = None):
+        """查看市集行情；指定商品時顯示買賣深度"""
+        points_cog = self.bot.get_cog("Points")
+        if not points_cog:
+            await ctx.send("積分系統維護中。")
+            return
+        market = self._market(self._economy(points_cog, ctx.guild.id)[0])
+        if item is None:
+            await ctx.send(embed=self.build_overview_embed(market))
+            return
+        item_id = self._resolve_item(item)
+        if not item_id:
+            await ctx.send("找不到這個商品，輸入 `!shop` 查看編號。")
+            return
+        await ctx.send(embed=self.build_depth_embed(market, item_id))
+
+    async def _place(self, ctx, side: str, item: str, qty: int, price: int):
+        item_id = self._resolve_item(item)
+        if not item_id:
+            await ctx.send("找不到這個商品，輸入 `!shop` 查看編號。")
+            return
+        if not 1 <= qty <= MAX_ORDER_QTY or not 1 <= price <= MAX_PRICE:
+            await ctx.send(f"數量必須是 1~{MAX_ORDER_QTY}，單價必須是 1~{MAX_PRICE}。")
+            return
+        points_cog = self.bot.get_cog("Points")
+        if not points_cog:
+            await ctx.send("積分系統維護中。")
+            return
+        key, guild_id = self._economy(points_cog, ctx.guild.id)
+        market = self._market(key)
+        if market.open_count(ctx.author.id) >= MAX_OPEN_ORDERS:
+            await ctx.send(f"你已經有 {MAX_OPEN_ORDERS} 張掛單了，先撤掉一些吧（`!market orders`）。")
+            return
+
+        escrow = None
+        if side == BUY:
+            escrow = await points_cog.reserve(ctx.author.id, qty * price, source="market", guild_id=guild_id)
+            if escrow is None:
+                await ctx.send(f"💸 積分不足！掛買單需要先扣下 ${qty * price}。")
+                return
+            placed_deltas, placed_bags = {ctx.author.id: -qty * price}, []
+        elif self.inventory.remove(key, ctx.author.id, item_id, qty):
+            placed_deltas, placed_bags = {}, [(ctx.author.id, item_id, -qty)]
+        else:
+            await ctx.send(f"背包裡的 {FOOD_MENU[item_id]['name']} 不夠 {qty} 份。")
+            return
+
+        # No await until the journal line is written: matching, bags and the record change together
+        order, fills, withdrawn = market.place(ctx.author.id, item_id, side, price, qty, order_id=self._next_order_id)
+        self._next_order_id = order.id + 1
+        record = self._settle(key, guild_id, fills, withdrawn, placed_deltas, placed_bags, placed=order)
+        await self._commit(points_cog, record, escrow)
+
+        name = FOOD_MENU[item_id]['name']
+        verb = "買" if side == BUY else "賣"
+        lines = []
+        filled = sum(fill.qty for fill in fills)
+        if filled:
+            total = sum(fill.qty * fill.price for fill in fills)
+            lines.append(f"✅ 成交：{verb}{'進' if side == BUY else '出'} **{name}** x{filled}，均價 {total / filled:.1f}（共 ${total}）。")
+        if order.remaining:
+            lines.append(f"📌 剩下 {order.remaining} 份以單價 {price} 掛在市集上（單號 `#{order.id}`）。")
+        if withdrawn:
+            lines.append(f"↩️ 你有 {len(withdrawn)} 張自己的反向掛單會和這張單成交，已自動撤回並退還。")
+        await ctx.send("\n".join(lines))
+
+    @market.command(name="buy")
+    async def market_buy(self, ctx, item: str, qty: int, price: int):
+        """掛限價買單：最多以 price 單價買進 qty 份"""
+        await self._place(ctx, BUY, item, qty, price)
+
+    @market.command(name="sell")
+    async def market_sell(self, ctx, item: str, qty: int, price: int):
+        """掛限價賣單：最少以 price 單價賣出 qty 份"""
+        await self._place(ctx, SELL, item, qty, price)
+
+    @market.command(name="cancel")
+    async def market_cancel(self, ctx, order_id: int):
+        """撤掉自己的掛單，退回剩下的積分或商品"""
+        points_cog = self.bot.get_cog("Points")
+        if not points_cog:
+            await ctx.send("積分系統維護中。")
+            return
+        key, guild_id = self._economy(points_cog, ctx.guild.id)
+        for market_key, settle_guild_id, market in self._reachable_markets(key, guild_id):
+            order = market.orders.get(order_id)
+            if order and order.user_id == ctx.author.id:
+                break
+        else:
+            await ctx.send("找不到你的這張掛單。")
+            return
+        _, qty = market.cancel(order_id)
+        # Refunds go back to the economy the order was placed in
+        await self._commit(points_cog, self._settle(market_key, settle_guild_id, [], [(order, qty)]))
+        refund = f"${order.price * qty}" if order.side == BUY else f"{FOOD_MENU[order.item]['name']} x{qty}"
+        where = "（退回全域經濟）" if market_key != key else ""
+        await ctx.send(f"🗑️ 已撤掉單號 `#{order_id}`，退回 {refund}{where}。")
+
+    @market.command(name="orders")
+    async def market_orders(self, ctx):
+        """查看自己在這個市集的掛單（獨立經濟的伺服器也會列出留在全域市集的掛單）"""
+        points_cog = self.bot.get_cog("Points")
+        if not points_cog:
+            await ctx.send("積分系統維護中。")
+            return
+        key, guild_id = self._economy(points_cog, ctx.guild.id)
+        lines = [
+            f"`#{o.id}` {'買' if o.side == BUY else '賣'} {FOOD_MENU[o.item]['name']} "
+            f"{o.remaining}/{o.qty} 份 @ {o.price}" + (" 〔全域市集〕" if market_key != key else "")
+            for market_key, _, market in self._reachable_markets(key, guild_id)
+            for o in market.open_orders(ctx.author.id)
+        ]
+        if not lines:
+            await ctx.send("你目前沒有任何掛單。")
+            return
+        embed = discord.Embed(title=f"📋 {ctx.author.display_name} 的掛單", description="\n".join(lines), color=0x1ABC9C)
+        embed.set_footer(text="!market cancel <單號> 撤單")
+        await ctx.send(embed=embed)
+
+
+async def setup(bot):
+    await bot.add_cog(MarketCog(bot))
@@ -0,0 +1,104 @@
+import asyncio
+import json
+import os
+from typing import Dict, Iterable, Optional
+
+INVENTORY_VERSION = 2
+
+
+class Inventory:
+    """玩家背包：{經濟體鍵: {user_id: {商品編號: 數量}}}，存在 data/inventory.json。
+
+    經濟體鍵和市集相同（"global" 或獨立經濟伺服器的 ID）；和積分一樣，切換經濟模式後各自的背包互不相通。
+    所有方法都在事件迴圈上呼叫；修改只標記 dirty，由 flush 合併寫回（在背景執行緒寫檔）。
+    掛在市集上的賣單已經從背包扣掉，撤單時才退回。
+    檔案記錄它涵蓋到市集日誌的哪一筆（seq），載入後由 MarketCog 以 replay 補上之後的背包變動。
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.seq = 0
+        self._bags: Dict[str, Dict[str, Dict[str, int]]] = self._load()
+        self._dirty = False
+
+    def _load(self) -> Dict[str, Dict[str, Dict[str, int]]]:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (json.JSONDecodeError, IOError):
+            return {}
+        if data.get("version") == INVENTORY_VERSION:
+            self.seq = data.get("seq", 0)
+            return data["bags"]
+        # Bags saved before they were split by economy all belonged to the global one
+        return {"global": data} if data else {}
+
+    def replay(self, records: Iterable[Dict]):
+        """套用市集日誌裡比檔案新的背包變動（[經濟體鍵, user_id, 商品, 增減]）。"""
+        for record in records:
+            if record["seq"] <= self.seq:
+                continue
+            for key, user_id, item, delta in record.get("bags", ()):
+                if delta > 0:
+                    self.add(key, user_id, item, delta)
+                else:
+                    self.remove(key, user_id, item, -delta)
+            self.seq = record["seq"]
+
+    @property
+    def dirty(self) -> bool:
+        return self._dirty
+
+    def _write(self, payload: str):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(payload)
+        os.replace(tmp_path, self.path)
+
+    async def flush(self, seq: Optional[int] = None) -> bool:
+        """有變更時寫回；seq 是這份內容涵蓋到的市集日誌位置。回傳檔案是否已是最新。"""
+        if not self._dirty:
+            return True
+        self._dirty = False
+        if seq is not None:
+            self.seq = seq
+        payload = json.dumps({"version": INVENTORY_VERSION, "seq": self.seq, "bags": self._bags}, ensure_ascii=False)
+        try:
+            await asyncio.to_thread(self._write, payload)
+        except OSError as e:
+            print(f"寫入背包資料時發生錯誤: {e}")
+            self._dirty = True
+            return False
+        return True
+
+    def bag(self, key: str, user_id) -> Dict[str, int]:
+        return dict(self._bags.get(key, {}).get(str(user_id), {}))
+
+    def count(self, key: str, user_id, item: str) -> int:
+        return self._bags.get(key, {}).get(str(user_id), {}).get(item, 0)
+
+    def add(self, key: str, user_id, item: str, qty: int):
+        if qty <= 0:
+            return
+        bag = self._bags.setdefault(key, {}).setdefault(str(user_id), {})
+        bag[item] = bag.get(item, 0) + qty
+        self._dirty = True
+
+    def remove(self, key: str, user_id, item: str, qty: int) -> bool:
+        """數量足夠時扣掉並回傳 True，不足時不做任何變動。"""
+        bags = self._bags.get(key, {})
+        bag = bags.get(str(user_id), {})
+        have = bag.get(item, 0)
+        if qty <= 0 or have < qty:
+            return False
+        if have == qty:
+            del bag[item]
+            if not bag:
+                del bags[str(user_id)]
+                if not bags:
+                    del self._bags[key]
+        else:
+            bag[item] = have - qty
+        self._dirty = True
+        return True
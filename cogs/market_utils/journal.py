@@ -0,0 +1,81 @@
+import json
+import os
+from typing import Dict, List
+
+
+class MarketJournal:
+    """市集的預寫日誌（JSON lines）：每次結算把訂單、背包與積分的變動寫成同一筆紀錄。
+
+    - append 在事件迴圈上呼叫，只把一行交給作業系統（程序當掉也不會遺失）；sync 在背景執行緒 fsync。
+      呼叫端在 sync 完成之後才把積分記進帳本，所以積分寫回時，對應的市集紀錄一定已經落地。
+    - market.json / inventory.json 記錄自己涵蓋到哪一筆（seq），載入時只重播之後的紀錄。
+    - 寫快照前先用 seal 把使用中的檔案封存成 <path>.sealed，新紀錄寫進新檔；
+      快照與積分都確定寫回之後才刪掉封存檔（drop_sealed），日誌不會無限變長。
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.sealed_path = path + '.sealed'
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.records: List[Dict] = self._read(self.sealed_path) + self._read(self.path, repair=True)
+        self.seq = self.records[-1]["seq"] if self.records else 0
+        self.has_sealed = os.path.exists(self.sealed_path)
+        self._file = open(path, 'ab')
+
+    @staticmethod
+    def _read(path: str, repair: bool = False) -> List[Dict]:
+        """讀出完整的紀錄；遇到寫到一半的行就停止，repair=True 時順便截掉它。"""
+        records, good_end = [], 0
+        try:
+            with open(path, 'rb') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                        record["seq"]
+                    except (ValueError, KeyError, TypeError):
+                        break
+                    records.append(record)
+                    good_end += len(line)
+        except FileNotFoundError:
+            return []
+        if repair and good_end < os.path.getsize(path):
+            print(f"市集日誌 {path} 結尾不完整，已截掉 {os.path.getsize(path) - good_end} bytes。")
+            os.truncate(path, good_end)
+        return records
+
+    def append(self, record: Dict) -> int:
+        """替紀錄編上 seq 並寫入一行，回傳 seq。"""
+        self.seq += 1
+        record = {"seq": self.seq, **record}
+        self._file.write((json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n').encode('utf-8'))
+        self._file.flush()
+        return self.seq
+
+    def sync(self):
+        os.fsync(self._file.fileno())
+
+    @property
+    def has_records(self) -> bool:
+        """還有沒被丟掉的紀錄（使用中的檔案或封存檔）。"""
+        return self.has_sealed or self._file.tell() > 0
+
+    def seal(self) -> bool:
+        """把使用中的檔案封存起來，之後的紀錄寫進新檔。上一份封存檔還沒刪掉或沒有紀錄時不動作。"""
+        if self.has_sealed or not self._file.tell():
+            return False
+        self._file.close()
+        os.replace(self.path, self.sealed_path)
+        self._file = open(self.path, 'ab')
+        self.has_sealed = True
+        return True
+
+    def drop_sealed(self):
+        """封存檔裡的紀錄都已經反映在快照與積分裡之後呼叫（可在背景執行緒執行）。"""
+        try:
+            os.remove(self.sealed_path)
+        except FileNotFoundError:
+            pass
+        self.has_sealed = False
+
+    def close(self):
+        self._file.close()
@@ -0,0 +1,198 @@
+"""玩家市集的限價單撮合：每種商品一本買賣盤，價格優先、時間優先。
+
+- 買盤是以 (-價格, 單號) 排序的 heap，賣盤是以 (價格, 單號) 排序的 heap；單號遞增，代表掛單先後。
+- 撮合只看兩邊 heap 的頂端，每成交或略過一筆都是 O(log n)。
+- 取消的單不從 heap 中間挖掉，只把剩餘數量歸零，等它浮到頂端時才丟掉（lazy deletion）；
+  死掉的項目超過一半時整本重建一次，heap 不會無限膨脹。
+- 每個價位的總數量另外記在 dict，深度查詢不需要掃 heap。
+這裡只處理訂單本身；積分與背包的結算由 MarketCog 根據回傳的成交紀錄完成。
+"""
+import heapq
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+BUY = "buy"
+SELL = "sell"
+
+
+class Order:
+    __slots__ = ('id', 'user_id', 'item', 'side', 'price', 'qty', 'remaining')
+
+    def __init__(self, id: int, user_id: int, item: str, side: str, price: int, qty: int, remaining: Optional[int] = None):
+        self.id = id
+        self.user_id = user_id
+        self.item = item
+        self.side = side
+        self.price = price
+        self.qty = qty
+        self.remaining = qty if remaining is None else remaining
+
+    def to_dict(self) -> Dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Order":
+        return cls(**data)
+
+
+class Fill(NamedTuple):
+    """一筆成交：以掛單（maker）的價格成交 qty 個。"""
+    buy: Order
+    sell: Order
+    price: int
+    qty: int
+
+
+class OrderBook:
+    """單一商品的買賣盤。"""
+
+    def __init__(self):
+        self._heaps: Dict[str, List[Tuple[int, int, Order]]] = {BUY: [], SELL: []}
+        self.levels: Dict[str, Dict[int, int]] = {BUY: {}, SELL: {}}
+        self._dead = 0
+
+    def __len__(self) -> int:
+        return len(self._heaps[BUY]) + len(self._heaps[SELL]) - self._dead
+
+    @staticmethod
+    def _key(order: Order) -> Tuple[int, int, Order]:
+        # Better price first; the lower (older) id breaks ties
+        return (-order.price if order.side == BUY else order.price, order.id, order)
+
+    def best(self, side: str) -> Optional[Order]:
+        heap = self._heaps[side]
+        while heap and heap[0][2].remaining == 0:
+            heapq.heappop(heap)
+            self._dead -= 1
+        return heap[0][2] if heap else None
+
+    def _rest(self, order: Order):
+        heapq.heappush(self._heaps[order.side], self._key(order))
+        levels = self.levels[order.side]
+        levels[order.price] = levels.get(order.price, 0) + order.remaining
+
+    def _take(self, order: Order, qty: int):
+        """從掛單扣掉 qty；扣完的單留在 heap 裡，之後 best 會丟掉它。"""
+        order.remaining -= qty
+        levels = self.levels[order.side]
+        levels[order.price] -= qty
+        if not levels[order.price]:
+            del levels[order.price]
+        if order.remaining == 0:
+            self._dead += 1
+
+    def match(self, order: Order) -> Tuple[List[Fill], List[Tuple[Order, int]]]:
+        """撮合新進的單，剩下的數量掛進買賣盤。回傳 (成交紀錄, [(因自成交而被撤掉的自己的掛單, 撤掉的數量)])。"""
+        fills, self_cancelled = [], []
+        opposite = SELL if order.side == BUY else BUY
+        while order.remaining:
+            resting = self.best(opposite)
+            if resting is None:
+                break
+            if (order.side == BUY and resting.price > order.price) or (order.side == SELL and resting.price < order.price):
+                break
+            if resting.user_id == order.user_id:
+                # Never trade with yourself: the older order on the other side is withdrawn instead
+                self_cancelled.append((resting, resting.remaining))
+                self._take(resting, resting.remaining)
+                continue
+            qty = min(order.remaining, resting.remaining)
+            self._take(resting, qty)
+            order.remaining -= qty
+            buy, sell = (order, resting) if order.side == BUY else (resting, order)
+            fills.append(Fill(buy, sell, resting.price, qty))
+        if order.remaining:
+            self._rest(order)
+        return fills, self_cancelled
+
+    def cancel(self, order: Order) -> int:
+        """撤掉一張掛單，回傳被撤掉的剩餘數量。"""
+        remaining = order.remaining
+        if remaining:
+            self._take(order, remaining)
+            self._compact()
+        return remaining
+
+    def _compact(self):
+        if self._dead * 2 <= len(self._heaps[BUY]) + len(self._heaps[SELL]):
+            return
+        for side, heap in self._heaps.items():
+            live = [entry for entry in heap if entry[2].remaining]
+            heapq.heapify(live)
+            self._heaps[side] = live
+        self._dead = 0
+
+    def depth(self, side: str, count: int) -> List[Tuple[int, int]]:
+        """最好的 count 個價位 [(價格, 總數量)]；買盤由高到低，賣盤由低到高。"""
+        levels = self.levels[side]
+        pick = heapq.nlargest if side == BUY else heapq.nsmallest
+        return [(price, levels[price]) for price in pick(count, levels)]
+
+
+class Market:
+    """一個經濟體（全域或單一伺服器）的市集：所有商品的買賣盤與未成交掛單。"""
+
+    def __init__(self, orders: Iterable[Dict] = (), next_id: int = 1):
+        self.books: Dict[str, OrderBook] = {}
+        self.orders: Dict[int, Order] = {}
+        self._by_user: Dict[int, Set[int]] = {}
+        self.next_id = next_id
+        # Re-resting in id order restores the original time priority
+        for data in sorted(orders, key=lambda d: d['id']):
+            order = Order.from_dict(data)
+            self.book(order.item)._rest(order)
+            self._track(order)
+            self.next_id = max(self.next_id, order.id + 1)
+
+    def book(self, item: str) -> OrderBook:
+        book = self.books.get(item)
+        if book is None:
+            book = self.books[item] = OrderBook()
+        return book
+
+    def _track(self, order: Order):
+        self.orders[order.id] = order
+        self._by_user.setdefault(order.user_id, set()).add(order.id)
+
+    def _untrack(self, order: Order):
+        del self.orders[order.id]
+        ids = self._by_user[order.user_id]
+        ids.discard(order.id)
+        if not ids:
+            del self._by_user[order.user_id]
+
+    def open_count(self, user_id: int) -> int:
+        return len(self._by_user.get(user_id, ()))
+
+    def open_orders(self, user_id: int) -> List[Order]:
+        return sorted((self.orders[i] for i in self._by_user.get(user_id, ())), key=lambda o: o.id)
+
+    def place(self, user_id: int, item: str, side: str, price: int, qty: int,
+              order_id: Optional[int] = None) -> Tuple[Order, List[Fill], List[Tuple[Order, int]]]:
+        """下一張限價單並立即撮合。回傳 (新單, 成交紀錄, [(被撤掉的自己的掛單, 數量)])。
+
+        多個市集要共用單號時由呼叫端給 order_id（必須比這個市集裡的單號都大，才能維持時間優先）。
+        """
+        order_id = self.next_id if order_id is None else order_id
+        order = Order(order_id, user_id, item, side, price, qty)
+        self.next_id = max(self.next_id, order_id) + 1
+        fills, self_cancelled = self.book(item).match(order)
+        for fill in fills:
+            maker = fill.sell if side == BUY else fill.buy
+            if not maker.remaining:
+                self._untrack(maker)
+        for resting, _ in self_cancelled:
+            self._untrack(resting)
+        if order.remaining:
+            self._track(order)
+        return order, fills, self_cancelled
+
+    def cancel(self, order_id: int) -> Optional[Tuple[Order, int]]:
+        """撤單，回傳 (訂單, 被撤掉的數量)；找不到時回傳 None。"""
+        order = self.orders.get(order_id)
+        if order is None:
+            return None
+        self._untrack(order)
+        return order, self.book(order.item).cancel(order)
+
+    def snapshot(self) -> Dict:
+        return {"next_id": self.next_id, "orders": [order.to_dict() for order in self.orders.values()]}
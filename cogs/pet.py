@@ -1,21 +1,45 @@
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 import os
-import json
 import random
 import time
 from datetime import datetime
 from typing import Dict, Optional, Any, Tuple
 import google.generativeai as genai
 import asyncio
-from .ui.pet_views import PetDashboardView, FOOD_MENU
+from .ui.pet_views import PetDashboardView, PetRankView, FOOD_MENU, PETRANK_PAGE_SIZE
+from .pet_utils.asset_cache import AssetUrlCache
+from .pet_utils.chat import PetChat
+from .pet_utils import expedition
+from .pet_utils.game_config import ConfigError, game_config, reload_game_config
+from .pet_utils.image_variants import ImageVariants, referenced_images
+from .pet_utils.migrations import SCHEMA_KEY, SCHEMA_VERSION
+from .pet_utils.profile_card import ProfileCardRenderer, card_state
+from .pet_utils.progression import ProgressionTable, exp_to_next
+from .pet_utils.ranking import PetRanking, power_score
+from .pet_utils.regen import current_minute, settle
+from .pet_utils.repository import PetRepository
+from .pet_utils.riddle_pool import RiddlePool
+from .storage_utils.cold_archive import ColdArchive, TIERING_INTERVAL_HOURS, archive_cutoff
 
 # --- AI Setup ---
 try:
     import config
     GEMINI_API_KEY = getattr(config, "GEMINI_API_KEY", None)
+    PET_ASSET_CHANNEL_ID = getattr(config, "PET_ASSET_CHANNEL_ID", None)
+    PET_CARD_FONT = getattr(config, "PET_CARD_FONT", None)
 except ImportError:
     GEMINI_API_KEY = None
+    PET_ASSET_CHANNEL_ID = None
+    PET_CARD_FONT = None
+
+# 寵物圖片只上傳一次到這個頻道，之後的 Embed 直接引用 CDN 連結；未設定時每次都以附件上傳
+if not PET_ASSET_CHANNEL_ID:
+    PET_ASSET_CHANNEL_ID = os.getenv("PET_ASSET_CHANNEL_ID")
+PET_ASSET_CHANNEL_ID = int(PET_ASSET_CHANNEL_ID) if PET_ASSET_CHANNEL_ID else None
+
+# 狀態卡片圖使用的中文字型檔；未設定時自動尋找常見的系統字型，找不到就維持文字版狀態卡
+PET_CARD_FONT = PET_CARD_FONT or os.getenv("PET_CARD_FONT")
 
 if GEMINI_API_KEY and GEMINI_API_KEY != "PUT_YOUR_GEMINI_API_KEY_HERE":
     genai.configure(api_key=GEMINI_API_KEY)
@@ -40,143 +64,270 @@ else:
 COG_DIR = os.path.dirname(os.path.abspath(__file__))
 PROJECT_ROOT = os.path.dirname(COG_DIR)
 DATA_FILE = os.path.join(PROJECT_ROOT, 'data', 'pet.json')
-CONFIG_FILE = os.path.join(PROJECT_ROOT, 'configs', 'pet_types.json')
+ARCHIVE_DIR = os.path.join(PROJECT_ROOT, 'data', 'archive', 'pet')
+ASSET_URLS_FILE = os.path.join(PROJECT_ROOT, 'data', 'pet_asset_urls.json')
 ASSETS_DIR = os.path.join(PROJECT_ROOT, 'assets', 'pets')
+RIDDLE_POOL_FILE = os.path.join(PROJECT_ROOT, 'data', 'riddle_pool.json')
+CHAT_MEMORY_FILE = os.path.join(PROJECT_ROOT, 'data', 'pet_chat.json')
+VARIANTS_DIR = os.path.join(PROJECT_ROOT, 'data', 'cache', 'pet_variants')
+CARDS_DIR = os.path.join(PROJECT_ROOT, 'data', 'cache', 'pet_cards')
 MAX_LEVEL = 100
-SKILLS_FILE = os.path.join(PROJECT_ROOT, 'configs', 'skills.json')
+ADOPT_CHOICES = ('fire', 'water', 'forest')  # !adopt 提供的三顆蛋
+FLUSH_INTERVAL_SECONDS = 2.0  # 寵物資料寫回 pet.json 的最短間隔（合併這段期間內的所有變更）
 
 class PetCog(commands.Cog):
     """Gawa-mon RPG System"""
     def __init__(self, bot):
         self.bot = bot
-        self._ensure_data_file()
-        self.pet_types = self._load_json(CONFIG_FILE)
-        self.skills_data = self._load_json(SKILLS_FILE)
-
-    def _load_json(self, filepath: str) -> Dict:
-        """Load JSON config safely"""
+        # Compiled, read-only pet types and skills shared with BattleCog; swapped as a whole by !reloadconfig
+        self.config = game_config()
+        self.progression = ProgressionTable(self.config.pet_types, MAX_LEVEL)
+        self.assets = AssetUrlCache(bot, ASSET_URLS_FILE, PET_ASSET_CHANNEL_ID)
+        self.variants = ImageVariants(ASSETS_DIR, VARIANTS_DIR)
+        self.cards = ProfileCardRenderer(CARDS_DIR, PET_CARD_FONT)
+        self.riddles = RiddlePool(RIDDLE_POOL_FILE, self.generate_content_safe if model else None)
+        self.chat = PetChat(CHAT_MEMORY_FILE, self._generate if model else None)
+        # Loaded once; every read and write below goes through this in-memory repository
+        self.repo = PetRepository(DATA_FILE, ColdArchive(ARCHIVE_DIR))
+        # Kept in step by _save_pet, so !petrank never scans the pets
+        self.ranking = PetRanking(self.repo.items())
+
+    async def cog_load(self):
+        self.flush_loop.start()
+        self.tiering_loop.start()
+        # Resize in a worker thread; until it finishes pick() simply serves the originals
+        asyncio.create_task(self._build_variants())
+        self.riddles.warm_up(self.config.pet(k) for k in ADOPT_CHOICES)
+
+    async def _build_variants(self):
+        if not self.variants.available:
+            print("未安裝 Pillow，寵物圖片將直接使用原圖。")
+            return
         try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            rebuilt = await asyncio.to_thread(self.variants.build, referenced_images(self.config.pet_types))
         except Exception as e:
-            print(f"Error loading {filepath}: {e}")
-            return {}
-
-    async def generate_content_safe(self, prompt: str) -> str:
-        """Safe wrapper for Gemini API"""
-        if not model: return "錯誤：AI 模組未啟用"
+            print(f"產生寵物圖片變體時發生錯誤: {e}")
+            return
+        if rebuilt:
+            print(f"已重新產生 {rebuilt} 張寵物圖片的縮圖 / 大圖。")
+
+    async def cog_unload(self):
+        self.flush_loop.cancel()
+        self.tiering_loop.cancel()
+        await self.repo.flush()
+        await self.assets.flush(force=True)
+        await self.riddles.close()
+        await self.chat.close()
+
+    @tasks.loop(seconds=FLUSH_INTERVAL_SECONDS)
+    async def flush_loop(self):
+        await self.repo.flush()
+        await self.chat.flush()
+        await self.assets.flush()
+
+    async def _generate(self, prompt: str) -> Optional[str]:
+        """呼叫 Gemini；失敗時回傳 None，沒有內容時回傳空字串。"""
         loop = asyncio.get_running_loop()
         try:
             response = await loop.run_in_executor(None, lambda: model.generate_content(prompt))
-            return response.text.strip() if response.parts else "AI 無回應"
+            return response.text.strip() if response.parts else ""
         except Exception as e:
             print(f"Gemini Error: {e}")
-            return "AI 生成失敗"
-
-    def _load_pet_config(self) -> Dict:
-        """Load static pet configuration from JSON"""
-        try:
-            with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except Exception as e:
-            print(f"Error loading pet config: {e}")
-            return {}
-
-    def _ensure_data_file(self):
-        os.makedirs(os.path.dirname(DATA_FILE), exist_ok=True)
-        if not os.path.exists(DATA_FILE):
-            with open(DATA_FILE, 'w', encoding='utf-8') as f:
-                json.dump({}, f)
+            return None
 
-    def _load_data(self) -> Dict:
-        try:
-            with open(DATA_FILE, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except:
-            return {}
+    async def generate_content_safe(self, prompt: str) -> str:
+        """Safe wrapper for Gemini API"""
+        if not model: return "錯誤：AI 模組未啟用"
+        text = await self._generate(prompt)
+        if text is None:
+            return "AI 生成失敗"
+        return text or "AI 無回應"
 
-    def _save_data(self, data: Dict):
-        with open(DATA_FILE, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+    async def _fetch_pet(self, user_id: int) -> Optional[Dict]:
+        """指令入口用的 _get_pet：寵物在冷資料區時先在背景執行緒取回。"""
+        await self.repo.fetch(user_id)
+        return self._get_pet(user_id)
 
     def _get_pet(self, user_id: int) -> Optional[Dict]:
-        data = self._load_data()
-        return data.get(str(user_id))
+        # Only sees hot records, so callers that may be first to touch a pet go through _fetch_pet.
+        # Records are migrated once when the repository loads; only the passive regen is settled here
+        pet = self.repo.get(user_id)
+        # A finished expedition resumes regen at its return minute, so it is resolved before settling
+        if pet and expedition.is_due(pet):
+            self._finish_expedition(user_id, pet)
+        if pet and settle(pet):
+            self.repo.mark_dirty(user_id)
+        if pet and user_id not in self.ranking:
+            # Pulled back from the archive: it rejoins the ranking
+            self.ranking.update(user_id, pet)
+        return pet
+
+    def _save_pet(self, user_id: int, pet: Dict):
+        """標記寵物資料已變更，下一次背景寫回時一併存檔，並更新戰力排名。"""
+        self.repo.put(user_id, pet)
+        self.ranking.update(user_id, pet)
 
     def _create_pet(self, user_id: int, p_type: str, name: str = None):
-        base = self.pet_types[p_type]
+        base = self.config.pet(p_type)
         # Random IVs (-5% to +5%)
         iv_mult = random.uniform(0.95, 1.05)
         
         pet_data = {
             "type": p_type,
-            "name": name or base["name"],
+            "name": name or base.name,
             "level": 1,
             "exp": 0,
             "ap": 6, # Added
             "max_ap": 6, # Added
             "stats": {
-                "max_hp": int(base["base_stats"]["hp"] * iv_mult),
-                "hp": int(base["base_stats"]["hp"] * iv_mult), # Current HP
-                "atk": int(base["base_stats"]["atk"] * iv_mult),
-                "def": int(base["base_stats"]["def"] * iv_mult),
+                "max_hp": int(base.base_stats.hp * iv_mult),
+                "hp": int(base.base_stats.hp * iv_mult), # Current HP
+                "atk": int(base.base_stats.atk * iv_mult),
+                "def": int(base.base_stats.defense * iv_mult),
                 "satiety": 100, # Changed from 50
                 "max_satiety": 100
             },
-            "skills": self.pet_types[p_type].get("learnset", {}).get("1", []), # Added
+            "skills": [self.config.skills[i].key for i in base.skills_up_to(1)], # Added
             "adopted_at": datetime.now().timestamp(), # Changed to datetime
             "last_interaction": datetime.now().timestamp(), # Changed to datetime
             "nickname": None,
-            "buff": None # Added
+            "buff": None, # Added
+            "regen_at": current_minute(),
+            "expedition": None,
+            SCHEMA_KEY: SCHEMA_VERSION
         }
         
-        data = self._load_data()
-        data[str(user_id)] = pet_data
-        self._save_data(data)
+        self._save_pet(user_id, pet_data)
         return pet_data
 
-    def _migrate_pet_data(self, pet: Dict) -> Dict:
-        """Ensures pet data has all necessary fields for older saves."""
-        if "ap" not in pet:
-            pet["ap"] = 6
-        if "max_ap" not in pet:
-            pet["max_ap"] = 6
-        if "skills" not in pet:
-            pet["skills"] = []
-        # Ensure skills is a list (migration fix)
-        if isinstance(pet.get("skills"), str):
-             pet["skills"] = []
-        if "buff" not in pet: # Added buff migration
-            pet["buff"] = None
-        return pet
+    # --- Hot/Cold Tiering ---
+    def _touch(self, pet: Dict):
+        """記錄主人最後一次照顧寵物的時間，分層工作依此判斷是否封存。"""
+        pet["last_interaction"] = time.time()
 
-    def _get_pet(self, user_id: int) -> Optional[Dict]:
-        data = self._load_data()
-        pet = data.get(str(user_id))
-        if pet:
-            return self._migrate_pet_data(pet) # Apply migration when loading pet
-        return None
-
-    def get_pet_embed(self, user_id: int) -> Tuple[Optional[discord.Embed], Optional[discord.File]]:
-        """Helper to generate pet embed and file for dashboard updates"""
-        pet = self._get_pet(user_id)
+    @tasks.loop(hours=TIERING_INTERVAL_HOURS)
+    async def tiering_loop(self):
+        """把太久沒互動的寵物搬到壓縮的冷資料區，讓 pet.json 只留下活躍玩家。"""
+        cutoff = archive_cutoff()
+        if cutoff is None:
+            return
+        archived = await self.repo.archive_inactive(cutoff)
+        if archived:
+            self.ranking.discard(archived)
+            print(f"已封存 {len(archived)} 隻不活躍的寵物。")
+
+    # --- Expeditions ---
+    def _finish_expedition(self, user_id: int, pet: Dict):
+        """遠征時間到了：一次結算整趟的收穫，報告留在紀錄上等主人來看。"""
+        points_cog = self.bot.get_cog("Points")
+        if not points_cog:
+            return  # Stay away until the points can actually be paid
+        record = pet['expedition']
+        outcome = expedition.resolve(record, FOOD_MENU)
+        expedition.resume_regen(pet, record)
+        expedition.apply_upkeep(pet, outcome, FOOD_MENU)
+        levels, level_msg = self._gain_exp(pet, outcome["exp"])
+        if outcome["points"]:
+            points_cog.update_points(user_id, outcome["points"], source="expedition", guild_id=record["guild_id"])
+        pet['expedition'] = {"status": "returned", "report": {**outcome, "levels": levels, "level_msg": level_msg}}
+        self._save_pet(user_id, pet)
+
+    def away_message(self, pet: Dict) -> Optional[str]:
+        """寵物在遠征中時回傳提示，否則回傳 None。"""
+        if not expedition.is_away(pet):
+            return None
+        end = int(pet['expedition']["end"])
+        if end <= time.time():
+            return "你的寵物正在回程的路上，稍後再來看看吧！"
+        return f"你的寵物正在遠征中，預計 <t:{end}:R> 回來。"
+
+    def _pop_expedition_report(self, user_id: int, pet: Dict) -> Optional[str]:
+        """取出尚未看過的遠征報告並清除。"""
+        record = pet.get('expedition')
+        if not record or record["status"] != "returned":
+            return None
+        report = record["report"]
+        pet['expedition'] = None
+        self.repo.mark_dirty(user_id)
+
+        name = pet.get('nickname') or pet['name']
+        lines = [f"🧭 **{name} 遠征回來了！**（{report['hours']} 小時，其中 {report['successes']} 小時有收穫）"]
+        lines.append(f"✨ 經驗值 +{report['exp']}")
+        if report['points']:
+            lines.append(f"💰 撿到 {report['points']} 積分")
+        if report['food']:
+            meals = "、".join(f"{FOOD_MENU[item_id]['name']} x{count}" for item_id, count in report['food'].items())
+            lines.append(f"🍱 帶回並吃掉了：{meals}")
+        if report['hp_loss']:
+            lines.append(f"🩹 路上受了點傷（HP -{report['hp_loss']}）")
+        if report['levels']:
+            lines.append(f"🎉 **升級了！目前等級 Lv.{pet['level']}**！{report['level_msg']}")
+        return "\n".join(lines)
+
+    async def _image_source(self, img_path: str, stem: str) -> Tuple[str, Optional[discord.File]]:
+        """回傳 (Embed 用的圖片網址, 需要附上的檔案)。有 CDN 連結時不需要附件。"""
+        url = await self.assets.get_url(img_path)
+        if url:
+            return url, None
+        # Variants may be WebP, so the attachment keeps the real extension
+        filename = stem + os.path.splitext(img_path)[1]
+        return f"attachment://{filename}", discord.File(img_path, filename=filename)
+
+    async def _card_embed(self, pet: Dict, meta, exp_next) -> Optional[Tuple[discord.Embed, Optional[discord.File]]]:
+        """圖像版狀態卡：同樣的狀態直接取用快取的卡片，失敗時回傳 None 改用文字版。
+
+        卡片已經有 CDN 連結時直接引用，不需要附件；只有拿不到連結時才附上檔案。
+        """
+        sprite = self.variants.pick(meta.image, "full") or self.variants.pick("嘎蛙寶寶.png", "full")
+        # Card fonts have no emoji glyphs, so draw the plain skill names
+        skill_names = [skill.name if skill else key for key, skill in ((k, self.config.skill(k)) for k in pet.get('skills', []))]
+        try:
+            card_path = await self.cards.render(card_state(pet, meta, sprite, exp_next, skill_names))
+        except Exception as e:
+            print(f"繪製寵物狀態卡時發生錯誤: {e}")
+            return None
+        embed = discord.Embed(title=f"{meta.emoji} {pet.get('nickname') or meta.name} (Lv.{pet['level']})", color=meta.color)
+        # Cards are named by their state hash, so the same state always maps to the same uploaded copy.
+        # Most states are seen once: those go out as attachments, only states that come back get uploaded
+        card_key = "card:" + os.path.splitext(os.path.basename(card_path))[0]
+        url = await self.assets.get_url(card_path, key=card_key, repeat_only=True)
+        if url:
+            embed.set_image(url=url)
+            return embed, None
+        embed.set_image(url="attachment://pet_card.png")
+        return embed, discord.File(card_path, filename="pet_card.png")
+
+    async def get_pet_embed(self, user_id: int) -> Tuple[Optional[discord.Embed], Optional[discord.File]]:
+        """Helper to generate pet embed and file for dashboard updates (file is None when the CDN URL is reused)"""
+        pet = await self._fetch_pet(user_id)
         if not pet: return None, None
         
         p_type = pet["type"]
-        meta = self.pet_types.get(p_type)
+        meta = self.config.pet(p_type)
         if not meta: return None, None
 
-        imgPath = os.path.join(ASSETS_DIR, meta['image'])
-        if not os.path.exists(imgPath):
-            print(f"Warning: Image not found {imgPath}, using default.")
-            imgPath = os.path.join(ASSETS_DIR, "嘎蛙寶寶.png")
+        if pet['level'] >= MAX_LEVEL:
+             exp_next = "MAX"
+        else:
+             exp_next = exp_to_next(pet['level'])
+
+        if self.cards.available:
+            card = await self._card_embed(pet, meta, exp_next)
+            if card:
+                return card
+
+        # The dashboard only shows a thumbnail, so the small variant is enough
+        imgPath = self.variants.pick(meta.image, "thumb")
+        if not imgPath:
+            print(f"Warning: Image not found {meta.image}, using default.")
+            imgPath = self.variants.pick("嘎蛙寶寶.png", "thumb")
             
-        file = discord.File(imgPath, filename="pet.png")
+        image_url, file = await self._image_source(imgPath, "pet")
         
-        embed = discord.Embed(title=f"{meta['emoji']} {pet.get('nickname') or meta['name']} (Lv.{pet['level']})", color=meta['color'])
+        embed = discord.Embed(title=f"{meta.emoji} {pet.get('nickname') or meta.name} (Lv.{pet['level']})", color=meta.color)
         if pet.get('nickname'):
-            embed.description = f"種族: {meta['name']}"
-        embed.set_thumbnail(url="attachment://pet.png")
+            embed.description = f"種族: {meta.name}"
+        embed.set_thumbnail(url=image_url)
         
         # Stats Bar visual
         hp_per = pet['stats']['hp'] / pet['stats']['max_hp']
@@ -204,150 +355,174 @@ class PetCog(commands.Cog):
         else:
              embed.add_field(name="技能", value="無", inline=True)
         
-        if pet['level'] >= MAX_LEVEL:
-             exp_next = "MAX"
-        else:
-             exp_next = (pet['level'] ** 2) * 50
-        embed.set_footer(text=f"經驗值: {pet['exp']}/{exp_next} | 屬性: {meta['element']}")
+        embed.set_footer(text=f"經驗值: {pet['exp']}/{exp_next} | 屬性: {meta.element}")
         
         return embed, file
 
+    def eat(self, pet: Dict, item: Dict) -> Tuple[int, int]:
+        """吃下一份 FOOD_MENU 的食物（就地修改 pet），回傳 (HP 回復量, 飽食回復量)。"""
+        stats = pet['stats']
+        old_hp = stats['hp']
+        heal = item['heal']
+        if heal >= 999: stats['hp'] = stats['max_hp']
+        else: stats['hp'] = min(stats['max_hp'], old_hp + heal)
+
+        old_sat = stats.get('satiety', 50)
+        max_sat = stats.get('max_satiety', 100)
+        stats['satiety'] = min(max_sat, old_sat + item['satiety'])
+
+        if item['buff']: pet['buff'] = item['buff']
+        return stats['hp'] - old_hp, stats['satiety'] - old_sat
+
     def _learn_skills(self, pet_data: Dict) -> list[str]:
         """Checks and learns new skills based on level."""
-        pet_type = pet_data["type"]
-        level = pet_data["level"]
-        learnset = self.pet_types.get(pet_type, {}).get("learnset", {})
-        
-        learned_something = False
+        pet_type = self.config.pet(pet_data["type"])
+        if not pet_type:
+            return []
         new_skills = []
 
         # Check all levels up to current (in case of multi-level jump)
-        for req_level_str, skills in learnset.items():
-            req_level = int(req_level_str)
-            if req_level <= level:
-                for skill in skills:
-                    if skill not in pet_data["skills"]:
-                        pet_data["skills"].append(skill)
-                        new_skills.append(skill)
-                        learned_something = True
+        for skill_id in pet_type.skills_up_to(pet_data["level"]):
+            skill = self.config.skills[skill_id].key
+            if skill not in pet_data["skills"]:
+                pet_data["skills"].append(skill)
+                new_skills.append(skill)
         
         return new_skills
 
-    async def train_pet(self, user_id: int) -> Tuple[Optional[Dict], Optional[str]]:
-        """Handles pet training logic: EXP cost, Level Up, Stat Growth"""
-        pet = self._get_pet(user_id)
-        if not pet:
-            return None, "你要先領養一隻寵物！輸入 `!adopt` 開始。"
+    def _gain_exp(self, pet: Dict, amount: int) -> Tuple[int, str]:
+        """特訓與對戰共用的經驗結算：查表升級、學技能、提示進化。回傳 (升了幾級, 提示訊息)。"""
+        levels = self.progression.apply_exp(pet, amount)
+        if not levels:
+            return 0, ""
+        return levels, self._level_up_effects(pet)
 
+    def _level_up_effects(self, pet: Dict) -> str:
+        """升級後學會新技能並檢查能否進化，回傳提示訊息。"""
+        level_msg = ""
+        new_skills = self._learn_skills(pet)
+        if new_skills:
+            level_msg += f"\n💡 領悟了新技能：{'、'.join(new_skills)}！"
+
+        pet_type = self.config.pet(pet['type'])
+        evo_data = pet_type and pet_type.evolution
+        if evo_data and pet['level'] >= evo_data.min_level:
+            # Just notify, user needs to click button
+            level_msg += f"\n✨ **寵物可以進化了！** 請點擊下方的進化按鈕！"
+        return level_msg
+
+    @staticmethod
+    def _training_blocker(hp: int, satiety: int, ap: int) -> Optional[str]:
+        """不能特訓時回傳原因，可以時回傳 None。"""
         # Check HP
-        if pet["stats"]["hp"] <= 10:
-             return None, "你的寵物體力透支了！請先休息 (`!rest`) 或餵食 (`!feed`)。"
-        
+        if hp <= 10:
+             return "你的寵物體力透支了！請先休息 (`!rest`) 或餵食 (`!feed`)。"
         # Check Satiety
-        if pet["stats"]["satiety"] <= 5:
-             return None, "你的寵物肚子餓扁了！請先餵食 (`!feed`)。"
-             
+        if satiety <= 5:
+             return "你的寵物肚子餓扁了！請先餵食 (`!feed`)。"
         # Check AP (New)
-        if pet.get("ap", 0) < 1:
-             return None, "你的寵物累了(AP不足)！請休息 (`!rest`) 來恢復體力。"
+        if ap < 1:
+             return "你的寵物累了(AP不足)！請休息 (`!rest`) 來恢復體力。"
+        return None
 
-        # EXP Calculation (Exponential Curve)
-        req_exp = (pet['level'] ** 2) * 50
-        
-        # Base EXP Gain
-        gain_exp = random.randint(15, 25)
-        
-        # Apply Buff (if any)
-        buff_msg = ""
-        if pet.get("buff") == "2x_exp":
-            gain_exp *= 2
-            pet["buff"] = None # consume buff
-            buff_msg = " (雙倍經驗生效！)"
-
-        pet['exp'] += gain_exp
-        pet['stats']['hp'] -= 10
-        pet['stats']['satiety'] -= 5
-        pet['ap'] -= 1 # Consume AP
-        
-        # Level Up Logic
-        leveled_up = False
-        level_msg = ""
-        
-        while pet['exp'] >= req_exp:
-            if pet['level'] >= MAX_LEVEL:
-                pet['exp'] = req_exp # Cap at max
+    async def train_pet(self, user_id: int, sessions: int = 1) -> Tuple[Optional[Dict], Optional[str]]:
+        """Handles pet training logic: EXP cost, Level Up, Stat Growth
+
+        sessions > 1 時連續特訓，直到次數用完或 HP / 飽食 / AP 不足為止。結果與逐次呼叫
+        sessions 次完全相同（亂數依相同順序取用），但只在最後寫入一次、學一次技能、回一則訊息。
+        """
+        pet = await self._fetch_pet(user_id)
+        if not pet:
+            return None, "你要先領養一隻寵物！輸入 `!adopt` 開始。"
+        away = self.away_message(pet)
+        if away:
+            return None, away
+
+        stats = pet['stats']
+        start_level = pet['level']
+        level, exp = start_level, pet['exp']
+        hp, satiety, ap = stats['hp'], stats['satiety'], pet.get('ap', 0)
+        buff = pet.get('buff')
+        done, total_exp, buff_msg, blocker = 0, 0, "", None
+
+        # Walk the sessions on plain locals; a level up refills HP (at the new max) and AP like apply_exp does
+        while done < sessions:
+            blocker = self._training_blocker(hp, satiety, ap)
+            if blocker:
                 break
-                
-            pet['exp'] -= req_exp
-            pet['level'] += 1
-            leveled_up = True
-            
-            # Stat Growth
-            p_type = self.pet_types.get(pet['type'])
-            growth = p_type.get('growth_rate', {'hp': 5, 'atk': 2, 'def': 1})
-            
-            pet['stats']['max_hp'] += growth['hp']
-            pet['stats']['hp'] = pet['stats']['max_hp'] # Full heal on level up
-            pet['stats']['atk'] += growth['atk']
-            pet['stats']['def'] += growth['def']
-            pet['ap'] = pet['max_ap'] # Restore AP on level up
+
+            # Base EXP Gain
+            gain_exp = random.randint(15, 25)
             
-            # Recalculate next req_exp for the loop
-            req_exp = (pet['level'] ** 2) * 50
-
-            # Learn Skills
-            new_skills = self._learn_skills(pet)
-            if new_skills:
-                level_msg += f"\n💡 領悟了新技能：{'、'.join(new_skills)}！"
-
-            # Check Evolution
-            if 'evolution' in p_type and p_type['evolution']:
-                evo_data = p_type['evolution']
-                if pet['level'] >= evo_data['min_level']:
-                    # Just notify, user needs to click button
-                    level_msg += f"\n✨ **寵物可以進化了！** 請點擊下方的進化按鈕！"
-
-        # Load full data to prevent overwriting other users
-        data = self._load_data()
-        data[str(user_id)] = pet
-        self._save_data(data)
-        
-        msg = f"特訓完成！獲得 {gain_exp} 經驗值{buff_msg}。"
-        if leveled_up:
+            # Apply Buff (if any)
+            if buff == "2x_exp":
+                gain_exp *= 2
+                buff = None # consume buff
+                buff_msg = " (雙倍經驗生效！)"
+
+            hp -= 10
+            satiety -= 5
+            ap -= 1 # Consume AP
+            new_level, exp = self.progression.resolve(level, exp, gain_exp)
+            if new_level != level:
+                level = new_level
+                hp = stats['max_hp'] + self.progression.growth_between(pet['type'], 'hp', start_level, level)
+                ap = pet.get('max_ap', 6)
+            total_exp += gain_exp
+            done += 1
+
+        if not done:
+            return None, blocker
+
+        # Commit everything at once
+        if level != start_level:
+            self.progression.grow(pet, level)
+        pet['exp'] = exp
+        stats['hp'], stats['satiety'], pet['ap'] = hp, satiety, ap
+        pet['buff'] = buff
+        self._touch(pet)
+        level_msg = self._level_up_effects(pet) if level != start_level else ""
+
+        self._save_pet(user_id, pet)
+        
+        if sessions == 1:
+            msg = f"特訓完成！獲得 {total_exp} 經驗值{buff_msg}。"
+        else:
+            msg = f"連續特訓 {done} 次完成！共獲得 {total_exp} 經驗值{buff_msg}。"
+        if level != start_level:
             msg += f"\n🎉 **升級了！目前等級 Lv.{pet['level']}**！{level_msg}"
+        if blocker and done < sessions:
+            msg += f"\n（{blocker}）"
             
         return pet, msg
 
-    def evolve_pet(self, user_id: int) -> Dict[str, Any]:
+    async def evolve_pet(self, user_id: int) -> Dict[str, Any]:
         """Handles pet evolution logic"""
-        data = self._load_data()
-        pet = data.get(str(user_id))
+        pet = await self._fetch_pet(user_id)
         if not pet: return {"status": "error", "msg": "沒有寵物"}
         
-        p_type = pet['type']
-        meta = self.pet_types[p_type]
-        evo_data = meta.get('evolution')
+        meta = self.config.pet(pet['type'])
+        if not meta:
+             return {"status": "error", "msg": "寵物種族資料缺失"}
+        evo_data = meta.evolution
         
         if not evo_data:
             return {"status": "fail", "msg": "此寵物無法再進化或是條件未滿足"}
             
-        if pet['level'] < evo_data['min_level']:
-            return {"status": "fail", "msg": f"等級不足！需要 Lv.{evo_data['min_level']}"}
+        if pet['level'] < evo_data.min_level:
+            return {"status": "fail", "msg": f"等級不足！需要 Lv.{evo_data.min_level}"}
             
-        next_form_id = evo_data['next_form']
-        next_meta = self.pet_types.get(next_form_id)
-        
-        if not next_meta:
-             return {"status": "error", "msg": "進化型態資料缺失"}
+        # The compiler already checked that next_form exists
+        next_meta = self.config.evolution_target(meta)
              
         # Apply Evolution
         # 1. Stat Boost (Difference between Base Stats)
-        old_base = meta['base_stats']
-        new_base = next_meta['base_stats']
+        old_base = meta.base_stats
+        new_base = next_meta.base_stats
         
-        diff_hp = new_base['hp'] - old_base['hp']
-        diff_atk = new_base['atk'] - old_base['atk']
-        diff_def = new_base['def'] - old_base['def']
+        diff_hp = new_base.hp - old_base.hp
+        diff_atk = new_base.atk - old_base.atk
+        diff_def = new_base.defense - old_base.defense
         
         pet['stats']['max_hp'] += diff_hp
         pet['stats']['hp'] = pet['stats']['max_hp'] # Full heal
@@ -355,14 +530,15 @@ class PetCog(commands.Cog):
         pet['stats']['def'] += diff_def
         
         # 2. Change Type
-        pet['type'] = next_form_id
+        pet['type'] = next_meta.key
+        self._touch(pet)
         
-        self._save_data(data)
+        self._save_pet(user_id, pet)
         
         return {
             "status": "success",
-            "msg": evo_data.get('msg', "進化成功！"),
-            "new_name": next_meta['name'],
+            "msg": evo_data.msg,
+            "new_name": next_meta.name,
             "diff_hp": diff_hp,
             "diff_atk": diff_atk,
             "diff_def": diff_def
@@ -373,12 +549,16 @@ class PetCog(commands.Cog):
     @commands.group(invoke_without_command=True)
     async def pet(self, ctx):
         """顯示你的嘎蛙狀態卡片"""
-        pet = self._get_pet(ctx.author.id)
+        pet = await self._fetch_pet(ctx.author.id)
         if not pet:
             await ctx.send(f"{ctx.author.mention} 你還沒有領養嘎蛙喔！\n輸入 `!adopt` 來挑選你的夥伴！")
             return
 
-        embed, file = self.get_pet_embed(ctx.author.id)
+        report = self._pop_expedition_report(ctx.author.id, pet)
+        if report:
+            await ctx.send(report)
+
+        embed, file = await self.get_pet_embed(ctx.author.id)
         if not embed:
              await ctx.send("系統錯誤：無法讀取寵物資料")
              return
@@ -386,49 +566,177 @@ class PetCog(commands.Cog):
         view = PetDashboardView(self, ctx.author.id)
         await ctx.send(file=file, embed=embed, view=view)
 
+    def build_petrank_embed(self, page: int, viewer_id: Optional[int] = None) -> discord.Embed:
+        """產生第 page 頁（1 起算）的寵物戰力排行榜；有 viewer_id 時在頁尾附上他的名次。"""
+        total_pages = max(1, -(-len(self.ranking) // PETRANK_PAGE_SIZE))
+        page = min(max(1, page), total_pages)
+        start = (page - 1) * PETRANK_PAGE_SIZE
+        medals = {1: "🥇", 2: "🥈", 3: "🥉"}
+        lines = []
+        for rank, (user_id, level, power) in enumerate(self.ranking.page(start, PETRANK_PAGE_SIZE), start=start + 1):
+            pet = self.repo.get(user_id)
+            meta = pet and self.config.pet(pet['type'])
+            name = f"{meta.emoji} {pet.get('nickname') or meta.name}" if meta else "嘎蛙"
+            lines.append(f"{medals.get(rank, f'`#{rank}`')} {name} (<@{user_id}>) — Lv.{level} · 戰力 **{power}**")
+        embed = discord.Embed(title="🐸 嘎蛙戰力排行榜", description="\n".join(lines) or "目前還沒有人領養嘎蛙。", color=0x2ECC71)
+        footer = f"第 {page}/{total_pages} 頁 | 共 {len(self.ranking)} 隻 | 先比等級，再比戰力"
+        position = viewer_id and self.ranking.rank(viewer_id)
+        if position:
+            footer += f" | 你的嘎蛙第 {position} 名（第 {-(-position // PETRANK_PAGE_SIZE)} 頁）"
+        embed.set_footer(text=footer)
+        return embed
+
+    @pet.command(name="rank")
+    async def pet_rank(self, ctx, member: Optional[discord.Member] = None):
+        """查看自己或他人的嘎蛙戰力名次"""
+        target = member or ctx.author
+        pet = await self._fetch_pet(target.id)
+        if not pet:
+            await ctx.send(f"{target.display_name} 還沒有領養嘎蛙。")
+            return
+        position = self.ranking.rank(target.id)
+        await ctx.send(
+            f"🏅 {target.display_name} 的嘎蛙 Lv.{pet['level']}，戰力 **{power_score(pet)}**，"
+            f"排名第 **{position}** / {len(self.ranking)} 名。"
+        )
+
+    @commands.command(name="petrank", aliases=["寵物排行"])
+    async def petrank(self, ctx, page: int = 1):
+        """顯示嘎蛙戰力排行榜（先比等級，再比戰力），可用按鈕翻頁"""
+        view = PetRankView(self, ctx.author.id, page)
+        view.message = await ctx.send(embed=self.build_petrank_embed(view.page, ctx.author.id), view=view)
+
+    @commands.command(name="expedition", aliases=["遠征"])
+    async def expedition_command(self, ctx, hours: Optional[int] = None):
+        """派嘎蛙去遠征 hours 小時，回來時帶回經驗、積分或食物；不帶參數時查看遠征狀態"""
+        pet = await self._fetch_pet(ctx.author.id)
+        if not pet:
+            await ctx.send(f"{ctx.author.mention} 你還沒有領養嘎蛙喔！\n輸入 `!adopt` 來挑選你的夥伴！")
+            return
+        report = self._pop_expedition_report(ctx.author.id, pet)
+        if report:
+            await ctx.send(report)
+        away = self.away_message(pet)
+        if away:
+            await ctx.send(away)
+            return
+        if hours is None:
+            if not report:
+                await ctx.send(
+                    f"用 `!expedition <小時>` 派嘎蛙去遠征（1~{expedition.EXPEDITION_MAX_HOURS} 小時，"
+                    f"每小時消耗 {expedition.SATIETY_PER_HOUR} 飽食度）。遠征期間不能特訓、餵食或對戰。"
+                )
+            return
+
+        blocker = expedition.departure_blocker(pet, hours)
+        if blocker:
+            await ctx.send(blocker)
+            return
+        record = expedition.depart(pet, hours, ctx.guild and ctx.guild.id)
+        self._touch(pet)
+        self._save_pet(ctx.author.id, pet)
+        meta = self.config.pet(pet['type'])
+        await ctx.send(
+            f"🧭 {meta.emoji} **{pet.get('nickname') or meta.name}** 出發遠征了！"
+            f"預計 <t:{int(record['end'])}:R> 回來（飽食 -{hours * expedition.SATIETY_PER_HOUR}）。"
+        )
+
+    @commands.command(name="talk", aliases=["聊天"])
+    async def talk(self, ctx, *, message: str):
+        """和你的嘎蛙聊天，牠會記得你們聊過的事"""
+        pet = await self._fetch_pet(ctx.author.id)
+        if not pet:
+            await ctx.send(f"{ctx.author.mention} 你還沒有領養嘎蛙喔！\n輸入 `!adopt` 來挑選你的夥伴！")
+            return
+        meta = self.config.pet(pet['type'])
+        if not self.chat.generate:
+            await ctx.send("嘎蛙今天不想說話（AI 模組未啟用）。")
+            return
+
+        async with ctx.typing():
+            status, reply = await self.chat.reply(ctx.author.id, ctx.guild and ctx.guild.id, pet, meta, message)
+        if status == "busy":
+            await ctx.send("大家聊得太熱烈了，嘎蛙們忙不過來，稍等一下再試試吧！")
+            return
+        if status == "failed":
+            await ctx.send(f"{meta.emoji} {pet.get('nickname') or meta.name} 歪著頭看你，好像沒聽懂……")
+            return
+        self._touch(pet)
+        self.repo.mark_dirty(ctx.author.id)
+        await ctx.send(f"{meta.emoji} **{pet.get('nickname') or meta.name}**：{reply}")
+
+    @commands.command(name="petassets")
+    @commands.has_permissions(manage_guild=True)
+    async def petassets(self, ctx):
+        """（管理員）查看寵物圖片 CDN 快取省下了多少上傳流量"""
+        stats = self.assets.stats
+        if not self.assets.channel_id:
+            await ctx.send("尚未設定 `PET_ASSET_CHANNEL_ID`，寵物圖片目前每次都以附件上傳。")
+            return
+        await ctx.send(
+            f"🖼️ 寵物圖片快取：上傳 {stats['uploads']} 次（{stats['bytes_uploaded'] / 1024:.1f} KiB），"
+            f"沿用 CDN 連結 {stats['reuses']} 次，共省下 **{stats['bytes_saved'] / 1024 / 1024:.2f} MiB** 上傳流量。"
+        )
+
+    def _check_saved_pets(self, config) -> list[str]:
+        """新設定必須還認得存檔裡每隻寵物的種族與技能。"""
+        errors = []
+        missing_types, missing_skills = set(), set()
+        for _, pet in self.repo.items():
+            if not config.pet(pet['type']):
+                missing_types.add(pet['type'])
+            missing_skills.update(s for s in pet.get('skills', []) if not config.skill(s))
+        if missing_types:
+            errors.append(f"存檔中的寵物使用了已被移除的種族：{'、'.join(sorted(missing_types))}")
+        if missing_skills:
+            errors.append(f"存檔中的寵物使用了已被移除的技能：{'、'.join(sorted(missing_skills))}")
+        errors.extend(f"!adopt 使用的種族 {key} 不存在" for key in ADOPT_CHOICES if not config.pet(key))
+        return errors
+
+    @commands.command(name="reloadconfig")
+    @commands.is_owner()
+    async def reloadconfig(self, ctx):
+        """（Bot 擁有者）重新載入寵物種族與技能設定，不需重啟"""
+        try:
+            config, changed = reload_game_config(check=self._check_saved_pets)
+        except ConfigError as e:
+            lines = "\n".join(f"- {err}" for err in e.errors[:15])
+            more = f"\n…另外還有 {len(e.errors) - 15} 個問題" if len(e.errors) > 15 else ""
+            await ctx.send(f"❌ 設定檔有誤，繼續使用原本的設定：\n{lines}{more}")
+            return
+        if not changed:
+            await ctx.send("設定檔沒有變動。")
+            return
+        # Both swaps happen before the next await, so no handler sees a mixed pair
+        self.config = config
+        self.progression = ProgressionTable(config.pet_types, MAX_LEVEL)
+        asyncio.create_task(self._build_variants())
+        self.riddles.warm_up(config.pet(k) for k in ADOPT_CHOICES)
+        await ctx.send(f"✅ 已重新載入設定：{len(config.pet_types)} 個種族、{len(config.skills)} 個技能。")
+
     @commands.command(name="adopt")
     async def adopt(self, ctx):
         """領養一隻嘎蛙 (三選一，AI 謎語版)"""
-        if self._get_pet(ctx.author.id):
+        if await self._fetch_pet(ctx.author.id):
             await ctx.send("你已經有一隻嘎蛙了！不能太貪心喔。")
             return
 
         # 1. Pick 3 types
-        choices = ['fire', 'water', 'forest']
+        choices = list(ADOPT_CHOICES)
         random.shuffle(choices) # Shuffle so Egg 1 is not always Fire
         
-        # 2. Generate Riddles via AI
-        info_str = ", ".join([f"選項{i+1}: {self.pet_types[k]['element']} ({self.pet_types[k]['name']})" for i, k in enumerate(choices)])
-        
-        prompt = f"""
-        你是嘎蛙世界的守護者。現在有三顆寵物蛋，分別孕育著不同的屬性。
-        請為這三顆蛋各寫一句「神秘的描述/謎語」，暗示它的屬性，但絕對「不要」直接說出屬性名稱或寵物名字。
-        讓玩家產生好奇心去選擇。
-        
-        選項資訊: {info_str}
-        
-        請嚴格依照 JSON 格式回傳，格式如下：
-        {{"1": "描述1", "2": "描述2", "3": "描述3"}}
-        不要 Markdown，只要純 JSON。
-        """
-        
-        waiting_msg = await ctx.send("🔮 正在感應蛋的能量 (AI 生成謎題中)...")
-        
-        riddle_json = await self.generate_content_safe(prompt)
-        
-        try:
-            # Clean possible markdown ```json ... ```
-            clean_json = riddle_json.replace("```json", "").replace("```", "").strip()
-            riddles = json.loads(clean_json)
-        except:
-            # Fallback if AI fails
-            riddles = {
-                "1": "這顆蛋散發著神祕的光芒...",
-                "2": "這顆蛋摸起來有點特別...",
-                "3": "這顆蛋似乎在震動..."
-            }
-            
-        await waiting_msg.delete()
+        # 2. Riddles come from the pre-generated pool; the model is only called when a pool is empty
+        egg_types = [self.config.pet(k) for k in choices]
+        waiting_msg = None
+        if any(self.riddles.stock(t.key) == 0 for t in egg_types) and self.riddles.generate:
+            waiting_msg = await ctx.send("🔮 正在感應蛋的能量 (AI 生成謎題中)...")
+        pooled = await asyncio.gather(*(self.riddles.take_or_generate(t) for t in egg_types))
+        if waiting_msg:
+            await waiting_msg.delete()
+
+        # Fallback if AI fails
+        fallback = ["這顆蛋散發著神祕的光芒...", "這顆蛋摸起來有點特別...", "這顆蛋似乎在震動..."]
+        riddles = [r or fallback[i] for i, r in enumerate(pooled)]
 
         # 3. Create View
         view = discord.ui.View()
@@ -437,29 +745,29 @@ class PetCog(commands.Cog):
             if interaction.user.id != ctx.author.id: return
             
             selected_type = choices[selected_idx]
-            p_name = self.pet_types[selected_type]["name"]
+            p_name = self.config.pet(selected_type).name
             
             # Directly create pet using default name
             self._create_pet(interaction.user.id, selected_type, p_name)
             
             # Fetch created pet for display
-            meta = self.pet_types[selected_type]
-            imgPath = os.path.join(ASSETS_DIR, meta['image'])
-            file = discord.File(imgPath, filename="new_pet.png")
+            meta = self.config.pet(selected_type)
+            imgPath = self.variants.pick(meta.image, "full")
+            image_url, file = await self._image_source(imgPath, "new_pet")
             
             embed = discord.Embed(
                 title=f"🎉 恭喜！蛋孵化了！是 {p_name}！", 
-                description=f"謎底揭曉：**{meta['element']}**！\n{meta['emoji']} {meta['name']}\n好好照顧他吧！",
-                color=meta['color']
+                description=f"謎底揭曉：**{meta.element}**！\n{meta.emoji} {meta.name}\n好好照顧他吧！",
+                color=meta.color
             )
-            embed.set_image(url="attachment://new_pet.png")
-            await interaction.response.send_message(file=file, embed=embed)
+            embed.set_image(url=image_url)
+            await interaction.response.send_message(embed=embed, files=[file] if file else [])
             view.stop()
 
         # Create buttons
         desc_text = ""
         for i in range(3):
-            rid = riddles.get(str(i+1), "神祕的氣息...")
+            rid = riddles[i]
             desc_text += f"**蛋 {i+1}**: {rid}\n\n"
             
             btn = discord.ui.Button(label=f"選擇蛋 {i+1}", style=discord.ButtonStyle.secondary, emoji="🥚")
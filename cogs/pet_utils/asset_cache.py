@@ -0,0 +1,175 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+from urllib.parse import parse_qs, urlparse
+
+import discord
+
+EXPIRY_MARGIN_SECONDS = 3600  # CDN 連結到期前多久就先重新上傳
+MAX_ENTRIES = 2000  # 最多記住幾個連結，超過時丟掉最久沒用到的
+MAX_SEEN_KEYS = 4096  # repeat_only 時記住多少個「只出現過一次」的 key
+
+
+def url_expires_at(url: str) -> Optional[float]:
+    """Discord CDN 附件連結的 `ex` 參數是十六進位的到期時間戳；沒有時視為不會過期。"""
+    values = parse_qs(urlparse(url).query).get('ex')
+    if not values:
+        return None
+    try:
+        return float(int(values[0], 16))
+    except ValueError:
+        return None
+
+
+class AssetUrlCache:
+    """把寵物圖片上傳到素材頻道一次，之後的 Embed 直接引用 CDN 連結。
+
+    紀錄存在 path（圖片路徑 -> 連結、檔案大小與修改時間）；檔案變更、連結遺失或
+    快要過期時才重新上傳。內容由名稱決定的檔案（例如以狀態雜湊命名的狀態卡）可改用 key 查詢，
+    只看連結是否過期；這類 key 大多只出現一次，可用 repeat_only 讓第二次出現才上傳。
+    紀錄最多保留 MAX_ENTRIES 筆（LRU），已過期的紀錄在存檔時丟掉。存檔由 flush 在背景執行緒進行，
+    Cog 的定期寫回迴圈會呼叫它，所以一段時間內的多次上傳只寫一次檔。
+    每次沿用連結都會累計「省下的上傳位元組」。沒有設定素材頻道、還不值得上傳或上傳失敗時回傳 None，
+    呼叫端改用一般附件。
+    """
+
+    def __init__(self, bot, path: str, channel_id: Optional[int]):
+        self.bot = bot
+        self.path = path
+        self.channel_id = channel_id
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+        # repeat_only keys requested once so far; the next request uploads them
+        self._seen: "OrderedDict[str, None]" = OrderedDict()
+        self.stats = {"uploads": 0, "reuses": 0, "bytes_uploaded": 0, "bytes_saved": 0}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._dirty = False
+        self._save_lock = asyncio.Lock()
+        self._load()
+
+    # --- Persistence ---
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (json.JSONDecodeError, IOError):
+            return
+        # Saved least recently used first, so the order survives restarts
+        self._entries = OrderedDict(data.get("entries", {}))
+        self._evict()
+        self.stats.update(data.get("stats", {}))
+
+    def _evict(self):
+        while len(self._entries) > MAX_ENTRIES:
+            self._entries.popitem(last=False)
+
+    def _write(self, payload: str):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(payload)
+        os.replace(tmp_path, self.path)
+
+    async def flush(self, force: bool = False):
+        """有新上傳時把紀錄寫回磁碟（在背景執行緒寫入）；force=True 時連同統計一定寫一次（卸載 Cog 時）。"""
+        async with self._save_lock:
+            if not self._dirty and not force:
+                return
+            self._dirty = False
+            now = time.time()
+            # Expired links would be re-uploaded anyway; dropping them keeps the file small
+            for key in [key for key, entry in self._entries.items() if self._is_expired(entry, now)]:
+                del self._entries[key]
+            payload = json.dumps({"entries": self._entries, "stats": self.stats}, ensure_ascii=False, separators=(',', ':'))
+            try:
+                await asyncio.to_thread(self._write, payload)
+            except OSError as e:
+                print(f"寫入寵物圖片連結紀錄時發生錯誤: {e}")
+                self._dirty = True
+
+    # --- Lookup ---
+    @staticmethod
+    def _is_expired(entry: Dict, now: float) -> bool:
+        expires = url_expires_at(entry.get("url", ""))
+        return expires is not None and expires <= now
+
+    @staticmethod
+    def _is_fresh(entry: Dict, stat: os.stat_result) -> bool:
+        if not entry.get("url") or entry.get("size") != stat.st_size:
+            return False
+        # Content-addressed entries have no mtime: touching the file does not change it
+        if "mtime" in entry and entry["mtime"] != int(stat.st_mtime):
+            return False
+        expires = url_expires_at(entry["url"])
+        return expires is None or time.time() < expires - EXPIRY_MARGIN_SECONDS
+
+    async def get_url(self, file_path: str, key: Optional[str] = None, repeat_only: bool = False) -> Optional[str]:
+        """回傳圖片的 CDN 連結；需要時才上傳。無法使用素材頻道時回傳 None。
+
+        key 代表檔案內容（內容不同 key 就不同）時，不再比對修改時間。
+        repeat_only=True 時，第一次看到的 key 不上傳、直接回傳 None，第二次出現才上傳並記住連結。
+        """
+        if not self.channel_id:
+            return None
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+        content_key = key is not None
+        key = key if content_key else os.path.abspath(file_path)
+
+        entry = self._entries.get(key)
+        if entry and self._is_fresh(entry, stat):
+            self._entries.move_to_end(key)
+            self.stats["reuses"] += 1
+            self.stats["bytes_saved"] += stat.st_size
+            return entry["url"]
+
+        if repeat_only and not entry and key not in self._seen:
+            # A one-off state is cheaper as a plain attachment than as an upload plus a cache entry
+            self._seen[key] = None
+            if len(self._seen) > MAX_SEEN_KEYS:
+                self._seen.popitem(last=False)
+            return None
+        self._seen.pop(key, None)
+
+        # One upload per image even when several dashboards ask at once
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            entry = self._entries.get(key)
+            if entry and self._is_fresh(entry, stat):
+                return entry["url"]
+            url = await self._upload(file_path)
+            if url is None:
+                return None
+            entry = {"url": url, "size": stat.st_size}
+            if not content_key:
+                entry["mtime"] = int(stat.st_mtime)
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            self._evict()
+            self.stats["uploads"] += 1
+            self.stats["bytes_uploaded"] += stat.st_size
+            self._dirty = True
+            return url
+
+    async def _upload(self, file_path: str) -> Optional[str]:
+        channel = self.bot.get_channel(self.channel_id)
+        if channel is None:
+            try:
+                channel = await self.bot.fetch_channel(self.channel_id)
+            except discord.HTTPException as e:
+                print(f"找不到素材頻道 {self.channel_id}: {e}")
+                return None
+        # ASCII file names keep the CDN URL stable regardless of the source name
+        ext = os.path.splitext(file_path)[1] or '.png'
+        filename = f"pet_{hashlib.sha1(os.path.basename(file_path).encode('utf-8')).hexdigest()[:12]}{ext}"
+        try:
+            message = await channel.send(file=discord.File(file_path, filename=filename))
+        except discord.HTTPException as e:
+            print(f"上傳寵物圖片 {file_path} 失敗: {e}")
+            return None
+        return message.attachments[0].url if message.attachments else None
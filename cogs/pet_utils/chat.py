@@ -0,0 +1,246 @@
+"""!talk 的寵物聊天：角色扮演提示、每隻寵物的滾動記憶、閒聊回覆快取與每個伺服器的併發上限。
+
+- 記憶：每隻寵物保留最近幾輪對話與一段摘要；估計的 token 數超過 MEMORY_TOKEN_BUDGET 時，
+  在背景把較舊的對話併進摘要，只留下最近 KEEP_RECENT_TURNS 句。存在 data/pet_chat.json。
+- 快取：只有 CACHEABLE_GREETINGS 裡的招呼語（正規化後比對）以 (狀態分組, 正規化訊息) 為鍵快取回覆。
+  招呼語的回覆生成時不帶個人記憶，同一組狀態的寵物可以共用，不會洩漏別人的對話；
+  其他訊息一律帶著這隻寵物的記憶生成，也不進快取。
+- 併發：每個伺服器同時最多 TALK_CONCURRENCY_PER_GUILD 個模型呼叫（含摘要），滿了就請玩家稍後再試。
+所有方法都在事件迴圈上呼叫，只有寫檔丟到背景執行緒。
+"""
+import asyncio
+import json
+import os
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+TALK_CONCURRENCY_PER_GUILD = 2
+MEMORY_TOKEN_BUDGET = 800   # 記憶（摘要 + 對話）估計超過這個 token 數就摘要
+KEEP_RECENT_TURNS = 6       # 摘要後保留的最近對話句數（主人與寵物各算一句）
+MAX_TURNS = 40              # 摘要一直失敗時的硬上限；到一半時即使沒超過預算也會摘要
+SUMMARY_MAX_CHARS = 200
+LEVEL_BUCKET = 10           # 快取分組用的等級區間
+# 回覆不需要記憶的招呼語（正規化後的寫法：小寫、無空白與標點）
+CACHEABLE_GREETINGS = frozenset({
+    "你好", "您好", "嗨", "哈囉", "安安", "早", "早安", "午安", "晚安", "掰掰", "再見", "謝謝",
+    "hi", "hello", "hey", "yo", "bye", "gm", "gn", "thanks",
+})
+MAX_MESSAGE_CHARS = 300     # 過長的訊息只取前面，避免一則訊息吃掉整份額度
+REPLY_CACHE_SIZE = 2048
+REPLY_CACHE_TTL_SECONDS = 6 * 3600  # 同一句閒聊隔一段時間後換個新回覆
+
+MOODS = {"hungry": "肚子很餓", "tired": "很累、體力很低", "happy": "精神很好"}
+
+PROMPT = """
+你是一隻名叫「{name}」的嘎蛙（種族：{species}，屬性：{element}，等級 Lv.{level}），現在{mood}。
+請完全以這隻寵物的身分，用繁體中文回覆主人：語氣可愛、符合屬性的個性，1 到 3 句話。
+不要使用 Markdown，不要替主人說話，也不要提到你是 AI。
+{memory}
+主人說：{message}
+"""
+
+SUMMARY_PROMPT = """
+以下是寵物「{name}」與主人之前的記憶摘要和最近的對話。
+請用繁體中文、{limit} 字以內，以寵物的角度整理出值得記住的重點（主人的喜好、約定、發生過的事），只輸出摘要本身。
+
+之前的摘要：{summary}
+對話：
+{turns}
+"""
+
+
+def estimate_tokens(text: str) -> int:
+    """粗估 token 數：中日韓文字一字一個，其他字元約四個一個。"""
+    wide = sum(1 for ch in text if ord(ch) >= 0x2E80)
+    return wide + (len(text) - wide + 3) // 4
+
+
+def normalize_prompt(text: str) -> str:
+    """全半形統一、轉小寫，並去掉空白與標點，讓「你好！」和「 你好 」算同一句。"""
+    text = unicodedata.normalize('NFKC', text).lower()
+    return "".join(ch for ch in text if unicodedata.category(ch)[0] not in "PZC")
+
+
+def mood_of(pet: Dict) -> str:
+    stats = pet['stats']
+    if stats.get('satiety', 0) <= 20:
+        return "hungry"
+    if stats['hp'] < stats['max_hp'] * 0.3:
+        return "tired"
+    return "happy"
+
+
+def state_bucket(pet: Dict, meta) -> Tuple:
+    """會影響閒聊回覆的狀態：種族、名字、等級區間與心情。"""
+    return (pet['type'], pet.get('nickname') or meta.name, pet['level'] // LEVEL_BUCKET, mood_of(pet))
+
+
+class PetChat:
+    """寵物聊天的記憶、回覆快取與併發控制。generate 失敗時回傳 None。"""
+
+    def __init__(self, path: str, generate: Optional[Callable[[str], Awaitable[Optional[str]]]]):
+        self.path = path
+        # None when the AI model is not configured
+        self.generate = generate
+        self._memories: Dict[str, Dict] = self._load()
+        self._dirty = False
+        self._cache: "OrderedDict[Tuple, Tuple[str, float]]" = OrderedDict()
+        self._slots: Dict[Optional[int], asyncio.Semaphore] = {}
+        self._compacting: Set[str] = set()
+        self._tasks: Set[asyncio.Task] = set()
+
+    def _load(self) -> Dict[str, Dict]:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (json.JSONDecodeError, IOError):
+            return {}
+
+    def _write(self, payload: str):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(payload)
+        os.replace(tmp_path, self.path)
+
+    async def flush(self):
+        """有新對話時寫回 pet_chat.json。"""
+        if not self._dirty:
+            return
+        self._dirty = False
+        payload = json.dumps(self._memories, ensure_ascii=False)
+        try:
+            await asyncio.to_thread(self._write, payload)
+        except OSError as e:
+            print(f"寫入寵物聊天記憶時發生錯誤: {e}")
+            self._dirty = True
+
+    async def close(self):
+        for task in self._tasks:
+            task.cancel()
+        await self.flush()
+
+    # --- Concurrency ---
+    def _slot(self, guild_id: Optional[int]) -> asyncio.Semaphore:
+        slot = self._slots.get(guild_id)
+        if slot is None:
+            slot = self._slots[guild_id] = asyncio.Semaphore(TALK_CONCURRENCY_PER_GUILD)
+        return slot
+
+    # --- Reply Cache ---
+    def _cached(self, key: Tuple) -> Optional[str]:
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        reply, cached_at = entry
+        if time.monotonic() - cached_at > REPLY_CACHE_TTL_SECONDS:
+            del self._cache[key]
+            return None
+        self._cache.move_to_end(key)
+        return reply
+
+    def _remember_reply(self, key: Tuple, reply: str):
+        self._cache[key] = (reply, time.monotonic())
+        if len(self._cache) > REPLY_CACHE_SIZE:
+            self._cache.popitem(last=False)
+
+    # --- Memory ---
+    def _memory(self, user_id: str) -> Dict:
+        return self._memories.setdefault(user_id, {"summary": "", "turns": []})
+
+    @staticmethod
+    def _memory_tokens(memory: Dict) -> int:
+        return estimate_tokens(memory["summary"]) + sum(estimate_tokens(text) for _, text in memory["turns"])
+
+    @staticmethod
+    def _format_turns(turns: List, pet_label: str) -> str:
+        return "\n".join(f"{'主人' if speaker == 'owner' else pet_label}：{text}" for speaker, text in turns)
+
+    def _record(self, user_id: str, message: str, reply: str):
+        memory = self._memory(user_id)
+        memory["turns"].extend([["owner", message], ["pet", reply]])
+        del memory["turns"][:-MAX_TURNS]
+        self._dirty = True
+
+    async def _compact(self, user_id: str, guild_id: Optional[int], name: str):
+        """把較舊的對話併進摘要。和 !talk 共用同一個伺服器的併發名額。"""
+        memory = self._memory(user_id)
+        older = [list(turn) for turn in memory["turns"][:-KEEP_RECENT_TURNS]]
+        if not older:
+            return
+        prompt = SUMMARY_PROMPT.format(
+            name=name, limit=SUMMARY_MAX_CHARS, summary=memory["summary"] or "（無）",
+            turns=self._format_turns(older, name),
+        )
+        async with self._slot(guild_id):
+            summary = await self.generate(prompt)
+        if not summary:
+            return  # MAX_TURNS still bounds the memory; the next reply tries again
+        memory["summary"] = summary[:SUMMARY_MAX_CHARS]
+        # Turns only ever leave from the front, so the summarized ones are still a prefix unless trimmed meanwhile
+        if memory["turns"][:len(older)] == older:
+            del memory["turns"][:len(older)]
+        self._dirty = True
+
+    def _schedule_compaction(self, user_id: str, guild_id: Optional[int], name: str):
+        memory = self._memory(user_id)
+        # Many short lines can stay under the budget; summarize them before MAX_TURNS starts dropping them
+        if user_id in self._compacting or (
+            self._memory_tokens(memory) <= MEMORY_TOKEN_BUDGET and len(memory["turns"]) < MAX_TURNS // 2
+        ):
+            return
+        self._compacting.add(user_id)
+
+        async def run():
+            try:
+                await self._compact(user_id, guild_id, name)
+            finally:
+                self._compacting.discard(user_id)
+
+        task = asyncio.create_task(run())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    # --- Talk ---
+    def _prompt(self, pet: Dict, meta, message: str, memory: Optional[Dict]) -> str:
+        name = pet.get('nickname') or meta.name
+        memory_text = ""
+        if memory and memory["summary"]:
+            memory_text += f"你記得的事：{memory['summary']}\n"
+        if memory and memory["turns"]:
+            memory_text += f"最近的對話：\n{self._format_turns(memory['turns'], '你')}\n"
+        return PROMPT.format(
+            name=name, species=meta.name, element=meta.element, level=pet['level'],
+            mood=MOODS[mood_of(pet)], memory=memory_text, message=message,
+        )
+
+    async def reply(self, user_id, guild_id: Optional[int], pet: Dict, meta, message: str) -> Tuple[str, Optional[str]]:
+        """回傳 (狀態, 回覆)。狀態是 "cached"、"generated"、"busy" 或 "failed"；後兩者沒有回覆。"""
+        user_id = str(user_id)
+        message = message[:MAX_MESSAGE_CHARS]
+        normalized = normalize_prompt(message)
+        greeting = normalized in CACHEABLE_GREETINGS
+        key = (state_bucket(pet, meta), normalized)
+
+        if greeting:
+            reply = self._cached(key)
+            if reply is not None:
+                self._record(user_id, message, reply)
+                return "cached", reply
+
+        slot = self._slot(guild_id)
+        if slot.locked():
+            return "busy", None
+        async with slot:
+            # Greetings are answered without personal memory so the reply can be shared through the cache
+            reply = await self.generate(self._prompt(pet, meta, message, None if greeting else self._memory(user_id)))
+        if not reply:
+            return "failed", None
+
+        if greeting:
+            self._remember_reply(key, reply)
+        self._record(user_id, message, reply)
+        self._schedule_compaction(user_id, guild_id, pet.get('nickname') or meta.name)
+        return "generated", reply
@@ -0,0 +1,149 @@
+"""嘎蛙遠征：出發時記下能力值快照與亂數種子，回來後一次算出整趟的收穫。
+
+遠征期間沒有任何背景工作。主人下次讀取寵物時，resolve 用種子建立的 random.Random
+直接抽出「成功幾小時」「撿到幾次積分」「各種食物各幾份」的二項 / 多項分布結果，
+成本只和獎勵種類有關，與遠征時數和離開的寵物數量都無關。同一個種子永遠得到同樣的結果，
+所以什麼時候回來看都不會改變收穫。
+
+遠征期間自然回復（regen）暫停：出發時把 regen_at 推到回程那一分鐘，飽食度只扣出發時預付的
+每小時 SATIETY_PER_HOUR，HP / AP 也不會在路上回復。
+"""
+import random
+import time
+from typing import Dict, Optional
+
+from .regen import current_minute
+
+EXPEDITION_MAX_HOURS = 24
+SATIETY_PER_HOUR = 4        # 出發時先扣掉整趟的飽食度；遠征期間不再自然下降
+MIN_HP = 10                 # HP 不高於這個值不能出發
+BASE_SUCCESS = 0.35         # 每小時有收穫的基本機率
+MAX_SUCCESS = 0.9
+EXP_PER_SUCCESS = 12        # 每個成功的小時拿到的經驗值（另加等級 / 5）
+POINT_CHANCE = 0.4          # 成功的小時裡撿到積分的機率
+POINTS_PER_FIND = 15
+FOOD_CHANCE = 0.15          # 成功的小時裡帶回食物的機率；越便宜的食物越常見
+HP_LOSS_PER_FAILURE = 8     # 每個失敗的小時損失的 HP（防禦越高越少）
+
+
+def success_rate(snapshot: Dict) -> float:
+    """攻守越高、出發時越飽，每小時越容易有收穫。"""
+    offense = snapshot['atk'] + snapshot['def']
+    rate = BASE_SUCCESS + 0.45 * offense / (offense + snapshot['max_hp'] / 2)
+    rate += 0.1 * snapshot['satiety'] / max(1, snapshot['max_satiety'])
+    return min(MAX_SUCCESS, rate)
+
+
+def departure_blocker(pet: Dict, hours: int) -> Optional[str]:
+    """不能出發時回傳原因，可以時回傳 None。"""
+    if not 1 <= hours <= EXPEDITION_MAX_HOURS:
+        return f"遠征時間必須是 1 到 {EXPEDITION_MAX_HOURS} 小時。"
+    if pet['stats']['hp'] <= MIN_HP:
+        return "你的寵物體力不足，先休息一下再出發吧！"
+    need = hours * SATIETY_PER_HOUR
+    if pet['stats'].get('satiety', 0) < need:
+        return f"這趟遠征需要 {need} 飽食度，先餵飽牠再出發吧！"
+    return None
+
+
+def depart(pet: Dict, hours: int, guild_id: Optional[int], now: Optional[float] = None) -> Dict:
+    """讓寵物出發（就地修改 pet）並回傳遠征紀錄。呼叫前先用 departure_blocker 檢查。"""
+    now = time.time() if now is None else now
+    stats = pet['stats']
+    record = {
+        "status": "away",
+        "start": now,
+        "end": now + hours * 3600,
+        "hours": hours,
+        "seed": random.getrandbits(64),
+        # Points are paid into the economy the pet left from
+        "guild_id": guild_id,
+        # The outcome only depends on the pet as it left, so feeding or leveling meanwhile cannot change it
+        "snapshot": {
+            "level": pet['level'], "atk": stats['atk'], "def": stats['def'], "max_hp": stats['max_hp'],
+            "satiety": stats['satiety'], "max_satiety": stats.get('max_satiety', 100),
+        },
+    }
+    stats['satiety'] -= hours * SATIETY_PER_HOUR
+    # Passive regen resumes at the return minute; settle() is a no-op until then
+    pet['regen_at'] = current_minute(record["end"])
+    pet['expedition'] = record
+    return record
+
+
+def resume_regen(pet: Dict, record: Dict):
+    """結算遠征時呼叫：自然回復從回程那一分鐘接著算。
+
+    也會讓這個規則上線前就已出發的寵物跳過遠征期間；已經結算到回程之後的部分不會重算。
+    """
+    pet['regen_at'] = max(pet.get('regen_at') or 0, current_minute(record["end"]))
+
+
+def is_away(pet: Dict) -> bool:
+    record = pet.get('expedition')
+    return bool(record) and record["status"] == "away"
+
+
+def is_due(pet: Dict, now: Optional[float] = None) -> bool:
+    return is_away(pet) and (time.time() if now is None else now) >= pet['expedition']["end"]
+
+
+def _binomial(rng: random.Random, n: int, p: float) -> int:
+    """以一個均勻亂數反查二項分布的累積機率。"""
+    if n <= 0 or p <= 0:
+        return 0
+    if p >= 1:
+        return n
+    u, q = rng.random(), 1 - p
+    prob = cdf = q ** n
+    k = 0
+    while u > cdf and k < n:
+        prob *= (n - k) / (k + 1) * p / q
+        k += 1
+        cdf += prob
+    return k
+
+
+def _multinomial(rng: random.Random, n: int, weights: Dict[str, float]) -> Dict[str, int]:
+    """把 n 份依權重分給各項：依序以條件二項分布抽，每項一個亂數。"""
+    counts, remaining, left = {}, sum(weights.values()), n
+    for key, weight in weights.items():
+        if left <= 0:
+            break
+        count = _binomial(rng, left, weight / remaining) if remaining > weight else left
+        if count:
+            counts[key] = count
+        left -= count
+        remaining -= weight
+    return counts
+
+
+def resolve(record: Dict, food_menu: Dict[str, Dict]) -> Dict:
+    """算出整趟遠征的收穫。結果只取決於紀錄本身（種子與快照）。"""
+    rng = random.Random(record["seed"])
+    snapshot = record["snapshot"]
+    hours = record["hours"]
+    successes = _binomial(rng, hours, success_rate(snapshot))
+    finds = _binomial(rng, successes, POINT_CHANCE)
+    meals = _binomial(rng, successes, FOOD_CHANCE)
+    food = _multinomial(rng, meals, {item_id: 1 / item["price"] for item_id, item in food_menu.items()})
+    return {
+        "hours": hours,
+        "successes": successes,
+        "exp": successes * (EXP_PER_SUCCESS + snapshot['level'] // 5),
+        "points": finds * POINTS_PER_FIND,
+        "food": food,
+        "hp_loss": (hours - successes) * max(2, HP_LOSS_PER_FAILURE - snapshot['def'] // 20),
+    }
+
+
+def apply_upkeep(pet: Dict, outcome: Dict, food_menu: Dict[str, Dict]):
+    """扣掉受的傷，再吃掉帶回來的食物（就地修改 pet）。經驗值與積分由呼叫端處理。"""
+    stats = pet['stats']
+    stats['hp'] = max(1, stats['hp'] - outcome["hp_loss"])
+    for item_id, count in outcome["food"].items():
+        item = food_menu[item_id]
+        stats['hp'] = min(stats['max_hp'], stats['hp'] + item['heal'] * count)
+        stats['satiety'] = min(stats.get('max_satiety', 100), stats['satiety'] + item['satiety'] * count)
+        if item['buff']:
+            pet['buff'] = item['buff']
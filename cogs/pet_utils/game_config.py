@@ -0,0 +1,268 @@
+"""把 configs/pet_types.json 與 configs/skills.json 編譯成唯讀的遊戲設定物件。
+
+- 啟動時驗證一次：欄位型別、學習表裡的技能是否存在、進化目標是否存在且不成環。
+  任何錯誤都會一起列在 ConfigError 裡，舊的設定保持不變。
+- 種族與技能編成 __slots__ 的唯讀物件，並依檔案順序配發整數 id（只在記憶體中使用；
+  存檔裡的寵物仍以 "fire"、"🔥 火花" 這種字串鍵記錄，設定檔調整順序也不受影響）。
+- 編譯結果以兩個檔案的 mtime 為鍵快取，PetCog 與 BattleCog 共用同一份；
+  reload_game_config 只有在檔案變動時才重新編譯，成功後一次替換整份設定。
+"""
+import json
+import os
+from types import MappingProxyType
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from .progression import DEFAULT_GROWTH
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+PET_TYPES_FILE = os.path.join(PROJECT_ROOT, 'configs', 'pet_types.json')
+SKILLS_FILE = os.path.join(PROJECT_ROOT, 'configs', 'skills.json')
+
+SKILL_CATEGORIES = ('physical', 'magic', 'status')
+
+
+class ConfigError(ValueError):
+    """設定檔內容不合法。errors 是所有問題的清單。"""
+
+    def __init__(self, errors: List[str]):
+        super().__init__("\n".join(errors))
+        self.errors = errors
+
+
+class _Frozen:
+    __slots__ = ()
+
+    def __init__(self, **fields):
+        for name, value in fields.items():
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} 是唯讀的設定物件")
+
+    def __repr__(self):
+        return f"{type(self).__name__}({', '.join(f'{n}={getattr(self, n)!r}' for n in self.__slots__)})"
+
+
+class Stats(_Frozen):
+    """hp / atk / def 三項數值；保留 stats['def'] 的寫法方便與存檔格式對照。"""
+    __slots__ = ('hp', 'atk', 'defense')
+
+    def __getitem__(self, name: str) -> int:
+        return self.defense if name == 'def' else getattr(self, name)
+
+
+class Skill(_Frozen):
+    __slots__ = ('id', 'key', 'slug', 'name', 'element', 'category', 'power', 'accuracy', 'cost', 'description', 'effects')
+
+
+class Evolution(_Frozen):
+    __slots__ = ('min_level', 'next_form', 'msg')  # next_form 是目標種族的整數 id
+
+
+class PetType(_Frozen):
+    __slots__ = (
+        'id', 'key', 'name', 'element', 'emoji', 'color', 'image',
+        'base_stats', 'growth', 'learnset', 'evolution',
+    )
+
+    def skills_up_to(self, level: int) -> Iterator[int]:
+        """等級 level 以下可學會的技能 id，依學習等級排序。"""
+        for req_level, skill_ids in self.learnset:
+            if req_level > level:
+                break
+            yield from skill_ids
+
+
+class GameConfig(_Frozen):
+    __slots__ = ('pet_types', 'skills', '_pet_index', '_skill_index')
+
+    def pet(self, key: str) -> Optional[PetType]:
+        index = self._pet_index.get(key)
+        return None if index is None else self.pet_types[index]
+
+    def skill(self, key: str) -> Optional[Skill]:
+        index = self._skill_index.get(key)
+        return None if index is None else self.skills[index]
+
+    def evolution_target(self, pet_type: PetType) -> Optional[PetType]:
+        return self.pet_types[pet_type.evolution.next_form] if pet_type.evolution else None
+
+
+# --- Compiler ---
+def _int(value, where: str, errors: List[str], minimum: int = 0) -> int:
+    if isinstance(value, bool) or not isinstance(value, int) or value < minimum:
+        errors.append(f"{where} 必須是 >= {minimum} 的整數（目前是 {value!r}）")
+        return minimum
+    return value
+
+
+def _str(value, where: str, errors: List[str]) -> str:
+    if not isinstance(value, str) or not value:
+        errors.append(f"{where} 必須是非空字串（目前是 {value!r}）")
+        return ""
+    return value
+
+
+def _stats(raw, where: str, errors: List[str], minimum: int) -> Stats:
+    if not isinstance(raw, dict):
+        errors.append(f"{where} 必須是物件")
+        raw = {}
+    return Stats(
+        hp=_int(raw.get('hp'), f"{where}.hp", errors, minimum),
+        atk=_int(raw.get('atk'), f"{where}.atk", errors, minimum),
+        defense=_int(raw.get('def'), f"{where}.def", errors, minimum),
+    )
+
+
+def _compile_skills(raw: Dict, errors: List[str]) -> Tuple[Skill, ...]:
+    skills = []
+    for key, data in raw.items():
+        where = f"skills[{key}]"
+        if not isinstance(data, dict):
+            errors.append(f"{where} 必須是物件")
+            continue
+        category = data.get('category')
+        if category not in SKILL_CATEGORIES:
+            errors.append(f"{where}.category 必須是 {'/'.join(SKILL_CATEGORIES)} 之一（目前是 {category!r}）")
+        accuracy = _int(data.get('accuracy'), f"{where}.accuracy", errors)
+        if accuracy > 100:
+            errors.append(f"{where}.accuracy 不能超過 100")
+        effects = data.get('effects', [])
+        if not isinstance(effects, list) or not all(isinstance(e, dict) and 'type' in e for e in effects):
+            errors.append(f"{where}.effects 必須是含 type 欄位的物件陣列")
+            effects = []
+        skills.append(Skill(
+            id=len(skills), key=key, slug=data.get('id', key),
+            name=_str(data.get('name'), f"{where}.name", errors),
+            element=data.get('element'), category=category,
+            power=_int(data.get('power'), f"{where}.power", errors),
+            accuracy=accuracy,
+            cost=_int(data.get('cost'), f"{where}.cost", errors),
+            description=data.get('description', ""),
+            effects=tuple(MappingProxyType(dict(e)) for e in effects),
+        ))
+    return tuple(skills)
+
+
+def _compile_pet_types(raw: Dict, skill_index: Dict[str, int], errors: List[str]) -> Tuple[PetType, ...]:
+    pet_index = {key: i for i, key in enumerate(raw)}
+    pet_types = []
+    for key, data in raw.items():
+        where = f"pet_types[{key}]"
+        if not isinstance(data, dict):
+            errors.append(f"{where} 必須是物件")
+            data = {}
+
+        learnset = []
+        for level_str, skill_keys in (data.get('learnset') or {}).items():
+            try:
+                level = int(level_str)
+            except ValueError:
+                errors.append(f"{where}.learnset 的等級 {level_str!r} 不是整數")
+                continue
+            missing = [s for s in skill_keys if s not in skill_index]
+            if missing:
+                errors.append(f"{where}.learnset[{level_str}] 引用了不存在的技能：{'、'.join(missing)}")
+            learnset.append((level, tuple(skill_index[s] for s in skill_keys if s in skill_index)))
+        learnset.sort(key=lambda item: item[0])
+
+        evolution = None
+        evo = data.get('evolution')
+        if evo:
+            next_form = evo.get('next_form')
+            if next_form not in pet_index:
+                errors.append(f"{where}.evolution.next_form 指向不存在的種族 {next_form!r}")
+            else:
+                evolution = Evolution(
+                    min_level=_int(evo.get('min_level'), f"{where}.evolution.min_level", errors, 1),
+                    next_form=pet_index[next_form], msg=evo.get('msg', "進化成功！"),
+                )
+
+        color = data.get('color', 0)
+        pet_types.append(PetType(
+            id=pet_index[key], key=key,
+            name=_str(data.get('name'), f"{where}.name", errors),
+            element=_str(data.get('element'), f"{where}.element", errors),
+            emoji=data.get('emoji', ""),
+            color=_int(color, f"{where}.color", errors),
+            image=_str(data.get('image'), f"{where}.image", errors),
+            base_stats=_stats(data.get('base_stats'), f"{where}.base_stats", errors, 1),
+            growth=_stats(data.get('growth_rate', DEFAULT_GROWTH), f"{where}.growth_rate", errors, 0),
+            learnset=tuple(learnset), evolution=evolution,
+        ))
+
+    # Evolution chains must end somewhere
+    for pet_type in pet_types:
+        seen, current = set(), pet_type
+        while current.evolution:
+            if current.id in seen:
+                errors.append(f"pet_types[{pet_type.key}] 的進化鏈形成循環")
+                break
+            seen.add(current.id)
+            current = pet_types[current.evolution.next_form]
+    return tuple(pet_types)
+
+
+def compile_config(pet_types_raw: Dict, skills_raw: Dict) -> GameConfig:
+    """驗證並編譯原始設定；有任何錯誤時丟出 ConfigError。"""
+    errors: List[str] = []
+    if not isinstance(pet_types_raw, dict) or not isinstance(skills_raw, dict):
+        raise ConfigError(["pet_types.json 與 skills.json 的最外層必須是物件"])
+    skills = _compile_skills(skills_raw, errors)
+    skill_index = {skill.key: skill.id for skill in skills}
+    pet_types = _compile_pet_types(pet_types_raw, skill_index, errors)
+    if errors:
+        raise ConfigError(errors)
+    return GameConfig(
+        pet_types=pet_types, skills=skills,
+        _pet_index=MappingProxyType({p.key: p.id for p in pet_types}),
+        _skill_index=MappingProxyType(skill_index),
+    )
+
+
+# --- mtime-keyed cache ---
+_cache: Dict[str, object] = {"key": None, "config": None}
+
+
+def _file_key(*paths: str) -> Tuple:
+    return tuple((path, os.stat(path).st_mtime_ns, os.stat(path).st_size) for path in paths)
+
+
+def _read_json(path: str) -> Dict:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        raise ConfigError([f"無法讀取 {os.path.basename(path)}：{e}"])
+
+
+def reload_game_config(
+    pet_types_path: str = PET_TYPES_FILE, skills_path: str = SKILLS_FILE,
+    check: Optional[Callable[[GameConfig], List[str]]] = None,
+) -> Tuple[GameConfig, bool]:
+    """檔案有變動時重新編譯並替換目前的設定，回傳 (目前的設定, 是否重新編譯)。
+
+    check 可以對新設定做額外檢查（例如存檔中的寵物種族是否還在），回傳錯誤清單。
+    編譯或檢查失敗時丟出 ConfigError，目前的設定保持不變。
+    """
+    try:
+        key = _file_key(pet_types_path, skills_path)
+    except OSError as e:
+        raise ConfigError([f"找不到設定檔：{e}"])
+    if key == _cache["key"]:
+        return _cache["config"], False
+    config = compile_config(_read_json(pet_types_path), _read_json(skills_path))
+    errors = check(config) if check else []
+    if errors:
+        raise ConfigError(errors)
+    # Swap both together so readers never see a config paired with the wrong key
+    _cache.update(key=key, config=config)
+    return config, True
+
+
+def game_config() -> GameConfig:
+    """目前使用中的設定；第一次呼叫時編譯。"""
+    config = _cache["config"]
+    if config is None:
+        config, _ = reload_game_config()
+    return config
@@ -0,0 +1,160 @@
+"""寵物圖片的縮圖 / 大圖變體管線（需要選用套件 Pillow）。
+
+對 configs/pet_types.json 用到的每張圖片，各產生 thumb（縮圖）與 full（大圖）兩種尺寸，
+每種尺寸同時輸出最佳化的 PNG 與 WebP，只保留較小的那一個。輸出檔以來源內容的雜湊命名，
+存在快取資料夾中；來源沒變就不重做。Bot 啟動時會自動執行，也可以離線預先產生：
+
+    python -m cogs.pet_utils.image_variants
+"""
+import hashlib
+import io
+import json
+import os
+from typing import Dict, Iterable, Optional
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow is optional; without it the original PNGs are used as-is
+    Image = None
+
+# 變體名稱 -> 最長邊像素。thumb 給 set_thumbnail（顯示約 80px），full 給 set_image（顯示約 400px）
+VARIANT_SIZES = {"thumb": 256, "full": 640}
+WEBP_QUALITY = 85
+PIPELINE_VERSION = 1  # 參數改變時加一，讓所有變體重做
+
+
+def _file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _encode(image, fmt: str) -> bytes:
+    buffer = io.BytesIO()
+    if fmt == 'png':
+        image.save(buffer, format='PNG', optimize=True)
+    else:
+        image.save(buffer, format='WEBP', quality=WEBP_QUALITY, method=6)
+    return buffer.getvalue()
+
+
+class ImageVariants:
+    """產生並查詢寵物圖片變體。manifest.json 記錄每張來源圖的雜湊與對應的變體檔名。"""
+
+    def __init__(self, assets_dir: str, cache_dir: str):
+        self.assets_dir = assets_dir
+        self.cache_dir = cache_dir
+        self.manifest_path = os.path.join(cache_dir, 'manifest.json')
+        self._manifest: Dict[str, Dict] = self._load_manifest()
+
+    @property
+    def available(self) -> bool:
+        return Image is not None
+
+    def _load_manifest(self) -> Dict[str, Dict]:
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (json.JSONDecodeError, IOError):
+            return {}
+        if data.get("version") != PIPELINE_VERSION:
+            return {}
+        return data.get("images", {})
+
+    def _save_manifest(self):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = self.manifest_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"version": PIPELINE_VERSION, "images": self._manifest}, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+
+    # --- Build ---
+    def _is_current(self, name: str, stat: os.stat_result) -> bool:
+        entry = self._manifest.get(name)
+        if not entry or entry.get("size") != stat.st_size:
+            return False
+        if not all(os.path.exists(os.path.join(self.cache_dir, f)) for f in entry["variants"].values()):
+            return False
+        if entry.get("mtime") == int(stat.st_mtime):
+            return True
+        # Touched but maybe not changed: fall back to the content hash
+        return entry.get("hash") == _file_hash(os.path.join(self.assets_dir, name))
+
+    def _build_one(self, name: str, stat: os.stat_result) -> Dict:
+        source_path = os.path.join(self.assets_dir, name)
+        content_hash = _file_hash(source_path)
+        variants = {}
+        with Image.open(source_path) as source:
+            source = source.convert('RGBA' if 'A' in source.getbands() else 'RGB')
+            for variant, max_side in VARIANT_SIZES.items():
+                image = source.copy()
+                image.thumbnail((max_side, max_side), Image.LANCZOS)
+                # Keep whichever encoding is smaller for this size
+                ext, data = min(((fmt, _encode(image, fmt)) for fmt in ('png', 'webp')), key=lambda item: len(item[1]))
+                filename = f"{content_hash[:16]}_{variant}.{ext}"
+                with open(os.path.join(self.cache_dir, filename), 'wb') as f:
+                    f.write(data)
+                variants[variant] = filename
+        return {"hash": content_hash, "size": stat.st_size, "mtime": int(stat.st_mtime), "variants": variants}
+
+    def build(self, image_names: Iterable[str]) -> int:
+        """為 image_names 產生缺少或過期的變體，回傳重做的張數。沒有 Pillow 時不做任何事。"""
+        if not self.available:
+            return 0
+        os.makedirs(self.cache_dir, exist_ok=True)
+        rebuilt = 0
+        wanted = set(image_names)
+        for name in sorted(wanted):
+            try:
+                stat = os.stat(os.path.join(self.assets_dir, name))
+            except OSError:
+                continue
+            if self._is_current(name, stat):
+                continue
+            try:
+                self._manifest[name] = self._build_one(name, stat)
+                rebuilt += 1
+            except OSError as e:
+                print(f"產生寵物圖片變體失敗 {name}: {e}")
+
+        # Drop images no longer referenced and variant files nobody points to
+        for name in [n for n in self._manifest if n not in wanted]:
+            del self._manifest[name]
+        referenced = {f for entry in self._manifest.values() for f in entry["variants"].values()}
+        for filename in os.listdir(self.cache_dir):
+            if filename != 'manifest.json' and filename not in referenced:
+                os.remove(os.path.join(self.cache_dir, filename))
+        self._save_manifest()
+        return rebuilt
+
+    # --- Lookup ---
+    def pick(self, image_name: str, variant: str) -> Optional[str]:
+        """回傳指定變體的檔案路徑；沒有變體時退回原圖，原圖也不存在時回傳 None。"""
+        entry = self._manifest.get(image_name)
+        if entry and variant in entry["variants"]:
+            path = os.path.join(self.cache_dir, entry["variants"][variant])
+            if os.path.exists(path):
+                return path
+        path = os.path.join(self.assets_dir, image_name)
+        return path if os.path.exists(path) else None
+
+
+def referenced_images(pet_types: Iterable) -> set:
+    """所有種族（game_config.PetType）引用的圖片檔名。"""
+    return {pet_type.image for pet_type in pet_types if pet_type.image}
+
+
+if __name__ == '__main__':
+    from .game_config import PROJECT_ROOT as project_root, game_config
+    names = referenced_images(game_config().pet_types)
+    pipeline = ImageVariants(os.path.join(project_root, 'assets', 'pets'), os.path.join(project_root, 'data', 'cache', 'pet_variants'))
+    if not pipeline.available:
+        raise SystemExit("需要 Pillow：pip install Pillow")
+    count = pipeline.build(names)
+    total_src = sum(os.path.getsize(os.path.join(pipeline.assets_dir, n)) for n in names if os.path.exists(os.path.join(pipeline.assets_dir, n)))
+    print(f"重做 {count} 張圖片的變體（共 {len(names)} 張）。")
+    for variant in VARIANT_SIZES:
+        size = sum(os.path.getsize(p) for p in (pipeline.pick(n, variant) for n in names) if p)
+        print(f"{variant:<6} {size / 1024:>10.1f} KiB（原圖 {total_src / 1024:.1f} KiB）")
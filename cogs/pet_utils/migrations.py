@@ -0,0 +1,70 @@
+"""寵物資料的結構版本與遷移步驟。
+
+每筆寵物紀錄帶有 `schema` 版本號，pet.json 本身也記錄整份檔案已遷移到的版本。
+啟動時 migrate_all 逐筆把舊紀錄升到 SCHEMA_VERSION，之後讀取路徑不再做任何檢查；
+從冷資料區取回的舊紀錄則在取回當下以 migrate_record 補上。
+
+新增欄位時：在下面加一個 @migration(SCHEMA_VERSION + 1) 步驟，並把 SCHEMA_VERSION 加一。
+"""
+from typing import Callable, Dict, List, Tuple
+
+from .regen import current_minute
+
+SCHEMA_KEY = "schema"
+SCHEMA_VERSION = 3
+
+# (目標版本, 說明, 就地修改一筆紀錄的函式)，依版本排序
+MIGRATIONS: List[Tuple[int, str, Callable[[Dict], None]]] = []
+
+
+def migration(version: int, description: str):
+    """註冊一個遷移步驟：把紀錄從 version - 1 升到 version。"""
+    def register(step: Callable[[Dict], None]):
+        if any(v == version for v, _, _ in MIGRATIONS):
+            raise ValueError(f"重複的寵物資料遷移版本: {version}")
+        MIGRATIONS.append((version, description, step))
+        MIGRATIONS.sort(key=lambda item: item[0])
+        return step
+    return register
+
+
+@migration(1, "補上 AP、技能清單與 buff 欄位")
+def _add_action_fields(pet: Dict):
+    pet.setdefault("ap", 6)
+    pet.setdefault("max_ap", 6)
+    # Very old saves stored skills as a string
+    if not isinstance(pet.get("skills"), list):
+        pet["skills"] = []
+    pet.setdefault("buff", None)
+
+
+@migration(2, "加入自然回復的起算時間 regen_at")
+def _start_regen_clock(pet: Dict):
+    # Existing pets start regenerating from the upgrade, not retroactively from their last action
+    pet.setdefault("regen_at", current_minute())
+
+
+@migration(3, "加入遠征紀錄欄位 expedition")
+def _add_expedition(pet: Dict):
+    pet.setdefault("expedition", None)
+
+
+def migrate_record(pet: Dict) -> bool:
+    """把單筆紀錄就地升到 SCHEMA_VERSION，有變更時回傳 True。"""
+    version = pet.get(SCHEMA_KEY, 0)
+    if version >= SCHEMA_VERSION:
+        return False
+    for target, _, step in MIGRATIONS:
+        if target > version:
+            step(pet)
+    pet[SCHEMA_KEY] = SCHEMA_VERSION
+    return True
+
+
+def migrate_all(pets: Dict[str, Dict]) -> List[str]:
+    """逐筆遷移所有紀錄，回傳有變更的 user_id。"""
+    return [user_id for user_id, pet in pets.items() if migrate_record(pet)]
+
+
+if MIGRATIONS[-1][0] != SCHEMA_VERSION:
+    raise RuntimeError("SCHEMA_VERSION 與最後一個遷移步驟不一致")
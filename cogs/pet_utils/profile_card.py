@@ -0,0 +1,260 @@
+"""寵物狀態卡片圖（需要選用套件 Pillow 與一個中文字型）。
+
+把寵物圖片、HP / 飽食 / AP 條、能力值與技能畫成一張 PNG。卡片以「畫面上看得到的狀態」
+的雜湊命名：同樣的狀態只畫一次，之後直接從記憶體 LRU 或磁碟快取取用。
+繪製在背景執行緒進行，不會卡住事件迴圈。
+"""
+import asyncio
+import hashlib
+import io
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+try:
+    from PIL import Image, ImageDraw, ImageFont
+except ImportError:  # Pillow is optional; without it the dashboard stays a text embed
+    Image = ImageDraw = ImageFont = None
+
+RENDER_VERSION = 1  # 版面改變時加一，舊的快取自然失效
+CARD_SIZE = (800, 360)
+SPRITE_SIZE = 300
+CARD_LRU_SIZE = 256      # 記憶體中記住多少張卡片的位置
+MAX_DISK_CARDS = 2000    # 磁碟快取的上限，超過時刪掉最久沒用到的
+PRUNE_EVERY = 100        # 每畫幾張檢查一次磁碟上限
+
+# Fonts that can draw Traditional Chinese, tried in order when PET_CARD_FONT is not set
+FONT_CANDIDATES = (
+    "/usr/share/fonts/opentype/noto/NotoSansCJK-Regular.ttc",
+    "/usr/share/fonts/noto-cjk/NotoSansCJK-Regular.ttc",
+    "/usr/share/fonts/truetype/wqy/wqy-microhei.ttc",
+    "C:/Windows/Fonts/msjh.ttc",
+    "/System/Library/Fonts/PingFang.ttc",
+)
+
+BAR_COLORS = {"hp": (46, 204, 113), "satiety": (230, 126, 34), "ap": (52, 152, 219)}
+TRACK_COLOR = (60, 60, 70)
+TEXT_COLOR = (245, 245, 245)
+MUTED_COLOR = (190, 190, 200)
+
+
+def find_font(configured: Optional[str] = None) -> Optional[str]:
+    for path in ((configured,) if configured else ()) + FONT_CANDIDATES:
+        if path and os.path.exists(path):
+            return path
+    return None
+
+
+def card_state(pet: Dict, meta, sprite_path: Optional[str], exp_next, skill_names: List[str]) -> Dict:
+    """卡片上看得到的所有資訊；只有這些值改變時才需要重畫。skill_names 用不含表情符號的技能名稱。"""
+    stats = pet['stats']
+    sprite_mtime = os.stat(sprite_path).st_mtime_ns if sprite_path else None
+    return {
+        "title": f"{pet.get('nickname') or meta.name}  Lv.{pet['level']}",
+        "subtitle": f"種族: {meta.name}  |  屬性: {meta.element}",
+        "color": meta.color,
+        "sprite": [sprite_path, sprite_mtime],
+        "hp": [stats['hp'], stats['max_hp']],
+        "satiety": [stats.get('satiety', 50), stats.get('max_satiety', 100)],
+        "ap": [pet.get('ap', 0), pet.get('max_ap', 6)],
+        "atk": stats['atk'],
+        "def": stats['def'],
+        "skills": list(skill_names),
+        "exp": f"經驗值: {pet['exp']}/{exp_next}",
+    }
+
+
+def state_hash(state: Dict) -> str:
+    payload = json.dumps([RENDER_VERSION, state], ensure_ascii=False, sort_keys=True)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+class _Fonts:
+    """每種字級只載入一次（truetype 讀檔很慢）。"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._cache: Dict[int, object] = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, size: int):
+        with self._lock:
+            font = self._cache.get(size)
+            if font is None:
+                font = self._cache[size] = ImageFont.truetype(self.path, size)
+            return font
+
+
+class _Sprites:
+    """縮好尺寸的寵物圖片，以 (路徑, mtime) 為鍵；種族不多，全部留在記憶體。"""
+
+    def __init__(self):
+        self._cache: Dict[Tuple, object] = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, path: str, mtime: int):
+        key = (path, mtime)
+        with self._lock:
+            sprite = self._cache.get(key)
+        if sprite is None:
+            with Image.open(path) as source:
+                sprite = source.convert('RGBA')
+            sprite.thumbnail((SPRITE_SIZE, SPRITE_SIZE), Image.LANCZOS)
+            with self._lock:
+                self._cache[key] = sprite
+        return sprite
+
+
+def _shade(color: int, factor: float) -> Tuple[int, int, int]:
+    r, g, b = (color >> 16) & 0xFF, (color >> 8) & 0xFF, color & 0xFF
+    return int(r * factor), int(g * factor), int(b * factor)
+
+
+def _wrap(draw, text: str, font, width: int) -> List[str]:
+    lines, line = [], ""
+    for ch in text:
+        if draw.textlength(line + ch, font=font) > width:
+            lines.append(line)
+            line = ch
+        else:
+            line += ch
+    return lines + [line] if line else lines
+
+
+def render_card(state: Dict, fonts: _Fonts, sprites: _Sprites) -> bytes:
+    """畫出一張卡片並回傳 PNG 位元組。在背景執行緒呼叫。"""
+    width, height = CARD_SIZE
+    card = Image.new('RGB', CARD_SIZE, _shade(state["color"], 0.35))
+    draw = ImageDraw.Draw(card)
+    draw.rounded_rectangle((12, 12, width - 12, height - 12), radius=24, fill=(30, 30, 38))
+
+    sprite_path, sprite_mtime = state["sprite"]
+    if sprite_path:
+        sprite = sprites(sprite_path, sprite_mtime)
+        card.paste(sprite, (30, (height - sprite.height) // 2), sprite)
+
+    x = 30 + SPRITE_SIZE + 30
+    right = width - 40
+    draw.text((x, 28), state["title"], font=fonts(34), fill=TEXT_COLOR)
+    draw.text((x, 74), state["subtitle"], font=fonts(18), fill=MUTED_COLOR)
+
+    y = 110
+    for key, label in (("hp", "HP"), ("satiety", "飽食"), ("ap", "AP")):
+        current, maximum = state[key]
+        draw.text((x, y), label, font=fonts(18), fill=TEXT_COLOR)
+        value = f"{current}/{maximum}"
+        draw.text((right - draw.textlength(value, font=fonts(18)), y), value, font=fonts(18), fill=TEXT_COLOR)
+        bar_top, bar_left, bar_right = y + 26, x, right
+        draw.rounded_rectangle((bar_left, bar_top, bar_right, bar_top + 12), radius=6, fill=TRACK_COLOR)
+        if key == "ap" and maximum:
+            # AP is drawn as discrete pips, like the emoji bar it replaces
+            gap = 6
+            pip = (bar_right - bar_left - gap * (maximum - 1)) / maximum
+            for i in range(min(current, maximum)):
+                left = bar_left + i * (pip + gap)
+                draw.rounded_rectangle((left, bar_top, left + pip, bar_top + 12), radius=6, fill=BAR_COLORS[key])
+        elif maximum:
+            filled = bar_left + (bar_right - bar_left) * max(0, min(current, maximum)) / maximum
+            if filled > bar_left:
+                draw.rounded_rectangle((bar_left, bar_top, filled, bar_top + 12), radius=6, fill=BAR_COLORS[key])
+        y += 50
+
+    draw.text((x, y + 4), f"ATK {state['atk']}    DEF {state['def']}", font=fonts(22), fill=TEXT_COLOR)
+    draw.text((right - draw.textlength(state["exp"], font=fonts(16)), y + 10), state["exp"], font=fonts(16), fill=MUTED_COLOR)
+    skills = "技能: " + ("、".join(state["skills"]) or "無")
+    for i, line in enumerate(_wrap(draw, skills, fonts(16), right - x)[:2]):
+        draw.text((x, y + 40 + i * 22), line, font=fonts(16), fill=MUTED_COLOR)
+
+    buffer = io.BytesIO()
+    card.save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+class ProfileCardRenderer:
+    """產生並快取狀態卡片。render 回傳卡片檔案路徑。
+
+    - 記憶體 LRU：狀態雜湊 -> 檔案路徑，命中時不需要碰磁碟或執行緒。
+    - 磁碟快取：data/cache/pet_cards/<雜湊>.png，重啟後仍可用；超過 MAX_DISK_CARDS 張時刪掉最舊的。
+    - 同一個狀態同時被要求多次時只畫一次。
+    """
+
+    def __init__(self, cache_dir: str, font_path: Optional[str] = None, lru_size: int = CARD_LRU_SIZE):
+        self.cache_dir = cache_dir
+        self.font_path = find_font(font_path)
+        self.lru_size = lru_size
+        self._fonts = _Fonts(self.font_path) if self.font_path and ImageFont else None
+        self._sprites = _Sprites()
+        self._lru: "OrderedDict[str, str]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._writes = 0
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "renders": 0}
+
+    @property
+    def available(self) -> bool:
+        return self._fonts is not None
+
+    def _render_to_disk(self, state: Dict, key: str) -> Tuple[str, bool]:
+        """回傳 (卡片路徑, 是否真的重畫)。在背景執行緒執行。"""
+        path = os.path.join(self.cache_dir, f"{key}.png")
+        if os.path.exists(path):
+            os.utime(path)  # keep recently used cards out of the pruning
+            return path, False
+        data = render_card(state, self._fonts, self._sprites)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        return path, True
+
+    def _prune_disk(self) -> List[str]:
+        """刪掉最舊的卡片直到不超過 MAX_DISK_CARDS，回傳被刪掉的雜湊。在背景執行緒執行。"""
+        try:
+            entries = [e for e in os.scandir(self.cache_dir) if e.name.endswith('.png')]
+        except OSError:
+            return []
+        excess = len(entries) - MAX_DISK_CARDS
+        if excess <= 0:
+            return []
+        entries.sort(key=lambda e: e.stat().st_mtime)
+        removed = []
+        for entry in entries[:excess]:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                continue
+            removed.append(entry.name[:-4])
+        return removed
+
+    async def render(self, state: Dict) -> str:
+        key = state_hash(state)
+        path = self._lru.get(key)
+        if path is not None:
+            self._lru.move_to_end(key)
+            self.stats["memory_hits"] += 1
+            return path
+
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(asyncio.to_thread(self._render_to_disk, state, key))
+            self._inflight[key] = future
+            try:
+                path, rendered = await future
+            finally:
+                del self._inflight[key]
+            self.stats["renders" if rendered else "disk_hits"] += 1
+            if rendered:
+                self._writes += 1
+                if self._writes % PRUNE_EVERY == 0:
+                    # The LRU is only touched on the event loop, so drop the deleted cards here
+                    for removed in await asyncio.to_thread(self._prune_disk):
+                        self._lru.pop(removed, None)
+        else:
+            path, _ = await future
+
+        self._lru[key] = path
+        if len(self._lru) > self.lru_size:
+            self._lru.popitem(last=False)
+        return path
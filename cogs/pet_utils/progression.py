@@ -0,0 +1,72 @@
+from bisect import bisect_right
+from typing import Dict, Iterable, List, Tuple
+
+DEFAULT_GROWTH = {'hp': 5, 'atk': 2, 'def': 1}  # 沒有 growth_rate 的種族使用的成長值
+GROWN_STATS = ('hp', 'atk', 'def')
+
+
+def exp_to_next(level: int) -> int:
+    """從 level 升到下一級需要的經驗值。"""
+    return (level ** 2) * 50
+
+
+class ProgressionTable:
+    """預先算好的等級 / 經驗 / 能力成長表，特訓與對戰獎勵共用。
+
+    - thresholds[L]：從 Lv.1 累積到 Lv.L 需要的總經驗。
+    - 每個種族的 growth[stat][L]：從 Lv.1 升到 Lv.L 累積增加的能力值。
+    任何經驗增加都換算成「總經驗」後二分搜尋出新等級，能力值只需查表相減，
+    不論一次跳幾級都不用逐級迴圈。
+    """
+
+    def __init__(self, pet_types: Iterable, max_level: int):
+        self.max_level = max_level
+        self.thresholds: List[int] = [0] * (max_level + 1)
+        for level in range(1, max_level):
+            self.thresholds[level + 1] = self.thresholds[level] + exp_to_next(level)
+        self.growth: Dict[str, Dict[str, List[int]]] = {
+            pet_type.key: self._growth_table(pet_type.growth)
+            for pet_type in pet_types
+        }
+        self._default_growth = self._growth_table(DEFAULT_GROWTH)
+
+    def _growth_table(self, rate) -> Dict[str, List[int]]:
+        return {
+            stat: [0] + [(level - 1) * rate[stat] for level in range(1, self.max_level + 1)]
+            for stat in GROWN_STATS
+        }
+
+    def resolve(self, level: int, exp: int, gain: int) -> Tuple[int, int]:
+        """回傳獲得 gain 經驗後的 (等級, 本級經驗)。滿級時經驗停在該級上限。"""
+        total = self.thresholds[level] + exp + gain
+        new_level = min(bisect_right(self.thresholds, total) - 1, self.max_level)
+        new_exp = total - self.thresholds[new_level]
+        if new_level >= self.max_level:
+            new_exp = min(new_exp, exp_to_next(self.max_level))
+        return new_level, new_exp
+
+    def apply_exp(self, pet: Dict, gain: int) -> int:
+        """把經驗加到寵物身上並套用升級效果（能力成長、補滿 HP 與 AP），回傳升了幾級。"""
+        old_level = pet['level']
+        new_level, pet['exp'] = self.resolve(old_level, pet['exp'], gain)
+        if new_level == old_level:
+            return 0
+
+        self.grow(pet, new_level)
+        pet['stats']['hp'] = pet['stats']['max_hp']  # Full heal on level up
+        pet['ap'] = pet.get('max_ap', 6)  # Restore AP on level up
+        return new_level - old_level
+
+    def growth_between(self, type_id: str, stat: str, old_level: int, new_level: int) -> int:
+        """從 old_level 升到 new_level 時 stat 增加的量。"""
+        column = self.growth.get(type_id, self._default_growth)[stat]
+        return column[new_level] - column[old_level]
+
+    def grow(self, pet: Dict, new_level: int):
+        """把寵物的等級設為 new_level 並加上對應的能力成長（不補 HP / AP）。"""
+        old_level = pet['level']
+        stats = pet['stats']
+        stats['max_hp'] += self.growth_between(pet['type'], 'hp', old_level, new_level)
+        stats['atk'] += self.growth_between(pet['type'], 'atk', old_level, new_level)
+        stats['def'] += self.growth_between(pet['type'], 'def', old_level, new_level)
+        pet['level'] = new_level
@@ -0,0 +1,53 @@
+"""寵物戰力排行榜：依等級排序，同等級再比戰力（atk / def / max_hp 的加權和）。
+
+排名分數 = 等級 * POWER_SCALE + 戰力，直接放進積分排行榜用的 RankedIndex，
+更新、查名次與翻頁都是 O(log n)，不需要掃描 pet.json。
+"""
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from ..points_utils.leaderboard import RankedIndex
+
+POWER_WEIGHTS = (("atk", 4), ("def", 3), ("max_hp", 1))
+POWER_SCALE = 10_000_000  # 戰力遠小於這個值，所以等級永遠優先
+
+
+def power_score(pet: Dict) -> int:
+    stats = pet['stats']
+    return sum(stats.get(stat, 0) * weight for stat, weight in POWER_WEIGHTS)
+
+
+def rank_score(pet: Dict) -> int:
+    return pet['level'] * POWER_SCALE + power_score(pet)
+
+
+def split_score(score: int) -> Tuple[int, int]:
+    """把排名分數拆回 (等級, 戰力)。"""
+    return divmod(score, POWER_SCALE)
+
+
+class PetRanking:
+    """以 user_id 為鍵的戰力排名。只收錄 pet.json 裡的寵物；封存的寵物在主人回來時才重新加入。"""
+
+    def __init__(self, pets: Iterable[Tuple[str, Dict]] = ()):
+        self._index = RankedIndex((int(user_id), rank_score(pet)) for user_id, pet in pets)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, user_id: int) -> bool:
+        return int(user_id) in self._index
+
+    def update(self, user_id, pet: Dict):
+        """寵物資料變更後呼叫；分數沒變時不做任何事。"""
+        self._index.set(int(user_id), rank_score(pet))
+
+    def discard(self, user_ids: Iterable):
+        for user_id in user_ids:
+            self._index.discard(int(user_id))
+
+    def rank(self, user_id) -> Optional[int]:
+        return self._index.rank(int(user_id))
+
+    def page(self, start: int, count: int) -> List[Tuple[int, int, int]]:
+        """取第 start 名（0 起算）開始的 count 筆 (user_id, 等級, 戰力)。"""
+        return [(user_id, *split_score(score)) for user_id, score in self._index.top(start, count)]
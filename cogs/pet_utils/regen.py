@@ -0,0 +1,64 @@
+"""寵物隨時間自然變化：飽食度下降，吃飽時 AP / HP 慢慢回復。
+
+規則以「每分鐘一跳」定義（分鐘以 Unix 時間的整分鐘計算）：
+    1. 分鐘數是 SATIETY_DECAY_MINUTES 的倍數時，飽食度 -1（最低 0）
+    2. 扣完之後飽食度仍大於 0 才算吃飽；吃飽時
+       - 分鐘數是 AP_REGEN_MINUTES 的倍數，AP +1（不超過 max_ap）
+       - 分鐘數是 HP_REGEN_MINUTES 的倍數，HP +1（不超過 max_hp）
+
+沒有任何排程逐一更新寵物；settle 在讀取寵物時以封閉公式一次算完從 regen_at 到現在的所有分鐘，
+結果與逐分鐘模擬完全相同，成本與經過時間和寵物數量都無關。
+"""
+import time
+from typing import Dict, Optional
+
+SATIETY_DECAY_MINUTES = 15  # 100 飽食度約 25 小時吃光
+AP_REGEN_MINUTES = 20       # 6 AP 約 2 小時回滿
+HP_REGEN_MINUTES = 2        # 每小時回 30 HP
+
+
+def current_minute(now: Optional[float] = None) -> int:
+    return int((time.time() if now is None else now) // 60)
+
+
+def _ticks(start: int, end: int, period: int) -> int:
+    """(start, end] 之間 period 的倍數有幾個。"""
+    return max(0, end // period - start // period)
+
+
+def _regen(value: int, cap: int, gained: int) -> int:
+    # A tick only ever raises a value that is below the cap; it never pulls an over-cap value down
+    return min(cap, value + gained) if value < cap else value
+
+
+def settle(pet: Dict, now: Optional[float] = None) -> bool:
+    """把 pet 結算到目前這一分鐘（就地修改），數值有變化時回傳 True。"""
+    start = pet.get("regen_at")
+    end = current_minute(now)
+    if start is None:
+        pet["regen_at"] = end
+        return False
+    if end <= start:
+        return False
+    pet["regen_at"] = end
+    stats = pet["stats"]
+    satiety = stats.get("satiety", 0)
+
+    # Last minute the pet was still fed: the minute before the decay that empties it
+    decays = _ticks(start, end, SATIETY_DECAY_MINUTES)
+    if satiety <= 0:
+        fed_until = start
+    elif decays >= satiety:
+        fed_until = (start // SATIETY_DECAY_MINUTES + satiety) * SATIETY_DECAY_MINUTES - 1
+    else:
+        fed_until = end
+
+    new_satiety = max(0, satiety - decays)
+    new_ap = _regen(pet.get("ap", 0), pet.get("max_ap", 6), _ticks(start, fed_until, AP_REGEN_MINUTES))
+    new_hp = _regen(stats["hp"], stats["max_hp"], _ticks(start, fed_until, HP_REGEN_MINUTES))
+
+    changed = (new_satiety, new_ap, new_hp) != (satiety, pet.get("ap", 0), stats["hp"])
+    stats["satiety"] = new_satiety
+    pet["ap"] = new_ap
+    stats["hp"] = new_hp
+    return changed
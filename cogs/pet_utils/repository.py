@@ -0,0 +1,213 @@
+import asyncio
+import copy
+import json
+import os
+import time
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from ..storage_utils.cold_archive import ColdArchive, select_inactive
+from .migrations import SCHEMA_VERSION, migrate_all, migrate_record
+
+COMPACT_MIN_RECORDS = 5000  # 變更日誌至少累積這麼多筆（且超過寵物總數）才合併回 pet.json
+
+
+class PetRepository:
+    """pet.json 的記憶體資料庫：啟動時載入一次，之後所有讀寫都在記憶體完成。
+
+    - get 回傳的是「活的」寵物紀錄，修改後呼叫 mark_dirty（或 put）標記需要寫回。
+    - flush 只把有變更的紀錄追加到變更日誌 pet.json.log（在背景執行緒寫入），同一段時間內的多次修改只寫一次。
+      日誌累積的筆數超過寵物總數時，才在背景執行緒把 pet.json 與日誌合併成新的 pet.json 並清空日誌。
+    - get 只查記憶體；已封存到冷資料區的寵物要用 fetch 取回，寫回 pet.json 之後才從封存區移除。
+    - 載入時一次把所有舊版紀錄遷移到目前的結構版本（見 migrations.py），get 不再做任何遷移檢查。
+    所有方法都在事件迴圈上呼叫；寫檔與冷資料區的讀寫（gzip）丟到背景執行緒，
+    並由 _archive_lock 保證同一時間只有一個執行緒在使用冷資料區。
+    """
+
+    def __init__(self, path: str, archive: ColdArchive):
+        self.path = path
+        self.archive = archive
+        self.log_path = path + '.log'
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        file_version, self._pets = self._read(self.path)
+        self._log_records = self._replay_log(self._pets, self.log_path, repair=True)
+        self._dirty: Set[str] = set()
+        if file_version < SCHEMA_VERSION:
+            # One pass at startup; the migrated records reach the log on the first flush,
+            # and the compaction right after it rewrites pet.json with the new stamp
+            migrated = migrate_all(self._pets)
+            self._dirty.update(migrated)
+            self._needs_compact = True
+            print(f"寵物資料結構 v{file_version} → v{SCHEMA_VERSION}：已遷移 {len(migrated)} 筆紀錄。")
+        else:
+            self._needs_compact = False
+        # Pets pulled back from the archive; they leave the archive index once pet.json includes them
+        self._rehydrated: Set[str] = set()
+        self._flush_lock = asyncio.Lock()
+        self._archive_lock = asyncio.Lock()
+
+    @staticmethod
+    def _read(path: str) -> Tuple[int, Dict[str, Dict]]:
+        """回傳 (檔案的結構版本, 紀錄)。舊版 pet.json 是純 {user_id: 寵物}，視為版本 0。"""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (json.JSONDecodeError, IOError):
+            return SCHEMA_VERSION, {}
+        if isinstance(data.get("pets"), dict) and "schema_version" in data:
+            return data["schema_version"], data["pets"]
+        return 0, data
+
+    @staticmethod
+    def _replay_log(pets: Dict[str, Dict], log_path: str, repair: bool = False) -> int:
+        """把變更日誌套用到 pets（同一隻寵物以最後一筆為準，null 代表已移出），回傳套用的筆數。
+
+        遇到寫到一半的行就停止；repair=True 時順便截掉它，之後追加的紀錄才不會接在殘行後面。
+        """
+        count = good_end = 0
+        try:
+            with open(log_path, 'rb') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                        user_id, pet = record["u"], record["p"]
+                    except (ValueError, KeyError, TypeError):
+                        break
+                    if pet is None:
+                        pets.pop(user_id, None)
+                    else:
+                        # Lines logged before an upgrade may still be on an older schema
+                        migrate_record(pet)
+                        pets[user_id] = pet
+                    count += 1
+                    good_end += len(line)
+        except FileNotFoundError:
+            return 0
+        if repair and good_end < os.path.getsize(log_path):
+            print(f"寵物變更日誌 {log_path} 結尾不完整，已截掉 {os.path.getsize(log_path) - good_end} bytes。")
+            os.truncate(log_path, good_end)
+        return count
+
+    def __len__(self) -> int:
+        return len(self._pets)
+
+    # --- Records ---
+    def get(self, user_id) -> Optional[Dict]:
+        """只查記憶體中的熱資料，不會碰冷資料區。"""
+        return self._pets.get(str(user_id))
+
+    async def fetch(self, user_id) -> Optional[Dict]:
+        """同 get，但寵物在冷資料區時會在背景執行緒解壓取回。"""
+        user_id = str(user_id)
+        pet = self._pets.get(user_id)
+        if pet is not None or user_id not in self.archive:
+            return pet
+        async with self._archive_lock:
+            if user_id in self._pets:
+                # Another command brought it back while this one waited
+                return self._pets[user_id]
+            pet = await asyncio.to_thread(self.archive.load, user_id)
+            if pet is not None:
+                # Coming back counts as activity, otherwise the next sweep would archive it again
+                pet["last_interaction"] = time.time()
+                # Archived records may predate the current schema
+                migrate_record(pet)
+                self._pets[user_id] = pet
+                self._rehydrated.add(user_id)
+                self._dirty.add(user_id)
+        return pet
+
+    def put(self, user_id, pet: Dict):
+        user_id = str(user_id)
+        self._pets[user_id] = pet
+        self._dirty.add(user_id)
+
+    def mark_dirty(self, user_id):
+        self._dirty.add(str(user_id))
+
+    def items(self) -> Iterator[Tuple[str, Dict]]:
+        return iter(list(self._pets.items()))
+
+    @property
+    def dirty_count(self) -> int:
+        return len(self._dirty)
+
+    # --- Write-back ---
+    def _snapshot(self) -> Tuple[str, List[str], List[str]]:
+        # Only the dirty records are encoded, on the event loop so no coroutine can mutate one halfway through
+        batch, self._dirty = list(self._dirty), set()
+        rehydrated, self._rehydrated = list(self._rehydrated), set()
+        payload = "".join(
+            json.dumps({"u": uid, "p": self._pets.get(uid)}, ensure_ascii=False, separators=(',', ':')) + '\n'
+            for uid in batch
+        )
+        return payload, batch, rehydrated
+
+    def _append(self, payload: str):
+        with open(self.log_path, 'a', encoding='utf-8') as f:
+            f.write(payload)
+
+    def _compact(self):
+        """在背景執行緒把 pet.json 與變更日誌合併成新的 pet.json，再清空日誌。只讀檔案，不碰記憶體中的紀錄。"""
+        _, pets = self._read(self.path)
+        self._replay_log(pets, self.log_path)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"schema_version": SCHEMA_VERSION, "pets": pets}, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp_path, self.path)
+        # A crash before this line only means the same records get replayed once more
+        os.truncate(self.log_path, 0)
+
+    async def flush(self):
+        """把有變更的紀錄追加到變更日誌，必要時再合併回 pet.json；沒有變更時不做任何 I/O。"""
+        async with self._flush_lock:
+            if not self._dirty and not self._needs_compact:
+                return
+            payload, batch, rehydrated = self._snapshot()
+            try:
+                if payload:
+                    await asyncio.to_thread(self._append, payload)
+            except OSError as e:
+                print(f"寫入寵物資料時發生錯誤: {e}")
+                # Keep them pending so the next tick retries
+                self._dirty.update(batch)
+                self._rehydrated.update(rehydrated)
+                return
+            self._log_records += len(batch)
+            if rehydrated:
+                async with self._archive_lock:
+                    await asyncio.to_thread(self.archive.discard, rehydrated)
+            if self._needs_compact or self._log_records >= max(COMPACT_MIN_RECORDS, len(self._pets)):
+                try:
+                    await asyncio.to_thread(self._compact)
+                except OSError as e:
+                    print(f"合併寵物變更日誌時發生錯誤: {e}")
+                    self._needs_compact = True
+                    return
+                self._log_records = 0
+                self._needs_compact = False
+
+    # --- Tiering ---
+    async def archive_inactive(self, cutoff: float) -> List[str]:
+        """把 last_interaction 早於 cutoff 的寵物搬到冷資料區，回傳被封存的 user_id。"""
+        inactive = [
+            uid for uid in select_inactive(self._pets, lambda pet: pet.get("last_interaction"), cutoff)
+            if uid not in self._rehydrated
+        ]
+        if not inactive:
+            return []
+        # Archive first, then drop from the hot file: a crash in between leaves a harmless duplicate.
+        # The worker thread gets copies, since commands keep mutating the live records meanwhile
+        records = {uid: copy.deepcopy(self._pets[uid]) for uid in inactive}
+        async with self._archive_lock:
+            await asyncio.to_thread(self.archive.archive, records)
+        current = {uid: self._pets[uid] for uid in inactive if uid in self._pets}
+        archived = select_inactive(current, lambda pet: pet.get("last_interaction"), cutoff)
+        for uid in archived:
+            del self._pets[uid]
+            self._dirty.add(uid)
+        # Touched while the segment was written: stays hot, its archived copy goes on the next flush
+        revived = set(current).difference(archived)
+        self._rehydrated.update(revived)
+        self._dirty.update(revived)
+        await self.flush()
+        return archived
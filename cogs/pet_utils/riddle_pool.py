@@ -0,0 +1,122 @@
+import asyncio
+import json
+import os
+import time
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional
+
+POOL_TARGET = 8         # 每個種族預先準備的謎語數量
+POOL_LOW_WATER = 3      # 低於這個數量就在背景補貨
+RETRY_AFTER_SECONDS = 300  # 生成失敗後多久才再試，避免 AI 故障時一直打 API
+
+PROMPT = """
+你是嘎蛙世界的守護者。有一顆寵物蛋孕育著「{element}」屬性的寵物（{name}）。
+請為這顆蛋寫 {count} 句彼此不同的「神秘的描述/謎語」，暗示它的屬性，但絕對「不要」直接說出屬性名稱或寵物名字。
+讓玩家產生好奇心去選擇。
+
+請嚴格依照 JSON 陣列格式回傳，例如：["描述1", "描述2"]
+不要 Markdown，只要純 JSON。
+"""
+
+
+def parse_riddles(text: str) -> List[str]:
+    """解析 AI 回傳的 JSON 陣列；格式不對時回傳空清單。"""
+    # Clean possible markdown ```json ... ```
+    clean = text.replace("```json", "").replace("```", "").strip()
+    try:
+        data = json.loads(clean)
+    except json.JSONDecodeError:
+        return []
+    if not isinstance(data, list):
+        return []
+    return [item.strip() for item in data if isinstance(item, str) and item.strip()]
+
+
+class RiddlePool:
+    """預先生成的蛋謎語庫：每個種族保留 POOL_TARGET 句，!adopt 直接從庫存取用。
+
+    - take 取出一句並在庫存低於 POOL_LOW_WATER 時排一個背景補貨工作，不等待 AI。
+    - 庫存是空的才在當下呼叫 AI（take_or_generate）。
+    - 庫存寫在 data/riddle_pool.json，重啟後沿用。
+    所有方法都在事件迴圈上呼叫；同一個種族同時只會有一個補貨工作。
+    """
+
+    def __init__(self, path: str, generate: Optional[Callable[[str], Awaitable[str]]]):
+        self.path = path
+        # None when the AI model is not configured: the pool then stays empty and callers use fallbacks
+        self.generate = generate
+        self._pool: Dict[str, List[str]] = self._load()
+        self._refills: Dict[str, asyncio.Task] = {}
+        self._failed_at: Dict[str, float] = {}
+
+    def _load(self) -> Dict[str, List[str]]:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (json.JSONDecodeError, IOError):
+            return {}
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._pool, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def stock(self, key: str) -> int:
+        return len(self._pool.get(key, []))
+
+    # --- Refill ---
+    async def _generate(self, pet_type, count: int) -> List[str]:
+        text = await self.generate(PROMPT.format(element=pet_type.element, name=pet_type.name, count=count))
+        return parse_riddles(text)
+
+    async def _refill(self, pet_type):
+        missing = POOL_TARGET - self.stock(pet_type.key)
+        if missing <= 0:
+            return
+        riddles = await self._generate(pet_type, missing)
+        if not riddles:
+            self._failed_at[pet_type.key] = time.monotonic()
+            return
+        pool = self._pool.setdefault(pet_type.key, [])
+        pool.extend(r for r in riddles[:missing] if r not in pool)
+        self._save()
+
+    def schedule_refill(self, pet_type):
+        """庫存不足時在背景補貨；已經在補、或剛失敗不久時不重複排程。"""
+        if not self.generate or self.stock(pet_type.key) >= POOL_LOW_WATER:
+            return
+        running = self._refills.get(pet_type.key)
+        if running and not running.done():
+            return
+        failed_at = self._failed_at.get(pet_type.key)
+        if failed_at and time.monotonic() - failed_at < RETRY_AFTER_SECONDS:
+            return
+        self._refills[pet_type.key] = asyncio.create_task(self._refill(pet_type))
+
+    def warm_up(self, pet_types: Iterable):
+        """啟動時為每個種族補滿庫存。"""
+        for pet_type in pet_types:
+            self.schedule_refill(pet_type)
+
+    async def close(self):
+        for task in self._refills.values():
+            task.cancel()
+
+    # --- Take ---
+    def take(self, pet_type) -> Optional[str]:
+        """取出一句謎語（沒有庫存時回傳 None），並視需要在背景補貨。"""
+        pool = self._pool.get(pet_type.key)
+        riddle = pool.pop(0) if pool else None
+        if riddle is not None:
+            self._save()
+        self.schedule_refill(pet_type)
+        return riddle
+
+    async def take_or_generate(self, pet_type) -> Optional[str]:
+        """優先用庫存；庫存是空的才當場呼叫 AI。AI 也失敗時回傳 None。"""
+        riddle = self.take(pet_type)
+        if riddle is not None or not self.generate:
+            return riddle
+        riddles = await self._generate(pet_type, 1)
+        return riddles[0] if riddles else None
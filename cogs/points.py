@@ -1,72 +1,462 @@
 import discord
-from discord.ext import commands
-import os
+from discord.ext import commands, tasks
+import asyncio
+import contextlib
 import json
-from typing import Dict
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+
+from .points_utils.backends import create_backend
+from .points_utils.journal import PointsEntry
+from .points_utils.ledger import Escrow, PointsLedger
+from .storage_utils.cold_archive import TIERING_INTERVAL_HOURS, archive_cutoff
+
+# --- Storage Backend Selection ---
+try:
+    import config
+    POINTS_BACKEND = getattr(config, "POINTS_BACKEND", None)
+except ImportError:
+    POINTS_BACKEND = None
+
+# 未設定時沿用 points.json；"sqlite" 改用 data/points.db，"mmap" 改用 data/points.bin（首次啟動自動匯入舊 JSON）
+if not POINTS_BACKEND:
+    POINTS_BACKEND = os.getenv("POINTS_BACKEND", "json")
 
 # --- Absolute Path Definition ---
 COG_DIR = os.path.dirname(os.path.abspath(__file__))
 PROJECT_ROOT = os.path.dirname(COG_DIR)
-POINTS_FILE_PATH = os.path.join(PROJECT_ROOT, 'data', 'points.json')
+DATA_DIR = os.path.join(PROJECT_ROOT, 'data')
+GUILD_DATA_DIR = os.path.join(DATA_DIR, 'guilds')  # 各伺服器獨立經濟體的分片：data/guilds/<guild_id>/
+ECONOMY_MODES_FILE = os.path.join(DATA_DIR, 'economy_modes.json')
+SHARD_IDLE_SECONDS = 600  # 伺服器分片閒置多久後從記憶體卸載
+FLUSH_INTERVAL_SECONDS = 1.0  # 寫回磁碟的最短間隔（合併這段期間內的所有變更）
+HISTORY_PAGE_SIZE = 10
+LOCK_SHARDS = 256  # 每位使用者對應到其中一把鎖；不同使用者幾乎不會搶同一把
+LEADERBOARD_PAGE_SIZE = 10
+
+# 積分異動來源 -> 顯示名稱
+SOURCE_LABELS = {
+    "slots": "🎰 拉霸機",
+    "blackjack": "🃏 二十一點",
+    "poker": "♠️ 德州撲克",
+    "checkin": "📅 每日簽到",
+    "guess_number": "🔢 猜數字",
+    "pet_shop": "🍱 寵物商店",
+    "expedition": "🧭 嘎蛙遠征",
+    "market": "🏪 玩家市集",
+    "transfer": "🤝 轉帳",
+    "system": "⚙️ 系統",
+}
+
+# !economy 的統計區間 -> (時間序列解析度, 格數, 顯示名稱)
+ECONOMY_WINDOWS = {
+    "1h": ("minute", 60, "最近 1 小時"),
+    "24h": ("hour", 24, "最近 24 小時"),
+    "7d": ("day", 7, "最近 7 天"),
+    "30d": ("day", 30, "最近 30 天"),
+}
+
+class LeaderboardView(discord.ui.View):
+    """排行榜的上一頁 / 下一頁按鈕。"""
+    def __init__(self, cog: "PointsCog", owner_id: int, page: int, guild_id: Optional[int]):
+        super().__init__(timeout=120)
+        self.cog = cog
+        self.owner_id = owner_id
+        self.guild_id = guild_id
+        self.page = max(1, page)
+        self.message: Optional[discord.Message] = None
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        if interaction.user.id != self.owner_id:
+            await interaction.response.send_message("請自己輸入 `!leaderboard` 來翻頁喔！", ephemeral=True)
+            return False
+        return True
+
+    async def _show(self, interaction: discord.Interaction, page: int):
+        total_pages = max(1, -(-len(self.cog.get_ledger(self.guild_id).leaderboard) // LEADERBOARD_PAGE_SIZE))
+        self.page = min(max(1, page), total_pages)
+        await interaction.response.edit_message(embed=self.cog.build_leaderboard_embed(self.page, self.guild_id), view=self)
+
+    @discord.ui.button(label="上一頁", style=discord.ButtonStyle.secondary, emoji="◀️")
+    async def prev_btn(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self._show(interaction, self.page - 1)
+
+    @discord.ui.button(label="下一頁", style=discord.ButtonStyle.secondary, emoji="▶️")
+    async def next_btn(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self._show(interaction, self.page + 1)
+
+    async def on_timeout(self):
+        for item in self.children:
+            item.disabled = True
+        if self.message:
+            try:
+                await self.message.edit(view=self)
+            except discord.NotFound:
+                pass
 
 class PointsCog(commands.Cog, name="Points"): # Assign a public name for easy access
-    """一個集中管理所有使用者積分的 Cog。"""
+    """一個集中管理所有使用者積分的 Cog。
+
+    預設所有伺服器共用一個全域經濟體；管理員可用 `!economymode guild` 讓該伺服器改用
+    獨立分片（data/guilds/<guild_id>/）。分片在第一次存取時才載入，閒置一段時間後卸載。
+    公開 API 都接受選填的 guild_id，沒給（例如私訊）時一律使用全域經濟體。
+    """
 
     def __init__(self, bot: commands.Bot):
         self.bot = bot
-        self.points_path = POINTS_FILE_PATH
         self.STARTING_POINTS = 0
-        # Ensure the data file and directory exist at startup
-        self._ensure_data_file_exists()
-
-    # --- Private I/O Methods ---
-    def _ensure_data_file_exists(self):
-        """確保 data 資料夾與 points.json 檔案存在。"""
-        os.makedirs(os.path.dirname(self.points_path), exist_ok=True)
-        if not os.path.exists(self.points_path):
-            with open(self.points_path, 'w', encoding='utf-8') as f:
-                json.dump({}, f)
-
-    def _load_points(self) -> Dict[str, int]:
-        """從 points.json 讀取所有積分資料。"""
+        self.global_ledger = self._open_ledger(DATA_DIR)
+        self._guild_ledgers: Dict[int, PointsLedger] = {}
+        self.economy_modes: Dict[str, str] = self._load_economy_modes()
+        self._locks = [asyncio.Lock() for _ in range(LOCK_SHARDS)]
+
+    async def cog_load(self):
+        self.flush_loop.start()
+        self.tiering_loop.start()
+
+    async def cog_unload(self):
+        # Stop the periodic tasks, then make sure nothing is left unsaved on shutdown/reload
+        self.flush_loop.cancel()
+        self.tiering_loop.cancel()
+        for ledger in [self.global_ledger, *self._guild_ledgers.values()]:
+            await ledger.close()
+        self._guild_ledgers.clear()
+
+    # --- Economy Partitioning ---
+    def _load_economy_modes(self) -> Dict[str, str]:
         try:
-            with open(self.points_path, 'r', encoding='utf-8') as f:
+            with open(ECONOMY_MODES_FILE, 'r', encoding='utf-8') as f:
                 return json.load(f)
         except (json.JSONDecodeError, IOError):
             return {}
 
-    def _save_points(self, all_points: Dict[str, int]):
-        """將所有積分資料寫回 points.json。"""
-        try:
-            with open(self.points_path, 'w', encoding='utf-8') as f:
-                json.dump(all_points, f, indent=4)
-        except IOError as e:
-            # In a real-world scenario, you might want to log this error
-            print(f"寫入積分檔案時發生錯誤: {e}")
+    def _save_economy_modes(self):
+        os.makedirs(os.path.dirname(ECONOMY_MODES_FILE), exist_ok=True)
+        with open(ECONOMY_MODES_FILE, 'w', encoding='utf-8') as f:
+            json.dump(self.economy_modes, f, indent=2)
+
+    def _open_ledger(self, data_dir: str) -> PointsLedger:
+        backend = create_backend(POINTS_BACKEND, data_dir, self.STARTING_POINTS)
+        return PointsLedger(backend, self.STARTING_POINTS, stats_path=os.path.join(data_dir, 'economy_stats.json'))
+
+    def get_ledger(self, guild_id: Optional[int] = None) -> PointsLedger:
+        """取得某伺服器使用的帳本；獨立經濟的伺服器會在第一次存取時載入分片。"""
+        if guild_id is None or self.economy_modes.get(str(guild_id)) != 'guild':
+            return self.global_ledger
+        ledger = self._guild_ledgers.get(guild_id)
+        if ledger is None:
+            ledger = self._open_ledger(os.path.join(GUILD_DATA_DIR, str(guild_id)))
+            self._guild_ledgers[guild_id] = ledger
+        # Any access keeps the shard loaded; calls that await also hold ledger.in_use()
+        ledger.last_used = time.monotonic()
+        return ledger
+
+    async def _evict_idle_shards(self):
+        now = time.monotonic()
+        for guild_id, ledger in list(self._guild_ledgers.items()):
+            if now - ledger.last_used >= SHARD_IDLE_SECONDS and ledger.is_idle:
+                del self._guild_ledgers[guild_id]
+                await ledger.close()
+
+    # --- Write-back Flush ---
+    async def flush(self) -> bool:
+        """將所有已載入帳本的累積異動寫回各自的後端，全部成功時回傳 True。"""
+        ok = True
+        for ledger in [self.global_ledger, *self._guild_ledgers.values()]:
+            ok = await ledger.flush() and ok
+        return ok
+
+    @tasks.loop(seconds=FLUSH_INTERVAL_SECONDS)
+    async def flush_loop(self):
+        await self.flush()
+        await self._evict_idle_shards()
+
+    @tasks.loop(hours=TIERING_INTERVAL_HOURS)
+    async def tiering_loop(self):
+        """把長期不活躍的使用者搬到冷資料區；之後再被存取時會自動取回。"""
+        cutoff = archive_cutoff()
+        if cutoff is None:
+            return
+        for ledger in [self.global_ledger, *self._guild_ledgers.values()]:
+            with ledger.in_use():
+                archived = await ledger.archive_inactive(cutoff)
+            if archived:
+                print(f"已封存 {archived} 位不活躍使用者的積分資料。")
+
+    def _lock_index(self, user_id: int, ledger: PointsLedger) -> int:
+        return hash((id(ledger), int(user_id))) % LOCK_SHARDS
+
+    def _user_lock(self, user_id: int, ledger: PointsLedger) -> asyncio.Lock:
+        return self._locks[self._lock_index(user_id, ledger)]
 
     # --- Public API for other Cogs ---
-    def get_points(self, user_id: int) -> int:
-        """給其他 Cog 使用的公開方法，用於安全地獲取單一使用者的積分。"""
-        all_points = self._load_points()
-        return all_points.get(str(user_id), self.STARTING_POINTS)
-
-    def update_points(self, user_id: int, amount: int) -> int:
-        """給其他 Cog 使用的公開方法，用於更新單一使用者的積分（可為負數）。"""
-        user_id_str = str(user_id)
-        all_points = self._load_points()
-        current_points = all_points.get(user_id_str, self.STARTING_POINTS)
-        new_points = current_points + amount
-        all_points[user_id_str] = new_points
-        self._save_points(all_points)
-        return new_points
+    def get_points(self, user_id: int, guild_id: Optional[int] = None) -> int:
+        """給其他 Cog 使用的公開方法，用於安全地獲取單一使用者的可用積分（已扣除圈存中的賭注）。
+
+        這是同步讀取：快取未命中時會直接向後端讀取並卡住事件迴圈。在 async 程式碼中請改用 fetch_points。
+        """
+        return self.get_ledger(guild_id).available(user_id)
+
+    async def fetch_points(self, user_id: int, guild_id: Optional[int] = None) -> int:
+        """與 get_points 相同，但快取未命中時在背景執行緒讀取後端。"""
+        ledger = self.get_ledger(guild_id)
+        with ledger.in_use():
+            await ledger.ensure_cached(user_id)
+            return ledger.available(user_id)
+
+    def update_points(self, user_id: int, amount: int, source: str = "system", guild_id: Optional[int] = None) -> int:
+        """給其他 Cog 使用的公開方法，用於更新單一使用者的積分（可為負數）。
+
+        source 標記這筆異動來自哪個功能（見 SOURCE_LABELS），會寫進交易日誌。
+        """
+        return self.get_ledger(guild_id).add(user_id, amount, source)
+
+    def update_points_many(self, deltas: Dict[int, int], source: str = "system", guild_id: Optional[int] = None,
+                           ts: Optional[float] = None) -> Dict[int, int]:
+        """一次更新多位使用者的積分，回傳 {user_id: 新積分}。
+
+        所有變動在同一個同步區塊內完成，並會落在同一批寫回（SQLite 為同一個交易），
+        多人遊戲結算請用這個方法，而不是逐一呼叫 update_points。
+        ts 讓呼叫端指定紀錄時間（市集重播時用它辨認哪些紀錄已經寫進帳本），預設為現在。
+        """
+        ledger = self.get_ledger(guild_id)
+        now = ts or time.time()
+        return {
+            user_id: ledger.add(user_id, amount, source, now) if amount else ledger.available(user_id)
+            for user_id, amount in deltas.items()
+        }
+
+    async def reserve(self, user_id: int, amount: int, source: str = "system", guild_id: Optional[int] = None) -> Optional[Escrow]:
+        """檢查並圈存 amount 積分，餘額不足時回傳 None。
+
+        檢查與圈存在同一把使用者鎖內完成，連點兩次也不會重複花費同一筆積分；
+        圈存本身不寫入儲存，之後呼叫 Escrow.commit(payout) 才寫入一筆淨變動。
+        """
+        if amount < 0:
+            raise ValueError("圈存金額不能是負數")
+        ledger = self.get_ledger(guild_id)
+        with ledger.in_use():
+            async with self._user_lock(user_id, ledger):
+                await ledger.ensure_cached(user_id)
+                return ledger.hold(user_id, amount, source)
+
+    async def try_debit(self, user_id: int, amount: int, source: str = "system", guild_id: Optional[int] = None) -> Optional[int]:
+        """餘額足夠時直接扣款並回傳新積分，不足時回傳 None（不做任何變動）。"""
+        if amount < 0:
+            raise ValueError("扣款金額不能是負數")
+        ledger = self.get_ledger(guild_id)
+        with ledger.in_use():
+            async with self._user_lock(user_id, ledger):
+                await ledger.ensure_cached(user_id)
+                if ledger.available(user_id) < amount:
+                    return None
+                return ledger.add(user_id, -amount, source)
+
+    async def transfer(self, src_id: int, dst_id: int, amount: int, guild_id: Optional[int] = None) -> Optional[Tuple[int, int]]:
+        """從 src 轉 amount 積分給 dst，回傳 (src 新積分, dst 新積分)；餘額不足時回傳 None。
+
+        兩人的鎖一律依鎖編號由小到大取得，任何兩筆轉帳都以相同順序上鎖，不會互相死結；
+        不相干的使用者落在不同的鎖上，可以同時進行。兩筆異動在同一個同步區塊內寫入，
+        會落在同一批寫回，不會只成功一半。
+        """
+        if amount <= 0:
+            raise ValueError("轉帳金額必須是正數")
+        if src_id == dst_id:
+            raise ValueError("不能轉帳給自己")
+        ledger = self.get_ledger(guild_id)
+        lock_ids = sorted({self._lock_index(src_id, ledger), self._lock_index(dst_id, ledger)})
+        async with contextlib.AsyncExitStack() as stack:
+            stack.enter_context(ledger.in_use())
+            for lock_id in lock_ids:
+                await stack.enter_async_context(self._locks[lock_id])
+            await ledger.ensure_cached(src_id)
+            await ledger.ensure_cached(dst_id)
+            if ledger.available(src_id) < amount:
+                return None
+            now = time.time()
+            return ledger.add(src_id, -amount, "transfer", now), ledger.add(dst_id, amount, "transfer", now)
+
+    def get_rank(self, user_id: int, guild_id: Optional[int] = None) -> Optional[int]:
+        """回傳使用者的積分名次（1 起算），沒有積分紀錄時回傳 None。"""
+        return self.get_ledger(guild_id).leaderboard.rank(int(user_id))
+
+    async def get_history(self, user_id: int, page: int = 1, guild_id: Optional[int] = None) -> List[PointsEntry]:
+        """取得某位使用者第 page 頁的異動紀錄（由新到舊）。"""
+        skip = (page - 1) * HISTORY_PAGE_SIZE
+        ledger = self.get_ledger(guild_id)
+        with ledger.in_use():
+            return await ledger.history(user_id, skip, HISTORY_PAGE_SIZE)
 
     # --- User-facing Command ---
     @commands.command(name='point', help='查看你目前的積分')
     async def point(self, ctx: commands.Context):
         """顯示指令使用者的目前積分。"""
-        current_points = self.get_points(ctx.author.id)
+        current_points = await self.fetch_points(ctx.author.id, guild_id=ctx.guild and ctx.guild.id)
         await ctx.send(f"{ctx.author.mention} 目前積分：{current_points}")
 
+    def build_leaderboard_embed(self, page: int, guild_id: Optional[int] = None) -> discord.Embed:
+        """產生第 page 頁（1 起算）的排行榜。"""
+        leaderboard = self.get_ledger(guild_id).leaderboard
+        total_pages = max(1, -(-len(leaderboard) // LEADERBOARD_PAGE_SIZE))
+        page = min(max(1, page), total_pages)
+        start = (page - 1) * LEADERBOARD_PAGE_SIZE
+        medals = {1: "🥇", 2: "🥈", 3: "🥉"}
+        lines = [
+            f"{medals.get(rank, f'`#{rank}`')} <@{user_id}> — **{score}** 分"
+            for rank, (user_id, score) in enumerate(leaderboard.top(start, LEADERBOARD_PAGE_SIZE), start=start + 1)
+        ]
+        embed = discord.Embed(title="🏆 積分排行榜", description="\n".join(lines) or "目前還沒有人有積分。", color=0xF1C40F)
+        embed.set_footer(text=f"第 {page}/{total_pages} 頁 | 共 {len(leaderboard)} 人")
+        return embed
+
+    @commands.command(name='leaderboard', aliases=['排行榜', 'lb'], help='查看積分排行榜。範例: !leaderboard 2')
+    async def leaderboard_command(self, ctx: commands.Context, page: int = 1):
+        """顯示積分排行榜，可用按鈕翻頁。"""
+        guild_id = ctx.guild and ctx.guild.id
+        view = LeaderboardView(self, ctx.author.id, page, guild_id)
+        view.message = await ctx.send(embed=self.build_leaderboard_embed(view.page, guild_id), view=view)
+
+    @commands.command(name='rank', aliases=['名次'], help='查看自己或他人的積分名次。範例: !rank @某人')
+    async def rank(self, ctx: commands.Context, member: Optional[discord.Member] = None):
+        """顯示使用者目前的積分與名次。"""
+        target = member or ctx.author
+        guild_id = ctx.guild and ctx.guild.id
+        current_points = await self.fetch_points(target.id, guild_id)
+        position = self.get_rank(target.id, guild_id)
+        if position is None:
+            await ctx.send(f"{target.display_name} 還沒有任何積分紀錄。")
+            return
+        total = len(self.get_ledger(guild_id).leaderboard)
+        await ctx.send(f"🏅 {target.display_name} 目前積分 **{current_points}**，排名第 **{position}** / {total} 名。")
+
+    @commands.command(name='history', help='查看積分異動紀錄。範例: !history、!history 2、!history @某人')
+    async def history(self, ctx: commands.Context, member: Optional[discord.Member] = None, page: int = 1):
+        """分頁列出某位使用者最近的積分異動。"""
+        target = member or ctx.author
+        guild_id = ctx.guild and ctx.guild.id
+        page = max(1, page)
+        entries = await self.get_history(target.id, page, guild_id)
+        if not entries:
+            await ctx.send(f"{target.display_name} 沒有第 {page} 頁的積分紀錄。")
+            return
+
+        lines = [
+            f"`{entry.delta:+}` {SOURCE_LABELS.get(entry.source, entry.source)} · <t:{int(entry.ts)}:R>"
+            for entry in entries
+        ]
+        embed = discord.Embed(title=f"📜 {target.display_name} 的積分紀錄", description="\n".join(lines), color=0xF1C40F)
+        current_points = await self.fetch_points(target.id, guild_id)
+        embed.set_footer(text=f"第 {page} 頁 | 目前積分：{current_points}")
+        await ctx.send(embed=embed)
+
+    @commands.command(name='give', aliases=['轉帳'], help='把自己的積分轉給其他人。範例: !give @某人 100')
+    @commands.guild_only()
+    async def give(self, ctx: commands.Context, member: discord.Member, amount: int):
+        """轉帳給同一個伺服器（同一個經濟體）的成員。"""
+        if member.bot:
+            await ctx.send("不能轉帳給機器人。")
+            return
+        if member.id == ctx.author.id:
+            await ctx.send("不能轉帳給自己。")
+            return
+        if amount <= 0:
+            await ctx.send("轉帳金額必須是正數。")
+            return
+
+        result = await self.transfer(ctx.author.id, member.id, amount, guild_id=ctx.guild.id)
+        if result is None:
+            await ctx.send(f"💸 積分不足！你目前只有 **{await self.fetch_points(ctx.author.id, ctx.guild.id)}** 分。")
+            return
+        src_total, dst_total = result
+        await ctx.send(
+            f"🤝 {ctx.author.mention} 轉了 **{amount}** 分給 {member.mention}！\n"
+            f"（{ctx.author.display_name}：{src_total} 分 / {member.display_name}：{dst_total} 分）"
+        )
+
+    @give.error
+    async def give_error(self, ctx: commands.Context, error):
+        if isinstance(error, (commands.MissingRequiredArgument, commands.BadArgument)):
+            await ctx.send("用法：`!give @使用者 金額`，例如 `!give @某人 100`。")
+        elif isinstance(error, commands.NoPrivateMessage):
+            await ctx.send("轉帳只能在伺服器頻道中使用。")
+        else:
+            print(f"--- Give Command Unexpected Error ---\n{error!r}")
+            await ctx.send(f"🚨 轉帳時發生未預期錯誤，請查看主控台紀錄。錯誤: `{type(error).__name__}`")
+
+    @commands.command(name='economy', aliases=['經濟'], help='查看各功能的積分流量與貨幣總量。範例: !economy 7d')
+    async def economy(self, ctx: commands.Context, window: str = "24h"):
+        """依來源列出一段期間內產生 / 銷毀的積分與淨流量，資料來自即時統計，不會掃描使用者檔案。"""
+        window = window.lower()
+        if window not in ECONOMY_WINDOWS:
+            await ctx.send(f"區間只能是 {'、'.join(f'`{w}`' for w in ECONOMY_WINDOWS)}。")
+            return
+        resolution, count, label = ECONOMY_WINDOWS[window]
+        ledger = self.get_ledger(ctx.guild and ctx.guild.id)
+        flows = ledger.telemetry.flows(resolution, count)
+
+        rows = sorted(
+            ((source, created, destroyed) for source, (created, destroyed) in flows.items() if created or destroyed),
+            key=lambda row: row[1] - row[2], reverse=True,
+        )
+        net_total = sum(created - destroyed for _, created, destroyed in rows)
+        embed = discord.Embed(
+            title=f"📈 經濟報告（{label}）",
+            description=f"💰 貨幣總量：**{ledger.telemetry.supply:,}**\n📊 期間淨流量：**{net_total:+,}**",
+            color=0x2ECC71 if net_total <= 0 else 0xE67E22,
+        )
+        for source, created, destroyed in rows:
+            embed.add_field(
+                name=SOURCE_LABELS.get(source, source),
+                value=f"淨 **{created - destroyed:+,}**\n產生 +{created:,} / 銷毀 -{destroyed:,}",
+                inline=True,
+            )
+        if not rows:
+            embed.add_field(name="沒有資料", value="這段期間沒有任何積分異動。", inline=False)
+        scope = "本伺服器獨立經濟" if ledger is not self.global_ledger else "全域經濟"
+        embed.set_footer(text=f"{scope} | 可用區間：{' / '.join(ECONOMY_WINDOWS)}")
+        await ctx.send(embed=embed)
+
+    @commands.command(name='economymode', help='（管理員）設定本伺服器使用全域或獨立經濟體。範例: !economymode guild')
+    @commands.guild_only()
+    @commands.has_permissions(manage_guild=True)
+    async def economymode(self, ctx: commands.Context, mode: Optional[str] = None):
+        """切換本伺服器的經濟模式：global（與其他伺服器共用）或 guild（獨立分片）。"""
+        current = self.economy_modes.get(str(ctx.guild.id), 'global')
+        if mode is None:
+            await ctx.send(f"本伺服器目前使用 **{current}** 經濟模式。可用 `!economymode global` 或 `!economymode guild` 切換。")
+            return
+
+        mode = mode.lower()
+        if mode not in ('global', 'guild'):
+            await ctx.send("模式只能是 `global` 或 `guild`。")
+            return
+        if mode == current:
+            await ctx.send(f"本伺服器已經是 **{mode}** 經濟模式了。")
+            return
+
+        refunded = 0
+        if current == 'guild':
+            # Orders on this guild's market can only be refunded into its shard, i.e. before the switch
+            market_cog = self.bot.get_cog("Market")
+            if market_cog:
+                refunded = await market_cog.close_guild_market(ctx.guild.id)
+        # Persist everything first so nothing pending is routed to the wrong economy afterwards
+        await self.flush()
+        if current == 'guild' and market_cog:
+            # The market journal must not outlive the switch: replaying it later would settle into the global ledger
+            await market_cog.flush()
+        if mode == 'guild':
+            self.economy_modes[str(ctx.guild.id)] = 'guild'
+        else:
+            self.economy_modes.pop(str(ctx.guild.id), None)
+        self._save_economy_modes()
+        await ctx.send(
+            f"✅ 已切換為 **{mode}** 經濟模式。"
+            + ("本伺服器的積分從此獨立計算，全域積分不受影響。" if mode == 'guild' else "本伺服器改回使用全域積分，獨立分片的資料會保留。")
+            + (f"\n本伺服器市集的 {refunded} 張掛單已撤回並退還。" if refunded else "")
+        )
+
 
 async def setup(bot: commands.Bot):
     await bot.add_cog(PointsCog(bot))
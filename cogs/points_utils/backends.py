@@ -0,0 +1,317 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from ..storage_utils.cold_archive import ColdArchive
+from .journal import PointsEntry, PointsJournal, read_entries
+
+SNAPSHOT_VERSION = 2
+COMPACT_EVERY = 5000  # 日誌累積多少筆後把快照往前推進一次
+
+
+class PointsBackend:
+    """積分儲存後端的共同介面。
+
+    PointsCog 自己維護記憶體快取，後端只負責「讀取單一使用者」與「套用一批異動紀錄」。
+    `apply` 會在背景執行緒中被呼叫，實作必須自行確保執行緒安全。
+    """
+
+    def preload(self) -> Dict[str, int]:
+        """啟動時預先載入的餘額（可回傳空 dict，改由 `get` 按需讀取）。"""
+        return {}
+
+    def get(self, user_id: str) -> Optional[int]:
+        """讀取單一使用者的餘額，不存在時回傳 None。"""
+        raise NotImplementedError
+
+    def all_balances(self) -> Iterator[Tuple[str, int]]:
+        """逐筆列出所有 (user_id, 餘額)，只在啟動建立排行榜索引時使用。"""
+        raise NotImplementedError
+
+    def apply(self, entries: List[PointsEntry]) -> None:
+        """以單一原子操作套用一批異動紀錄。"""
+        raise NotImplementedError
+
+    def history(self, user_id: str, skip: int = 0, limit: int = 10) -> List[PointsEntry]:
+        """由新到舊列出某位使用者的異動紀錄；不支援的後端回傳空清單。"""
+        return []
+
+    def export_balances(self) -> Dict[str, int]:
+        """所有使用者的餘額（含已封存者），只用於一次性的匯入與統計初始化。"""
+        return dict(self.all_balances())
+
+    def archive_inactive(self, cutoff: float) -> List[str]:
+        """把最後異動早於 cutoff 的使用者搬到冷資料區，回傳被封存的 user_id；不支援的後端不做任何事。"""
+        return []
+
+    def close(self) -> None:
+        pass
+
+
+def sum_deltas(entries: List[PointsEntry]) -> Dict[str, int]:
+    """把一批紀錄合併成 {user_id: 總增減量}。"""
+    deltas: Dict[str, int] = defaultdict(int)
+    for entry in entries:
+        deltas[entry.user_id] += entry.delta
+    return deltas
+
+
+def read_snapshot(path: str) -> Tuple[int, Dict[str, int], Dict[str, float]]:
+    """回傳 (快照涵蓋的日誌位置, 餘額, 最後異動時間)。也接受舊版純 {user_id: 餘額} 格式。"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (json.JSONDecodeError, IOError):
+        return 0, {}, {}
+    if data.get("version") == SNAPSHOT_VERSION and isinstance(data.get("points"), dict):
+        return data.get("journal_offset", 0), data["points"], data.get("last_seen", {})
+    return 0, data, {}
+
+
+def read_json_balances(json_path: str, starting_points: int = 0) -> Dict[str, int]:
+    """唯讀讀出 JSON 後端的所有餘額（冷資料區 + 快照 + 日誌尾端），供其他後端一次性匯入。
+
+    不會建立 JsonBackend：不建目錄、不開啟日誌寫入，也不截斷舊檔案不完整的尾端。
+    """
+    directory = os.path.dirname(json_path)
+    balances: Dict[str, int] = {}
+    archive_dir = os.path.join(directory, 'archive', 'points')
+    if os.path.isdir(archive_dir):
+        balances.update((uid, record["balance"]) for uid, record in ColdArchive(archive_dir).items())
+    snapshot_offset, points, _ = read_snapshot(json_path)
+    balances.update(points)
+    for entry in read_entries(os.path.splitext(json_path)[0] + '.journal', snapshot_offset):
+        balances[entry.user_id] = balances.get(entry.user_id, starting_points) + entry.delta
+    return balances
+
+
+class JsonBackend(PointsBackend):
+    """points.json 快照 + 只追加的交易日誌（points.journal）。
+
+    每批異動只追加到日誌並 fsync，不再整份改寫 points.json；
+    累積 COMPACT_EVERY 筆（或關閉時）才把記憶體中的餘額寫成新快照，
+    快照會記錄它涵蓋到的日誌位置，啟動時只需重播之後的尾端；已併入快照的日誌隨即輪替封存，
+    只保留最近幾個區段供歷史查詢。
+
+    快照同時記錄每位使用者最後一次異動的時間；長期不活躍的使用者會被
+    archive_inactive 搬到 archive/points/ 的壓縮區段，之後被讀取或異動時自動取回。
+    """
+
+    def __init__(self, path: str, starting_points: int = 0, compact_every: int = COMPACT_EVERY):
+        self.path = path
+        self.starting_points = starting_points
+        self.compact_every = compact_every
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        snapshot_offset, self._points, self._last_seen = self._read_snapshot()
+        self.archive = ColdArchive(os.path.join(os.path.dirname(self.path), 'archive', 'points'))
+        # Users pulled back from the archive; they leave the archive index once a snapshot includes them
+        self._rehydrated: set = set()
+        self.journal = PointsJournal(os.path.splitext(self.path)[0] + '.journal')
+        self._since_compact = self.journal.recover(snapshot_offset, self._apply_entry)
+
+    def _read_snapshot(self):
+        return read_snapshot(self.path)
+
+    def _hot_balance(self, user_id: str) -> Optional[int]:
+        """熱資料沒有時嘗試從冷資料區取回。"""
+        balance = self._points.get(user_id)
+        if balance is None and user_id in self.archive:
+            record = self.archive.load(user_id)
+            if record is not None:
+                balance = record["balance"]
+                self._points[user_id] = balance
+                # Coming back counts as activity, otherwise the next sweep would archive them again
+                self._last_seen[user_id] = time.time()
+                self._rehydrated.add(user_id)
+        return balance
+
+    def _apply_entry(self, entry: PointsEntry):
+        balance = self._hot_balance(entry.user_id)
+        self._points[entry.user_id] = (self.starting_points if balance is None else balance) + entry.delta
+        self._last_seen[entry.user_id] = entry.ts
+
+    def _compact(self):
+        # Write the snapshot first, then the index: a crash in between only costs a longer tail scan
+        snapshot = {
+            "version": SNAPSHOT_VERSION, "journal_offset": self.journal.tell(),
+            "points": self._points, "last_seen": self._last_seen,
+        }
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f, separators=(',', ':'))
+        os.replace(tmp_path, self.path)
+        # The snapshot now covers the whole journal, so the active file can be sealed and old segments dropped
+        self.journal.rotate()
+        self._since_compact = 0
+        # Only now is the snapshot the durable copy of rehydrated users
+        if self._rehydrated:
+            self.archive.discard(self._rehydrated)
+            self._rehydrated.clear()
+
+    def preload(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._points)
+
+    def get(self, user_id: str) -> Optional[int]:
+        # Everything hot was loaded up front, so a miss means the user is archived or has no record
+        with self._lock:
+            return self._hot_balance(user_id)
+
+    def all_balances(self) -> Iterator[Tuple[str, int]]:
+        return iter(self.preload().items())
+
+    def export_balances(self) -> Dict[str, int]:
+        """熱資料加上冷資料區的所有餘額，供其他後端一次性匯入。"""
+        with self._lock:
+            balances = {uid: record["balance"] for uid, record in self.archive.items()}
+            balances.update(self._points)
+            return balances
+
+    def apply(self, entries: List[PointsEntry]) -> None:
+        with self._lock:
+            self.journal.append(entries)
+            for entry in entries:
+                self._apply_entry(entry)
+            self._since_compact += len(entries)
+            if self._since_compact >= self.compact_every:
+                self._compact()
+
+    def history(self, user_id: str, skip: int = 0, limit: int = 10) -> List[PointsEntry]:
+        with self._lock:
+            return self.journal.history(user_id, skip, limit)
+
+    def archive_inactive(self, cutoff: float) -> List[str]:
+        with self._lock:
+            now = time.time()
+            inactive = []
+            for uid in self._points:
+                # Balances from before last_seen existed start their clock now
+                seen = self._last_seen.setdefault(uid, now)
+                if seen < cutoff and uid not in self._rehydrated:
+                    inactive.append(uid)
+            if not inactive:
+                return []
+            self.archive.archive({uid: {"balance": self._points[uid], "last_seen": self._last_seen[uid]} for uid in inactive})
+            for uid in inactive:
+                del self._points[uid]
+                del self._last_seen[uid]
+            self._compact()
+            return inactive
+
+    def close(self) -> None:
+        with self._lock:
+            if self._since_compact or self._rehydrated:
+                self._compact()
+            self.journal.close()
+
+
+class SqliteBackend(PointsBackend):
+    """SQLite（WAL 模式）後端：每位使用者一列，以 user_id 為主鍵索引。
+
+    單一使用者的變動只會執行 `balance = balance + ?`，不需要改寫其他人的資料；
+    異動紀錄寫在同一個交易裡的 transactions 表，依 (user_id, id) 建索引供歷史查詢。
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS points (
+            user_id INTEGER PRIMARY KEY,
+            balance INTEGER NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS transactions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            delta INTEGER NOT NULL,
+            source TEXT NOT NULL,
+            ts REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_transactions_user ON transactions (user_id, id);
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        );
+    """
+    UPSERT = (
+        "INSERT INTO points (user_id, balance) VALUES (?, ?) "
+        "ON CONFLICT(user_id) DO UPDATE SET balance = balance + ?"
+    )
+
+    def __init__(self, path: str, starting_points: int = 0, import_from: Optional[str] = None):
+        self.path = path
+        self.starting_points = starting_points
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        # The connection is shared with the flush worker thread; every use goes through self._lock
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(self.SCHEMA)
+        if import_from:
+            self.import_json(import_from)
+
+    def get(self, user_id: str) -> Optional[int]:
+        with self._lock:
+            row = self._conn.execute("SELECT balance FROM points WHERE user_id = ?", (int(user_id),)).fetchone()
+        return row[0] if row else None
+
+    def all_balances(self) -> Iterator[Tuple[str, int]]:
+        with self._lock:
+            rows = self._conn.execute("SELECT user_id, balance FROM points").fetchall()
+        return ((str(uid), balance) for uid, balance in rows)
+
+    def apply(self, entries: List[PointsEntry]) -> None:
+        rows = [(int(uid), self.starting_points + delta, delta) for uid, delta in sum_deltas(entries).items()]
+        log_rows = [(int(e.user_id), e.delta, e.source, e.ts) for e in entries]
+        with self._lock:
+            with self._conn:  # one transaction per batch
+                self._conn.executemany(self.UPSERT, rows)
+                self._conn.executemany(
+                    "INSERT INTO transactions (user_id, delta, source, ts) VALUES (?, ?, ?, ?)", log_rows
+                )
+
+    def history(self, user_id: str, skip: int = 0, limit: int = 10) -> List[PointsEntry]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT delta, source, ts FROM transactions WHERE user_id = ? ORDER BY id DESC LIMIT ? OFFSET ?",
+                (int(user_id), limit, skip),
+            ).fetchall()
+        return [PointsEntry(user_id, delta, source, ts) for delta, source, ts in rows]
+
+    def import_json(self, json_path: str) -> int:
+        """一次性匯入 JSON 後端的資料（快照 + 日誌尾端）。已匯入過就直接略過，回傳匯入筆數。"""
+        with self._lock:
+            done = self._conn.execute("SELECT value FROM meta WHERE key = 'imported_json'").fetchone()
+            if done or not os.path.exists(json_path):
+                return 0
+            legacy = read_json_balances(json_path, self.starting_points)
+            with self._conn:
+                # Existing rows win: the database may already hold newer balances
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO points (user_id, balance) VALUES (?, ?)",
+                    ((int(uid), int(bal)) for uid, bal in legacy.items()),
+                )
+                self._conn.execute(
+                    "INSERT INTO meta (key, value) VALUES ('imported_json', ?)", (json_path,)
+                )
+            return len(legacy)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def create_backend(kind: str, data_dir: str, starting_points: int = 0) -> PointsBackend:
+    """依設定名稱建立後端。sqlite / mmap 第一次啟動時會自動匯入既有的 points.json。"""
+    json_path = os.path.join(data_dir, 'points.json')
+    if kind == 'sqlite':
+        return SqliteBackend(os.path.join(data_dir, 'points.db'), starting_points, import_from=json_path)
+    if kind == 'mmap':
+        from .mmap_store import MmapBackend  # mmap_store builds on this module
+        return MmapBackend(os.path.join(data_dir, 'points.bin'), starting_points, import_from=json_path)
+    if kind != 'json':
+        print(f"未知的積分後端 '{kind}'，改用 json。")
+    return JsonBackend(json_path, starting_points)
@@ -0,0 +1,263 @@
+import bisect
+import json
+import os
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+KEEP_SEGMENTS = 4  # 壓縮後保留幾個已封存的舊區段供歷史查詢；更舊的紀錄只留在快照的餘額裡
+
+
+class PointsEntry(NamedTuple):
+    """一筆積分異動：誰、變動多少、來自哪個功能、何時發生。
+
+    balance 是異動後的餘額，只有需要冪等重播的後端（mmap）會填；其他情況為 None。
+    """
+    user_id: str
+    delta: int
+    source: str
+    ts: float
+    balance: Optional[int] = None
+
+
+def _segment_bases(path: str) -> List[int]:
+    """列出 path 已封存區段的起始位移，由舊到新。"""
+    directory, prefix = os.path.split(path)
+    prefix += '.'
+    bases = []
+    for name in os.listdir(directory or '.'):
+        suffix = name[len(prefix):] if name.startswith(prefix) else ''
+        if suffix.isdigit():
+            bases.append(int(suffix))
+    return sorted(bases)
+
+
+def read_entries(path: str, start: int = 0) -> Iterator[PointsEntry]:
+    """唯讀地依序列出位移 >= start 的紀錄（跨所有保留中的區段），不會建立、改寫或截斷任何檔案。
+
+    遇到不完整的一行（當機時寫到一半）就停止。供其他後端一次性匯入舊日誌使用。
+    """
+    if not os.path.exists(path):
+        return
+    bases = _segment_bases(path)
+    files = [(base, f"{path}.{base}") for base in bases]
+    active_base = bases[-1] + os.path.getsize(files[-1][1]) if bases else 0
+    files.append((active_base, path))
+    for base, file_path in files:
+        if file_path != path and base + os.path.getsize(file_path) <= start:
+            continue
+        with open(file_path, 'rb') as f:
+            f.seek(max(0, start - base))
+            for line in f:
+                entry = PointsJournal._decode(line)
+                if entry is None:
+                    return
+                yield entry
+
+
+class PointsJournal:
+    """只追加的積分交易日誌（JSON Lines），分成多個區段輪替。
+
+    - 每批寫入後 fsync 一次，當機最多只會遺失尚未 flush 的那一批。
+    - 位移（offset）是跨區段遞增的邏輯位置：使用中的檔案從最新封存區段的結尾接著算，
+      快照記錄的日誌位置因此在輪替後依然有效。
+    - 快照涵蓋整份日誌後呼叫 rotate：使用中的檔案改名為 `<日誌>.<起始位移>` 封存，
+      只保留最新 KEEP_SEGMENTS 個區段，日誌與位移索引的大小都有上限。
+    - 每位使用者的紀錄位移另外存成索引，查詢歷史時只需 seek 到對應行。
+    """
+
+    def __init__(self, path: str, keep_segments: int = KEEP_SEGMENTS):
+        self.path = path
+        self.index_path = path + '.idx'
+        self.keep_segments = max(1, keep_segments)
+        # Start offsets of the sealed segments, oldest first
+        self._segments: List[int] = _segment_bases(path)
+        self._base = self._active_base()
+        self._offsets: Dict[str, List[int]] = {}
+        self._indexed_upto = self._oldest()
+        self._file = open(self.path, 'ab')
+
+    # --- Segments ---
+    def _segment_path(self, base: int) -> str:
+        return f"{self.path}.{base}"
+
+    def _active_base(self) -> int:
+        # The active file always continues where the newest sealed segment ends
+        if not self._segments:
+            return 0
+        newest = self._segments[-1]
+        return newest + os.path.getsize(self._segment_path(newest))
+
+    def _oldest(self) -> int:
+        """還查得到的最舊位移。"""
+        return self._segments[0] if self._segments else self._base
+
+    def _files(self) -> List[Tuple[int, str]]:
+        return [(base, self._segment_path(base)) for base in self._segments] + [(self._base, self.path)]
+
+    def _locate(self, offset: int) -> Optional[Tuple[str, int]]:
+        """把邏輯位移換成 (檔案, 檔內位置)；所在區段已經刪除時回傳 None。"""
+        if offset >= self._base:
+            return self.path, offset - self._base
+        i = bisect.bisect_right(self._segments, offset) - 1
+        if i < 0:
+            return None
+        return self._segment_path(self._segments[i]), offset - self._segments[i]
+
+    # --- Recovery ---
+    def recover(self, snapshot_offset: int, on_entry: Callable[[PointsEntry], None]) -> int:
+        """載入索引並重播日誌尾端。位移 >= snapshot_offset 的紀錄會交給 on_entry 套用。
+
+        只會讀取 min(快照位置, 索引位置) 之後的部分；回傳重播的筆數。
+        """
+        self._load_index()
+        start = max(min(snapshot_offset, self._indexed_upto), self._oldest())
+        replayed = 0
+        good_end = 0
+        for base, path in self._files():
+            is_active = path == self.path
+            if not is_active and base + os.path.getsize(path) <= start:
+                continue
+            with open(path, 'rb') as f:
+                f.seek(max(0, start - base))
+                if is_active:
+                    good_end = f.tell()
+                while True:
+                    offset = base + f.tell()
+                    line = f.readline()
+                    if not line:
+                        break
+                    entry = self._decode(line)
+                    if entry is None:
+                        # Torn write from a crash mid-append: everything after the last full record is garbage
+                        break
+                    if is_active:
+                        good_end = f.tell()
+                    if offset >= self._indexed_upto:
+                        self._offsets.setdefault(entry.user_id, []).append(offset)
+                    if offset >= snapshot_offset:
+                        on_entry(entry)
+                        replayed += 1
+        if good_end < os.path.getsize(self.path):
+            print(f"積分日誌尾端不完整，截斷於 {good_end} bytes。")
+            self._file.close()
+            with open(self.path, 'r+b') as f:
+                f.truncate(good_end)
+            self._file = open(self.path, 'ab')
+        self._indexed_upto = self.tell()
+        return replayed
+
+    # --- Writing ---
+    def append(self, entries: Iterable[PointsEntry]) -> None:
+        """追加一批紀錄並 fsync。"""
+        offset = self.tell()
+        buffer = bytearray()
+        for entry in entries:
+            line = self._encode(entry)
+            self._offsets.setdefault(entry.user_id, []).append(offset + len(buffer))
+            buffer += line
+        if not buffer:
+            return
+        self._file.write(buffer)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._indexed_upto = self.tell()
+
+    def tell(self) -> int:
+        return self._base + self._file.tell()
+
+    def rotate(self) -> None:
+        """快照已涵蓋到目前位置時呼叫：封存使用中的檔案、刪掉過舊的區段，並寫出修剪後的索引。"""
+        if self._file.tell():
+            end = self.tell()
+            self._file.close()
+            os.replace(self.path, self._segment_path(self._base))
+            self._segments.append(self._base)
+            self._base = end
+            self._file = open(self.path, 'ab')
+            while len(self._segments) > self.keep_segments:
+                os.remove(self._segment_path(self._segments.pop(0)))
+            self._prune_index()
+        self.save_index()
+
+    def save_index(self) -> None:
+        """把每位使用者的位移索引寫到磁碟，下次啟動就不用重掃日誌。索引只涵蓋保留中的區段。"""
+        tmp_path = self.index_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"upto": self._indexed_upto, "offsets": self._offsets}, f, separators=(',', ':'))
+        os.replace(tmp_path, self.index_path)
+
+    # --- Reading ---
+    def history(self, user_id: str, skip: int = 0, limit: int = 10) -> List[PointsEntry]:
+        """由新到舊取得某位使用者的紀錄（略過最新的 skip 筆）。"""
+        offsets = self._offsets.get(user_id, [])
+        end = len(offsets) - skip
+        if end <= 0:
+            return []
+        page = offsets[max(0, end - limit):end]
+        result = []
+        handles = {}
+        try:
+            for offset in reversed(page):
+                located = self._locate(offset)
+                if located is None:
+                    continue
+                path, position = located
+                f = handles.get(path)
+                if f is None:
+                    f = handles[path] = open(path, 'rb')
+                f.seek(position)
+                entry = self._decode(f.readline())
+                if entry is not None:
+                    result.append(entry)
+        finally:
+            for f in handles.values():
+                f.close()
+        return result
+
+    def count(self, user_id: str) -> int:
+        return len(self._offsets.get(user_id, []))
+
+    def close(self) -> None:
+        self._file.close()
+
+    # --- Helpers ---
+    def _load_index(self):
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self._offsets = data["offsets"]
+            self._indexed_upto = data["upto"]
+        except (json.JSONDecodeError, IOError, KeyError):
+            self._offsets, self._indexed_upto = {}, self._oldest()
+        if not self._oldest() <= self._indexed_upto <= self.tell():
+            # Index does not match the retained segments (journal replaced, truncated or lost): rebuild
+            self._offsets, self._indexed_upto = {}, self._oldest()
+        else:
+            # A crash between dropping a segment and saving the index leaves offsets into deleted files
+            self._prune_index()
+
+    def _prune_index(self):
+        oldest = self._oldest()
+        for user_id in list(self._offsets):
+            offsets = self._offsets[user_id]
+            cut = bisect.bisect_left(offsets, oldest)
+            if cut == len(offsets):
+                del self._offsets[user_id]
+            elif cut:
+                del offsets[:cut]
+
+    @staticmethod
+    def _encode(entry: PointsEntry) -> bytes:
+        record = {"u": entry.user_id, "d": entry.delta, "s": entry.source, "t": entry.ts}
+        if entry.balance is not None:
+            record["b"] = entry.balance
+        return (json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n').encode('utf-8')
+
+    @staticmethod
+    def _decode(line: bytes):
+        if not line.endswith(b'\n'):
+            return None
+        try:
+            record = json.loads(line)
+            return PointsEntry(record["u"], record["d"], record["s"], record["t"], record.get("b"))
+        except (ValueError, KeyError):
+            return None
@@ -0,0 +1,133 @@
+from bisect import bisect_left, insort
+from typing import Dict, Iterable, List, Optional, Tuple
+
+LOAD = 512  # Target sublist length; a sublist is split once it reaches twice this size
+
+
+class RankedIndex:
+    """可增量維護的排名索引（分數高者在前，同分時 id 小者在前）。
+
+    內部是「排序好的子清單」串列（類似 sortedcontainers），再加一棵記錄各子清單長度的
+    Fenwick 樹：新增、移除、查名次與取第 k 名都只需要 O(log n)，不用每次重新排序全部使用者。
+    """
+
+    def __init__(self, items: Iterable[Tuple[int, int]] = ()):
+        self._scores: Dict[int, int] = dict(items)
+        keys = sorted((-score, member) for member, score in self._scores.items())
+        self._lists: List[List[Tuple[int, int]]] = [keys[i:i + LOAD] for i in range(0, len(keys), LOAD)]
+        self._maxes: List[Tuple[int, int]] = [sub[-1] for sub in self._lists]
+        self._rebuild_tree()
+
+    def __len__(self) -> int:
+        return len(self._scores)
+
+    def __contains__(self, member: int) -> bool:
+        return member in self._scores
+
+    def score(self, member: int) -> Optional[int]:
+        return self._scores.get(member)
+
+    # --- Mutations ---
+    def set(self, member: int, score: int):
+        """新增或更新成員的分數。"""
+        old = self._scores.get(member)
+        if old == score:
+            return
+        if old is not None:
+            self._remove_key((-old, member))
+        self._scores[member] = score
+        self._insert_key((-score, member))
+
+    def discard(self, member: int):
+        old = self._scores.pop(member, None)
+        if old is not None:
+            self._remove_key((-old, member))
+
+    # --- Queries ---
+    def rank(self, member: int) -> Optional[int]:
+        """回傳 1 起算的名次；不在索引中時回傳 None。"""
+        score = self._scores.get(member)
+        if score is None:
+            return None
+        key = (-score, member)
+        i = bisect_left(self._maxes, key)
+        return self._prefix(i) + bisect_left(self._lists[i], key) + 1
+
+    def top(self, start: int, count: int) -> List[Tuple[int, int]]:
+        """取第 start 名（0 起算）開始的 count 筆 (member, score)。"""
+        if start < 0 or start >= len(self._scores):
+            return []
+        i, pos = self._locate(start)
+        result = []
+        while i < len(self._lists) and len(result) < count:
+            sub = self._lists[i]
+            for neg_score, member in sub[pos:pos + count - len(result)]:
+                result.append((member, -neg_score))
+            i, pos = i + 1, 0
+        return result
+
+    # --- Sorted Sublists ---
+    def _insert_key(self, key):
+        if not self._lists:
+            self._lists.append([key])
+            self._maxes.append(key)
+            self._rebuild_tree()
+            return
+        i = bisect_left(self._maxes, key)
+        if i == len(self._lists):
+            i -= 1
+        sub = self._lists[i]
+        insort(sub, key)
+        self._maxes[i] = sub[-1]
+        if len(sub) >= 2 * LOAD:
+            self._lists[i:i + 1] = [sub[:LOAD], sub[LOAD:]]
+            self._maxes[i:i + 1] = [sub[LOAD - 1], sub[-1]]
+            self._rebuild_tree()
+        else:
+            self._tree_add(i, 1)
+
+    def _remove_key(self, key):
+        i = bisect_left(self._maxes, key)
+        sub = self._lists[i]
+        del sub[bisect_left(sub, key)]
+        if sub:
+            self._maxes[i] = sub[-1]
+            self._tree_add(i, -1)
+        else:
+            del self._lists[i]
+            del self._maxes[i]
+            self._rebuild_tree()
+
+    # --- Fenwick Tree over Sublist Lengths ---
+    def _rebuild_tree(self):
+        tree = [0] + [len(sub) for sub in self._lists]
+        for i in range(1, len(tree)):
+            parent = i + (i & -i)
+            if parent < len(tree):
+                tree[parent] += tree[i]
+        self._tree = tree
+
+    def _tree_add(self, i: int, delta: int):
+        i += 1
+        while i < len(self._tree):
+            self._tree[i] += delta
+            i += i & -i
+
+    def _prefix(self, i: int) -> int:
+        """前 i 個子清單的總長度。"""
+        total = 0
+        while i > 0:
+            total += self._tree[i]
+            i -= i & -i
+        return total
+
+    def _locate(self, index: int) -> Tuple[int, int]:
+        """把整體位置換算成 (子清單, 子清單內位置)。"""
+        pos, step = 0, 1 << (len(self._tree).bit_length())
+        while step:
+            nxt = pos + step
+            if nxt < len(self._tree) and self._tree[nxt] <= index:
+                index -= self._tree[nxt]
+                pos = nxt
+            step >>= 1
+        return pos, index
@@ -0,0 +1,188 @@
+import asyncio
+import contextlib
+import time
+from typing import Dict, List, Optional
+
+from .backends import PointsBackend
+from .journal import PointsEntry
+from .leaderboard import RankedIndex
+from .telemetry import EconomyTelemetry
+
+
+class Escrow:
+    """一筆已圈存的賭注。由 PointsCog.reserve 建立，必須以 commit 或 refund 結束其中之一。
+
+    圈存期間金額只是從「可用積分」中扣住，不會寫入儲存；結算時才寫入一筆淨變動。
+    """
+    def __init__(self, ledger: "PointsLedger", user_id: int, amount: int, source: str):
+        self.ledger = ledger
+        self.user_id = user_id
+        self.amount = amount
+        self.source = source
+        self.settled = False
+
+    def commit(self, payout: int = 0) -> int:
+        """結算：扣掉圈存金額並發放 payout（一次寫入淨額），回傳結算後的可用積分。"""
+        if self.settled:
+            raise RuntimeError("這筆圈存已經結算過了")
+        self.settled = True
+        self.ledger.release_hold(self.user_id, self.amount)
+        net = payout - self.amount
+        if net:
+            return self.ledger.add(self.user_id, net, self.source)
+        return self.ledger.available(self.user_id)
+
+    def refund(self) -> int:
+        """取消圈存，不產生任何寫入；已結算時不做任何事。回傳目前可用積分。"""
+        if not self.settled:
+            self.settled = True
+            self.ledger.release_hold(self.user_id, self.amount)
+        return self.ledger.available(self.user_id)
+
+
+class PointsLedger:
+    """一個經濟體（全域或單一伺服器）的積分帳本。
+
+    包含寫回快取、待寫入的異動紀錄、圈存金額、排行榜索引與流量統計；儲存則交給 PointsBackend。
+    所有方法都在事件迴圈上執行，只有 flush 與快取未命中的讀取會丟到背景執行緒。
+    """
+
+    def __init__(self, backend: PointsBackend, starting_points: int = 0, stats_path: Optional[str] = None):
+        self.backend = backend
+        self.starting_points = starting_points
+        # Write-back cache: reads are served from memory, pending records are flushed in batches
+        self._points: Dict[str, int] = backend.preload()
+        self._pending: List[PointsEntry] = []
+        self._flush_lock = asyncio.Lock()
+        # Amounts reserved by running games; they are excluded from available() until settled
+        self._held: Dict[str, int] = {}
+        # Ranked index built once when the ledger opens and kept in sync by add()
+        self.leaderboard = RankedIndex((int(uid), bal) for uid, bal in backend.all_balances())
+        self.last_used = time.monotonic()
+        # Calls that await while holding this ledger; a shard is never unloaded under them
+        self._in_use = 0
+        self.telemetry = EconomyTelemetry(stats_path)
+        if self.telemetry.supply is None:
+            # First run with telemetry: count the existing money once, then track it by deltas
+            self.telemetry.supply = sum(backend.export_balances().values())
+            self.telemetry.save(force=True)
+
+    # --- Cache ---
+    def _cached_balance(self, user_id_str: str) -> int:
+        """快取命中直接回傳；未命中時向後端讀一次並記住結果。"""
+        self.last_used = time.monotonic()
+        balance = self._points.get(user_id_str)
+        if balance is None:
+            stored = self.backend.get(user_id_str)
+            balance = self._remember(user_id_str, stored)
+        return balance
+
+    def _remember(self, user_id_str: str, stored: Optional[int]) -> int:
+        if stored is None:
+            balance = self.starting_points
+        else:
+            balance = stored
+            # A user rehydrated from the cold archive rejoins the leaderboard
+            self.leaderboard.set(int(user_id_str), stored)
+        self._points[user_id_str] = balance
+        return balance
+
+    async def ensure_cached(self, user_id: int):
+        """快取未命中時改在背景執行緒讀取後端，避免卡住事件迴圈。"""
+        user_id_str = str(user_id)
+        if user_id_str not in self._points:
+            stored = await asyncio.to_thread(self.backend.get, user_id_str)
+            # Another coroutine may have filled the cache (and changed it) while we were waiting
+            if user_id_str not in self._points:
+                self._remember(user_id_str, stored)
+
+    # --- Balances ---
+    def available(self, user_id: int) -> int:
+        """可用積分：帳上餘額扣掉圈存中的金額。"""
+        user_id_str = str(user_id)
+        return self._cached_balance(user_id_str) - self._held.get(user_id_str, 0)
+
+    def add(self, user_id: int, amount: int, source: str, ts: Optional[float] = None) -> int:
+        """套用一筆變動並排進下一批寫回，回傳新的可用積分。"""
+        user_id_str = str(user_id)
+        ts = ts or time.time()
+        new_points = self._cached_balance(user_id_str) + amount
+        self._points[user_id_str] = new_points
+        self._pending.append(PointsEntry(user_id_str, amount, source, ts))
+        self.telemetry.record(source, amount, ts)
+        self.leaderboard.set(int(user_id), new_points)
+        return new_points - self._held.get(user_id_str, 0)
+
+    def hold(self, user_id: int, amount: int, source: str) -> Optional[Escrow]:
+        """可用積分足夠時圈存 amount 並回傳 Escrow，否則回傳 None。"""
+        if self.available(user_id) < amount:
+            return None
+        user_id_str = str(user_id)
+        self._held[user_id_str] = self._held.get(user_id_str, 0) + amount
+        return Escrow(self, user_id, amount, source)
+
+    def release_hold(self, user_id: int, amount: int):
+        user_id_str = str(user_id)
+        remaining = self._held.get(user_id_str, 0) - amount
+        if remaining > 0:
+            self._held[user_id_str] = remaining
+        else:
+            self._held.pop(user_id_str, None)
+
+    @contextlib.contextmanager
+    def in_use(self):
+        """標記一個會跨越 await 的呼叫正在使用這本帳本，期間帳本不會被卸載。"""
+        self._in_use += 1
+        self.last_used = time.monotonic()
+        try:
+            yield self
+        finally:
+            self._in_use -= 1
+            self.last_used = time.monotonic()
+
+    @property
+    def is_idle(self) -> bool:
+        """沒有待寫入資料、沒有進行中的圈存，也沒有呼叫正在使用時才可以被卸載。"""
+        return not self._pending and not self._held and not self._in_use
+
+    # --- Write-back Flush ---
+    async def flush(self) -> bool:
+        """將累積的異動紀錄一次寫回後端。沒有變更時不做任何 I/O。寫入失敗時回傳 False。"""
+        async with self._flush_lock:
+            self.telemetry.maybe_save()
+            if not self._pending:
+                return True
+            pending, self._pending = self._pending, []
+            try:
+                await asyncio.to_thread(self.backend.apply, pending)
+            except Exception as e:
+                print(f"寫入積分資料時發生錯誤: {e}")
+                # Put the batch back in front so the next tick retries it in order
+                self._pending[:0] = pending
+                return False
+            return True
+
+    async def archive_inactive(self, cutoff: float) -> int:
+        """請後端封存不活躍的使用者，並把他們移出記憶體快取與排行榜。回傳封存人數。"""
+        await self.flush()
+        # Hold the flush lock so changes made meanwhile stay pending and are recognised below
+        async with self._flush_lock:
+            archived = await asyncio.to_thread(self.backend.archive_inactive, cutoff)
+        # Users touched while the job ran keep their cache entry: it already holds their latest balance
+        busy = {entry.user_id for entry in self._pending} | set(self._held)
+        for user_id_str in archived:
+            if user_id_str in busy:
+                continue
+            self._points.pop(user_id_str, None)
+            self.leaderboard.discard(int(user_id_str))
+        return len(archived)
+
+    async def history(self, user_id: int, skip: int, limit: int) -> List[PointsEntry]:
+        # Push pending entries out first so the newest changes show up
+        await self.flush()
+        return await asyncio.to_thread(self.backend.history, str(user_id), skip, limit)
+
+    async def close(self):
+        await self.flush()
+        self.telemetry.save()
+        self.backend.close()
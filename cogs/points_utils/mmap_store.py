@@ -0,0 +1,231 @@
+import mmap
+import os
+import struct
+import threading
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .backends import PointsBackend, read_json_balances
+from .journal import PointsEntry, PointsJournal
+
+# Header: magic, capacity (slots), count (used slots), journal offset already applied
+HEADER = struct.Struct('<8sQQQ')
+SLOT = struct.Struct('<Qq')  # user_id uint64, balance int64
+MAGIC = b'PTSMMAP1'
+INITIAL_CAPACITY = 1 << 16
+MAX_LOAD_FACTOR = 0.7
+EMPTY = 0  # Discord snowflakes are never 0, so it marks a free slot
+_GOLDEN = 0x9E3779B97F4A7C15
+_MASK64 = (1 << 64) - 1
+
+
+class MmapBalanceTable:
+    """記憶體映射的固定寬度雜湊表：每格 (user_id uint64, balance int64)。
+
+    使用開放定址 + 線性探測，查詢與更新只會碰到一兩個 page，不需要解析整份檔案。
+    容量固定為 2 的次方；負載超過 MAX_LOAD_FACTOR 時重建到新檔案，再以 os.replace 原子替換。
+    """
+
+    def __init__(self, path: str, initial_capacity: int = INITIAL_CAPACITY):
+        self.path = path
+        if not os.path.exists(self.path):
+            self._create_file(self.path, initial_capacity)
+        self._map()
+
+    # --- File Management ---
+    @staticmethod
+    def _create_file(path: str, capacity: int):
+        with open(path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, capacity, 0, 0))
+            f.truncate(HEADER.size + capacity * SLOT.size)  # Sparse zero-filled slots
+
+    def _map(self):
+        self._file = open(self.path, 'r+b')
+        self._mm = mmap.mmap(self._file.fileno(), 0)
+        magic, self.capacity, self.count, self.applied_offset = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{self.path} 不是積分映射檔")
+        self._shift = 64 - (self.capacity.bit_length() - 1)
+        self._mask = self.capacity - 1
+
+    def _unmap(self):
+        self._mm.flush()
+        self._mm.close()
+        self._file.close()
+
+    def write_header(self):
+        HEADER.pack_into(self._mm, 0, MAGIC, self.capacity, self.count, self.applied_offset)
+
+    # --- Hash Table ---
+    def _home(self, user_id: int) -> int:
+        # Fibonacci hashing spreads snowflakes, whose low bits are mostly sequence counters
+        return ((user_id * _GOLDEN) & _MASK64) >> self._shift
+
+    def _find(self, user_id: int) -> Tuple[int, bool]:
+        """回傳 (格子位置, 是否已存在)。"""
+        idx = self._home(user_id)
+        while True:
+            pos = HEADER.size + idx * SLOT.size
+            slot_id, _ = SLOT.unpack_from(self._mm, pos)
+            if slot_id == user_id:
+                return pos, True
+            if slot_id == EMPTY:
+                return pos, False
+            idx = (idx + 1) & self._mask
+
+    def get(self, user_id: int) -> Optional[int]:
+        pos, found = self._find(user_id)
+        return SLOT.unpack_from(self._mm, pos)[1] if found else None
+
+    def add(self, user_id: int, delta: int, starting: int = 0) -> int:
+        pos, found = self._find(user_id)
+        balance = (SLOT.unpack_from(self._mm, pos)[1] if found else starting) + delta
+        self._store(pos, found, user_id, balance)
+        return balance
+
+    def set(self, user_id: int, balance: int):
+        pos, found = self._find(user_id)
+        self._store(pos, found, user_id, balance)
+
+    def _store(self, pos: int, found: bool, user_id: int, balance: int):
+        if not found:
+            if (self.count + 1) > self.capacity * MAX_LOAD_FACTOR:
+                self.grow()
+                pos, _ = self._find(user_id)
+            self.count += 1
+        SLOT.pack_into(self._mm, pos, user_id, balance)
+
+    def recount(self):
+        """重新數一次已使用的格子；當機後表頭的 count 可能比實際的格子舊。"""
+        self.count = sum(1 for _ in self.items())
+
+    def items(self) -> Iterator[Tuple[int, int]]:
+        for pos in range(HEADER.size, HEADER.size + self.capacity * SLOT.size, SLOT.size):
+            user_id, balance = SLOT.unpack_from(self._mm, pos)
+            if user_id != EMPTY:
+                yield user_id, balance
+
+    def reserve(self, expected_count: int):
+        """預先擴容到能放下 expected_count 筆，避免大量匯入時反覆重建。"""
+        new_capacity = self.capacity
+        while expected_count > new_capacity * MAX_LOAD_FACTOR:
+            new_capacity *= 2
+        if new_capacity != self.capacity:
+            self.grow(new_capacity)
+
+    def grow(self, new_capacity: Optional[int] = None):
+        """擴容（預設加倍）：重建到暫存檔後原子替換。"""
+        new_capacity = new_capacity or self.capacity * 2
+        tmp_path = self.path + '.grow'
+        self._create_file(tmp_path, new_capacity)
+        with open(tmp_path, 'r+b') as f:
+            new_mm = mmap.mmap(f.fileno(), 0)
+            shift, mask = 64 - (new_capacity.bit_length() - 1), new_capacity - 1
+            for user_id, balance in self.items():
+                idx = ((user_id * _GOLDEN) & _MASK64) >> shift
+                while SLOT.unpack_from(new_mm, HEADER.size + idx * SLOT.size)[0] != EMPTY:
+                    idx = (idx + 1) & mask
+                SLOT.pack_into(new_mm, HEADER.size + idx * SLOT.size, user_id, balance)
+            HEADER.pack_into(new_mm, 0, MAGIC, new_capacity, self.count, self.applied_offset)
+            new_mm.flush()
+            new_mm.close()
+        self._unmap()
+        os.replace(tmp_path, self.path)
+        self._map()
+
+    def sync(self):
+        self.write_header()
+        self._mm.flush()
+
+    def close(self):
+        self.write_header()
+        self._unmap()
+
+
+class MmapBackend(PointsBackend):
+    """以 MmapBalanceTable 保存餘額、以交易日誌保存紀錄的後端，適合非常大量的使用者。
+
+    每批異動先追加到日誌並 fsync，再寫入映射表。映射表每 sync_every 筆才 msync 一次（checkpoint），
+    確定所有格子都落地之後，才把表頭的「已套用位置」推進到日誌目前的位置並輪替日誌。
+
+    作業系統隨時可能把任何一個髒 page 寫回磁碟，當機後的格子可能有一部分已經是新值。
+    因此這個後端的日誌紀錄會帶上異動後的餘額，重播時直接設定餘額而不是再加一次，重播幾次結果都一樣。
+    """
+
+    def __init__(self, path: str, starting_points: int = 0, import_from: Optional[str] = None,
+                 sync_every: int = 5000):
+        self.path = path
+        self.starting_points = starting_points
+        self.sync_every = sync_every
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        is_new = not os.path.exists(self.path)
+        self.table = MmapBalanceTable(self.path)
+        self.journal = PointsJournal(self.path + '.journal')
+        self._since_sync = 0
+        if self.journal.recover(self.table.applied_offset, self._apply_entry):
+            # Unclean shutdown: the header count may predate the slots that reached disk
+            self.table.recount()
+            self._checkpoint()
+        if is_new and import_from and os.path.exists(import_from):
+            self._import_json(import_from)
+
+    def _import_json(self, json_path: str):
+        """第一次建立映射檔時，匯入 JSON 後端的資料（快照 + 日誌尾端）。"""
+        legacy = read_json_balances(json_path, self.starting_points)
+        self.table.reserve(self.table.count + len(legacy))
+        for user_id, balance in legacy.items():
+            self.table.add(int(user_id), int(balance))
+        self.table.sync()
+
+    def _apply_entry(self, entry: PointsEntry):
+        if entry.balance is None:
+            # Journals written before balances were recorded can only be replayed as deltas
+            self.table.add(int(entry.user_id), entry.delta, self.starting_points)
+        else:
+            self.table.set(int(entry.user_id), entry.balance)
+
+    def _checkpoint(self):
+        """先讓所有格子落地，再推進並寫回表頭的已套用位置，最後輪替日誌。"""
+        self.table.sync()
+        self.table.applied_offset = self.journal.tell()
+        self.table.sync()
+        self.journal.rotate()
+        self._since_sync = 0
+
+    def get(self, user_id: str) -> Optional[int]:
+        with self._lock:
+            return self.table.get(int(user_id))
+
+    def all_balances(self) -> Iterator[Tuple[str, int]]:
+        with self._lock:
+            items = list(self.table.items())
+        return ((str(uid), balance) for uid, balance in items)
+
+    def apply(self, entries: List[PointsEntry]) -> None:
+        with self._lock:
+            balances: Dict[int, int] = {}
+            stamped = []
+            for entry in entries:
+                user_id = int(entry.user_id)
+                current = balances.get(user_id)
+                if current is None:
+                    current = self.table.get(user_id)
+                    current = self.starting_points if current is None else current
+                balances[user_id] = current + entry.delta
+                stamped.append(entry._replace(balance=balances[user_id]))
+            self.journal.append(stamped)
+            for user_id, balance in balances.items():
+                self.table.set(user_id, balance)
+            self._since_sync += len(entries)
+            if self._since_sync >= self.sync_every:
+                self._checkpoint()
+
+    def history(self, user_id: str, skip: int = 0, limit: int = 10) -> List[PointsEntry]:
+        with self._lock:
+            return self.journal.history(user_id, skip, limit)
+
+    def close(self) -> None:
+        with self._lock:
+            self._checkpoint()
+            self.table.close()
+            self.journal.close()
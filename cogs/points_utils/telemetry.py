@@ -0,0 +1,138 @@
+import json
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+
+# 解析度名稱 -> (每格秒數, 保留格數)
+RESOLUTIONS = {
+    "minute": (60, 180),     # 最近 3 小時
+    "hour": (3600, 72),      # 最近 3 天
+    "day": (86400, 120),     # 最近 120 天
+}
+PERSIST_INTERVAL_SECONDS = 60  # 統計資料寫回磁碟的最短間隔
+
+
+class FlowSeries:
+    """固定長度的環狀時間序列，每格記錄各來源「產生」與「銷毀」的積分。
+
+    第 b 格（b = ts // bucket_seconds）存放在 b % size 的位置；位置上記錄的格號
+    不是 b 時代表那是舊資料，寫入前先歸零。記憶體用量固定，與經過多久無關。
+    """
+
+    def __init__(self, bucket_seconds: int, size: int):
+        self.bucket_seconds = bucket_seconds
+        self.size = size
+        self._buckets: List[int] = [-1] * size
+        self._created: Dict[str, List[int]] = {}
+        self._destroyed: Dict[str, List[int]] = {}
+
+    def _slot(self, bucket: int) -> int:
+        slot = bucket % self.size
+        if self._buckets[slot] != bucket:
+            self._buckets[slot] = bucket
+            for series in (self._created, self._destroyed):
+                for values in series.values():
+                    values[slot] = 0
+        return slot
+
+    def add(self, source: str, delta: int, ts: float):
+        slot = self._slot(int(ts // self.bucket_seconds))
+        if source not in self._created:
+            self._created[source] = [0] * self.size
+            self._destroyed[source] = [0] * self.size
+        if delta >= 0:
+            self._created[source][slot] += delta
+        else:
+            self._destroyed[source][slot] -= delta
+
+    def window(self, count: int, now: float) -> Dict[str, Tuple[int, int]]:
+        """彙總最近 count 格（含目前這格），回傳 {來源: (產生, 銷毀)}。"""
+        current = int(now // self.bucket_seconds)
+        slots = [
+            b % self.size for b in range(current - min(count, self.size) + 1, current + 1)
+            if self._buckets[b % self.size] == b
+        ]
+        return {
+            source: (sum(self._created[source][s] for s in slots), sum(self._destroyed[source][s] for s in slots))
+            for source in self._created
+        }
+
+    def to_dict(self) -> Dict:
+        return {"buckets": self._buckets, "created": self._created, "destroyed": self._destroyed}
+
+    def load_dict(self, data: Dict):
+        # A changed size makes the stored slots meaningless; start that resolution over
+        if len(data.get("buckets", [])) != self.size:
+            return
+        self._buckets = data["buckets"]
+        self._created = data.get("created", {})
+        self._destroyed = data.get("destroyed", {})
+
+
+class EconomyTelemetry:
+    """一個經濟體的積分流量統計：每分鐘 / 每小時 / 每天的環狀序列、各來源累計值與貨幣總量。
+
+    每筆異動在 PointsLedger.add 時記錄一次（O(1)），查詢時只讀這些彙總值，不需要掃描使用者資料。
+    統計每 PERSIST_INTERVAL_SECONDS 秒（及關閉時）寫回 path；當機時最多少記最後一段時間的流量。
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.series = {name: FlowSeries(*spec) for name, spec in RESOLUTIONS.items()}
+        self.totals: Dict[str, List[int]] = {}  # source -> [產生, 銷毀]（自統計開始）
+        self.supply: Optional[int] = None  # 所有使用者積分總和；None 代表尚未初始化
+        self._dirty = False
+        self._last_save = time.monotonic()
+        self._load()
+
+    def record(self, source: str, delta: int, ts: float):
+        if not delta:
+            return
+        for series in self.series.values():
+            series.add(source, delta, ts)
+        total = self.totals.setdefault(source, [0, 0])
+        if delta > 0:
+            total[0] += delta
+        else:
+            total[1] -= delta
+        if self.supply is not None:
+            self.supply += delta
+        self._dirty = True
+
+    def flows(self, resolution: str, count: int, now: Optional[float] = None) -> Dict[str, Tuple[int, int]]:
+        return self.series[resolution].window(count, now or time.time())
+
+    # --- Persistence ---
+    def _load(self):
+        if not self.path:
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (json.JSONDecodeError, IOError):
+            return
+        self.supply = data.get("supply")
+        self.totals = data.get("totals", {})
+        for name, series in self.series.items():
+            if name in data.get("series", {}):
+                series.load_dict(data["series"][name])
+
+    def save(self, force: bool = False):
+        if not self.path or not (self._dirty or force):
+            return
+        data = {
+            "supply": self.supply,
+            "totals": self.totals,
+            "series": {name: series.to_dict() for name, series in self.series.items()},
+        }
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, separators=(',', ':'))
+        os.replace(tmp_path, self.path)
+        self._dirty = False
+        self._last_save = time.monotonic()
+
+    def maybe_save(self):
+        if self._dirty and time.monotonic() - self._last_save >= PERSIST_INTERVAL_SECONDS:
+            self.save()
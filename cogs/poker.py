@@ -94,7 +94,7 @@ class Poker(commands.Cog):
             await ctx.send("此頻道已經有正在進行的遊戲或已創建大廳。")
             return
 
-        player_points = self.points_cog.get_points(ctx.author.id)
+        player_points = await self.points_cog.fetch_points(ctx.author.id, guild_id=ctx.guild and ctx.guild.id)
         if player_points <= 0:
             await ctx.send(f"{ctx.author.mention}, 你的積分不足（目前為 {player_points}），無法創建遊戲。")
             return
@@ -124,7 +124,7 @@ class Poker(commands.Cog):
         big_blind = lobby["big_blind"]
         small_blind = big_blind // 2
         
-        initial_chips = {p.id: self.points_cog.get_points(p.id) for p in initial_players}
+        initial_chips = {p.id: await self.points_cog.fetch_points(p.id, guild_id=channel.guild.id) for p in initial_players}
 
         if channel.id in self.lobbies:
             del self.lobbies[channel.id]
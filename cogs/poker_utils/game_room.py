@@ -402,7 +402,7 @@ class GameRoom:
             return
         
         report_lines = ["**積分即時結算：**"]
-        something_to_update = False
+        deltas: Dict[int, int] = {}
         for p in self.initial_players:
             if p.id not in self.player_ids: continue
 
@@ -411,14 +411,16 @@ class GameRoom:
             delta = final_chip_count - initial_chip_count
 
             if delta != 0:
-                something_to_update = True
-                self.cog.points_cog.update_points(p.id, delta)
+                deltas[p.id] = delta
             
             display_name = p.display_name
             report_lines.append(f"{display_name}: {initial_chip_count} -> {final_chip_count} ({delta:+})")
 
-        if something_to_update and channel:
-            await channel.send("\n".join(report_lines))
+        if deltas:
+            # Settle the whole table in one batch instead of one write per player
+            self.cog.points_cog.update_points_many(deltas, source="poker", guild_id=channel.guild.id)
+            if channel:
+                await channel.send("\n".join(report_lines))
 
         self.initial_chips = self.chips.copy()
 
@@ -160,7 +160,7 @@ class LobbyView(discord.ui.View):
             await interaction.response.send_message("你已經在大廳裡了。", ephemeral=True)
             return
 
-        if not self.cog.points_cog or self.cog.points_cog.get_points(interaction.user.id) <= 0:
+        if not self.cog.points_cog or await self.cog.points_cog.fetch_points(interaction.user.id, guild_id=interaction.guild_id) <= 0:
              await interaction.response.send_message("你的積分不足，無法加入遊戲。", ephemeral=True)
              return
 
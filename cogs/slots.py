@@ -28,14 +28,15 @@ class SlotsView(ui.View):
             await interaction.followup.send("❌ **系統錯誤**：積分模組目前無法使用。", ephemeral=True)
             return
         
-        current_points = points_cog.get_points(self.original_author.id)
-        if current_points < self.bet:
+        escrow = await points_cog.reserve(self.original_author.id, self.bet, source="slots", guild_id=interaction.guild_id)
+        if not escrow:
             button.disabled = True
             await interaction.message.edit(view=self)
             await interaction.followup.send("💸 **你的積分不足！** 無法再轉一次。", ephemeral=True)
             return
 
-        await self.cog._play_spin(interaction.message, self.original_author, self.bet, points_cog)
+        self.stop()  # One spin per view: a second click must not start another spin off this message
+        await self.cog._play_spin(interaction.message, self.original_author, self.bet, escrow)
 
     async def on_timeout(self):
         for item in self.children:
@@ -62,9 +63,16 @@ class SlotsCog(commands.Cog):
             '🍋🍋🍋': 3,
         }
 
-    async def _play_spin(self, message: discord.Message, author: discord.Member, bet: int, points_cog):
-        points_cog.update_points(author.id, -bet)
+    async def _play_spin(self, message: discord.Message, author: discord.Member, bet: int, escrow):
+        """播放一次拉霸動畫並結算。賭注已由呼叫端圈存（escrow），這裡只在最後寫入一次淨損益。"""
+        try:
+            await self._spin(message, author, bet, escrow)
+        finally:
+            # Animation failed before settling (e.g. message gone): give the stake back
+            if not escrow.settled:
+                escrow.refund()
 
+    async def _spin(self, message: discord.Message, author: discord.Member, bet: int, escrow):
         embed = discord.Embed(title="[ 🎰 拉霸機 ]", color=discord.Color.blue())
         embed.set_author(name=f"{author.display_name} 下注了 {bet} 分", icon_url=author.avatar.url if author.avatar else None)
         embed.description = "### [ ❓ | ❓ | ❓ ]\n*滾輪轉動中...*"
@@ -99,11 +107,7 @@ class SlotsCog(commands.Cog):
             win_message = "一顆櫻桃！返還賭注！"
 
         winnings = int(bet * payout_multiplier)
-
-        if winnings > 0:
-            points_cog.update_points(author.id, winnings)
-        
-        new_total = points_cog.get_points(author.id)
+        new_total = escrow.commit(winnings)
         net_change = winnings - bet
 
         if winnings > 0:
@@ -126,11 +130,16 @@ class SlotsCog(commands.Cog):
 
         if bet <= 0: return await ctx.send("🚫 **賭注必須是正數！**")
 
-        current_points = points_cog.get_points(ctx.author.id)
-        if current_points < bet: return await ctx.send(f"💸 **你的積分不足！** 你目前只有 **{current_points}** 分。")
+        guild_id = ctx.guild and ctx.guild.id
+        escrow = await points_cog.reserve(ctx.author.id, bet, source="slots", guild_id=guild_id)
+        if not escrow: return await ctx.send(f"💸 **你的積分不足！** 你目前只有 **{await points_cog.fetch_points(ctx.author.id, guild_id=guild_id)}** 分。")
         
-        slot_message = await ctx.send("準備開始...")
-        await self._play_spin(slot_message, ctx.author, bet, points_cog)
+        try:
+            slot_message = await ctx.send("準備開始...")
+        except discord.HTTPException:
+            escrow.refund()
+            raise
+        await self._play_spin(slot_message, ctx.author, bet, escrow)
 
     # --- 關鍵改造：將錯誤處理器變成智慧型說明書 ---
     @slots.error
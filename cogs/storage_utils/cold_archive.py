@@ -0,0 +1,172 @@
+import gzip
+import json
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# --- Tiering Settings ---
+try:
+    import config
+    ARCHIVE_AFTER_DAYS = getattr(config, "ARCHIVE_AFTER_DAYS", None)
+except ImportError:
+    ARCHIVE_AFTER_DAYS = None
+
+# 使用者超過幾天沒有活動就搬進冷資料區；設為 0 停用分層
+if ARCHIVE_AFTER_DAYS is None:
+    ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", "90"))
+
+TIERING_INTERVAL_HOURS = 24  # 分層工作多久跑一次
+SEGMENT_CACHE_SIZE = 4  # 記憶體中保留幾個解壓後的區段
+
+
+def archive_cutoff(now: Optional[float] = None) -> Optional[float]:
+    """回傳「最後活動早於此時間就要封存」的時間戳；分層停用時回傳 None。"""
+    if ARCHIVE_AFTER_DAYS <= 0:
+        return None
+    return (now or time.time()) - ARCHIVE_AFTER_DAYS * 86400
+
+
+class ColdArchive:
+    """把不活躍使用者的紀錄搬到 gzip 壓縮的唯讀區段（seg-000001.json.gz ...）。
+
+    - 每次封存寫成一個新區段，index.json 記錄每位使用者目前在哪個區段。
+    - 取回（load）不會修改區段；呼叫端把資料寫回熱資料檔「之後」再呼叫 discard，
+      中途當機時資料仍留在封存區，不會遺失。
+    - 區段裡已經沒有任何有效使用者時才刪除檔案。
+    本類別本身不加鎖，呼叫端需自行保證同一時間只有一個執行緒在使用。
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.index_path = os.path.join(directory, 'index.json')
+        self._index: Dict[str, int] = {}
+        self._live: Dict[int, int] = {}
+        self._segments: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+        self._load_index()
+
+    def __contains__(self, user_id: str) -> bool:
+        return user_id in self._index
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    # --- Index ---
+    def _load_index(self):
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                self._index = {uid: int(seg) for uid, seg in json.load(f).items()}
+        except (json.JSONDecodeError, IOError):
+            self._index = {}
+        self._live = {}
+        for seg in self._index.values():
+            self._live[seg] = self._live.get(seg, 0) + 1
+
+    def _save_index(self):
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = self.index_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._index, f, separators=(',', ':'))
+        os.replace(tmp_path, self.index_path)
+
+    # --- Segments ---
+    def _segment_path(self, seg: int) -> str:
+        return os.path.join(self.directory, f'seg-{seg:06d}.json.gz')
+
+    def _next_segment_id(self) -> int:
+        existing = [
+            int(name[4:10]) for name in os.listdir(self.directory)
+            if name.startswith('seg-') and name.endswith('.json.gz')
+        ] if os.path.isdir(self.directory) else []
+        return max(existing, default=0) + 1
+
+    def _read_segment(self, seg: int) -> Dict[str, Any]:
+        records = self._segments.get(seg)
+        if records is not None:
+            self._segments.move_to_end(seg)
+            return records
+        with gzip.open(self._segment_path(seg), 'rt', encoding='utf-8') as f:
+            records = json.load(f)
+        self._segments[seg] = records
+        if len(self._segments) > SEGMENT_CACHE_SIZE:
+            self._segments.popitem(last=False)
+        return records
+
+    # --- Public API ---
+    def archive(self, records: Dict[str, Any]) -> int:
+        """把一批紀錄寫成新區段並更新索引。回傳封存筆數。
+
+        呼叫端應在此方法回傳「之後」才從熱資料檔移除這些使用者。
+        """
+        if not records:
+            return 0
+        os.makedirs(self.directory, exist_ok=True)
+        seg = self._next_segment_id()
+        path = self._segment_path(seg)
+        tmp_path = path + '.tmp'
+        with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+            json.dump(records, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp_path, path)
+
+        for uid in records:
+            old = self._index.get(uid)
+            if old is not None:
+                self._live[old] -= 1
+            self._index[uid] = seg
+        self._live[seg] = len(records)
+        self._save_index()
+        self._drop_empty_segments()
+        return len(records)
+
+    def load(self, user_id: str) -> Optional[Any]:
+        """讀取某位使用者的封存紀錄（不會移除），沒有時回傳 None。"""
+        seg = self._index.get(user_id)
+        if seg is None:
+            return None
+        try:
+            return self._read_segment(seg).get(user_id)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"讀取封存區段 {self._segment_path(seg)} 失敗: {e}")
+            return None
+
+    def items(self) -> Iterable[Tuple[str, Any]]:
+        """逐區段列出所有仍有效的 (user_id, 紀錄)，只用於一次性的資料匯出。"""
+        by_segment: Dict[int, List[str]] = {}
+        for uid, seg in self._index.items():
+            by_segment.setdefault(seg, []).append(uid)
+        for seg, uids in sorted(by_segment.items()):
+            records = self._read_segment(seg)
+            for uid in uids:
+                if uid in records:
+                    yield uid, records[uid]
+
+    def discard(self, user_ids: Iterable[str]):
+        """使用者已寫回熱資料檔後，將其從封存索引移除。"""
+        changed = False
+        for uid in user_ids:
+            seg = self._index.pop(uid, None)
+            if seg is not None:
+                self._live[seg] -= 1
+                changed = True
+        if changed:
+            self._save_index()
+            self._drop_empty_segments()
+
+    def _drop_empty_segments(self):
+        for seg in [s for s, count in self._live.items() if count <= 0]:
+            del self._live[seg]
+            self._segments.pop(seg, None)
+            try:
+                os.remove(self._segment_path(seg))
+            except FileNotFoundError:
+                pass
+
+
+def select_inactive(records: Dict[str, Any], last_active, cutoff: float) -> List[str]:
+    """列出 last_active(record) 早於 cutoff 的使用者；無法判斷活動時間的紀錄一律保留。"""
+    inactive = []
+    for uid, record in records.items():
+        ts = last_active(record)
+        if ts is not None and ts < cutoff:
+            inactive.append(uid)
+    return inactive
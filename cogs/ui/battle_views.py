@@ -33,16 +33,16 @@ class BattleSkillSelect(discord.ui.Select):
         options = []
         
         # Load skill data to get details
-        skill_db = cog.skills_db
+        config = cog.config
         
         for s_name in skills_list:
-            s_data = skill_db.get(s_name)
+            s_data = config.skill(s_name)
             if s_data:
                 # Format: "🔥 Ember (Power:40 | AP:1)"
                 label = f"{s_name}"
-                desc = f"威力:{s_data['power']} | AP:{s_data['cost']} | {s_data['description'][:20]}"
-                emoji = "🔮" if s_data['category'] == 'magic' else "👊"
-                if s_data['category'] == 'status': emoji = "✨"
+                desc = f"威力:{s_data.power} | AP:{s_data.cost} | {s_data.description[:20]}"
+                emoji = "🔮" if s_data.category == 'magic' else "👊"
+                if s_data.category == 'status': emoji = "✨"
                 
                 options.append(discord.SelectOption(label=label, value=s_name, description=desc, emoji=emoji))
         
@@ -2,6 +2,9 @@ import discord
 from discord.ext import commands
 import random
 
+MAX_BATCH_TRAINING = 10  # 「連續特訓」一次最多幾回
+PETRANK_PAGE_SIZE = 10
+
 # --- Food Data ---
 FOOD_MENU = {
     "1": {"name": "早餐店奶茶", "price": 20, "heal": 20, "satiety": 10, "buff": None},
@@ -19,8 +22,7 @@ class RenameModal(discord.ui.Modal, title='幫嘎蛙取新名字'):
         self.user_id = user_id
 
     async def on_submit(self, interaction: discord.Interaction):
-        data = self.cog._load_data()
-        pet = data.get(str(self.user_id))
+        pet = await self.cog._fetch_pet(self.user_id)
         
         if not pet:
             await interaction.response.send_message("找不到你的嘎蛙！", ephemeral=True)
@@ -28,12 +30,12 @@ class RenameModal(discord.ui.Modal, title='幫嘎蛙取新名字'):
             
         new_name = self.name.value
         pet['nickname'] = new_name
-        data[str(self.user_id)] = pet
-        self.cog._save_data(data)
+        self.cog._touch(pet)
+        self.cog._save_pet(self.user_id, pet)
         
-        embed, file = self.cog.get_pet_embed(self.user_id)
+        embed, file = await self.cog.get_pet_embed(self.user_id)
         
-        await interaction.response.edit_message(content=f"✅ 改名成功！現在他是 **{new_name}** 了！", embed=embed, attachments=[file])
+        await interaction.response.edit_message(content=f"✅ 改名成功！現在他是 **{new_name}** 了！", embed=embed, attachments=[file] if file else [])
 
 class FeedSelect(discord.ui.Select):
     def __init__(self, cog, user_id):
@@ -55,40 +57,31 @@ class FeedSelect(discord.ui.Select):
         points_cog = self.cog.bot.get_cog("Points")
         if not points_cog: return await interaction.response.send_message("積分系統維護中", ephemeral=True)
         
-        user_points = points_cog.get_points(self.user_id)
-        if user_points < item['price']:
+        escrow = await points_cog.reserve(self.user_id, item['price'], source="pet_shop", guild_id=interaction.guild_id)
+        if not escrow:
             return await interaction.response.send_message(f"💸 積分不足！(需 ${item['price']})", ephemeral=True)
 
-        data = self.cog._load_data()
-        pet = data.get(str(self.user_id))
+        pet = await self.cog._fetch_pet(self.user_id)
         
-        if not pet: return await interaction.response.send_message("沒有寵物！", ephemeral=True)
+        if not pet:
+            escrow.refund()
+            return await interaction.response.send_message("沒有寵物！", ephemeral=True)
         
         if pet['stats']['hp'] >= pet['stats']['max_hp'] and pet['stats'].get('satiety',0) >= 100:
+             escrow.refund()
              return await interaction.response.send_message("🤢 吃太飽了！", ephemeral=True)
 
-        points_cog.update_points(self.user_id, -item['price'])
+        escrow.commit(0)  # Pay for the food: one write for the whole purchase
         
         # Heal HP & Satiety
-        old_hp = pet['stats']['hp']
-        heal = item['heal']
-        if heal >= 999: pet['stats']['hp'] = pet['stats']['max_hp']
-        else: pet['stats']['hp'] = min(pet['stats']['max_hp'], old_hp + heal)
+        actual_heal, actual_sat = self.cog.eat(pet, item)
+        self.cog._touch(pet)
         
-        old_sat = pet['stats'].get('satiety', 50)
-        max_sat = pet['stats'].get('max_satiety', 100)
-        pet['stats']['satiety'] = min(max_sat, old_sat + item['satiety'])
-        
-        actual_heal = pet['stats']['hp'] - old_hp
-        actual_sat = pet['stats']['satiety'] - old_sat
-
-        if item['buff']: pet['buff'] = item['buff']
+        self.cog._save_pet(self.user_id, pet)
         
-        self.cog._save_data(data)
-        
-        embed, file = self.cog.get_pet_embed(self.user_id)
+        embed, file = await self.cog.get_pet_embed(self.user_id)
         msg = f"😋 吃了 **{item['name']}**！\n(HP +{actual_heal} | 飽食 +{actual_sat})"
-        await interaction.response.edit_message(content=msg, embed=embed, attachments=[file], view=self.view)
+        await interaction.response.edit_message(content=msg, embed=embed, attachments=[file] if file else [], view=self.view)
 
 class EvolveButton(discord.ui.Button):
     def __init__(self, cog, user_id):
@@ -99,14 +92,14 @@ class EvolveButton(discord.ui.Button):
     async def callback(self, interaction: discord.Interaction):
         if interaction.user.id != self.user_id: return
         
-        res = self.cog.evolve_pet(self.user_id)
+        res = await self.cog.evolve_pet(self.user_id)
         if res['status'] == 'fail':
              return await interaction.response.send_message(res['msg'], ephemeral=True)
         
         # Success
-        embed, file = self.cog.get_pet_embed(self.user_id)
+        embed, file = await self.cog.get_pet_embed(self.user_id)
         self.view.remove_item(self) # Remove button after use
-        await interaction.response.edit_message(content=f"🎆 **{res['msg']}**\n(HP+{res['diff_hp']} / ATK+{res['diff_atk']} / DEF+{res['diff_def']})", embed=embed, attachments=[file], view=self.view)
+        await interaction.response.edit_message(content=f"🎆 **{res['msg']}**\n(HP+{res['diff_hp']} / ATK+{res['diff_atk']} / DEF+{res['diff_def']})", embed=embed, attachments=[file] if file else [], view=self.view)
 
 class PetDashboardView(discord.ui.View):
     def __init__(self, cog, user_id):
@@ -118,44 +111,54 @@ class PetDashboardView(discord.ui.View):
         # Check Evolution
         pet = self.cog._get_pet(user_id)
         if pet:
-             p_type = pet['type']
-             # Important: Ensure config exists (might be missing if config file changed but bot didn't reload config fully? No, cog loads config on init)
-             meta = self.cog.pet_types.get(p_type, {})
-             evo_data = meta.get('evolution')
-             if evo_data and pet['level'] >= evo_data['min_level']:
+             meta = self.cog.config.pet(pet['type'])
+             evo_data = meta and meta.evolution
+             if evo_data and pet['level'] >= evo_data.min_level:
                   self.add_item(EvolveButton(cog, user_id))
         
     async def interaction_check(self, interaction: discord.Interaction) -> bool:
         if interaction.user.id != self.user_id:
             await interaction.response.send_message("這不是你的介面！", ephemeral=True)
             return False
+        pet = await self.cog._fetch_pet(self.user_id)
+        away = pet and self.cog.away_message(pet)
+        if away:
+            await interaction.response.send_message(away, ephemeral=True)
+            return False
         return True
 
     @discord.ui.button(label="特訓", style=discord.ButtonStyle.danger, emoji="⚔️", row=0)
     async def train_btn(self, interaction: discord.Interaction, button: discord.ui.Button):
         # res is now a Tuple[Optional[Dict], Optional[str]]
         pet, msg = await self.cog.train_pet(self.user_id)
-        
+        await self._show_training(interaction, pet, msg)
+
+    @discord.ui.button(label="連續特訓", style=discord.ButtonStyle.danger, emoji="🔁", row=0)
+    async def train_many_btn(self, interaction: discord.Interaction, button: discord.ui.Button):
+        # Trains until AP / HP / satiety runs out (capped), saved and rendered once
+        pet, msg = await self.cog.train_pet(self.user_id, sessions=MAX_BATCH_TRAINING)
+        await self._show_training(interaction, pet, msg)
+
+    async def _show_training(self, interaction: discord.Interaction, pet, msg):
         if not pet:
              # msg contains error message
              return await interaction.response.send_message(msg, ephemeral=True)
 
         # Dynamic Button Update
         # Check Evolution
-        p_type = pet['type']
-        evo_data = self.cog.pet_types.get(p_type, {}).get('evolution')
-        if evo_data and pet['level'] >= evo_data['min_level']:
+        meta = self.cog.config.pet(pet['type'])
+        evo_data = meta and meta.evolution
+        if evo_data and pet['level'] >= evo_data.min_level:
              # Check if button exists
              if not any(isinstance(x, EvolveButton) for x in self.children):
                   self.add_item(EvolveButton(self.cog, self.user_id))
 
-        embed, file = self.cog.get_pet_embed(self.user_id)
-        await interaction.response.edit_message(content=msg, embed=embed, attachments=[file], view=self)
+        embed, file = await self.cog.get_pet_embed(self.user_id)
+        await interaction.response.edit_message(content=msg, embed=embed, attachments=[file] if file else [], view=self)
 
     @discord.ui.button(label="休息", style=discord.ButtonStyle.success, emoji="💤", row=0)
     async def rest_btn(self, interaction: discord.Interaction, button: discord.ui.Button):
-        data = self.cog._load_data()
-        pet = data.get(str(self.user_id))
+        pet = await self.cog._fetch_pet(self.user_id)
         if not pet: return 
 
         if pet['stats']['hp'] >= pet['stats']['max_hp'] and pet.get('ap', 0) >= pet.get('max_ap', 6):
@@ -170,39 +173,39 @@ class PetDashboardView(discord.ui.View):
         
         # Restore AP
         pet['ap'] = pet.get('max_ap', 6)
+        self.cog._touch(pet)
         
-        self.cog._save_data(data)
-        embed, file = self.cog.get_pet_embed(self.user_id)
+        self.cog._save_pet(self.user_id, pet)
+        embed, file = await self.cog.get_pet_embed(self.user_id)
         msg = f"💤 休息好了！HP +{pet['stats']['hp']-old_hp} / AP 補滿 / 飽食 -30"
-        await interaction.response.edit_message(content=msg, embed=embed, attachments=[file], view=self)
+        await interaction.response.edit_message(content=msg, embed=embed, attachments=[file] if file else [], view=self)
 
     @discord.ui.button(label="技能", style=discord.ButtonStyle.primary, emoji="📚", row=0)
     async def skills_btn(self, interaction: discord.Interaction, button: discord.ui.Button):
-        data = self.cog._load_data()
-        pet = data.get(str(self.user_id))
-        # Use skills_data from Cog
-        skill_db = self.cog.skills_data
+        pet = await self.cog._fetch_pet(self.user_id)
+        # Use the compiled config from Cog
+        config = self.cog.config
         
         if not pet.get('skills'):
             return await interaction.response.send_message("尚未學會任何技能！", ephemeral=True)
             
         desc = ""
         for s_name in pet['skills']:
-            s_data = skill_db.get(s_name)
+            s_data = config.skill(s_name)
             if s_data:
-                emoji = "🔮" if s_data['category'] == 'magic' else "👊"
-                if s_data['category'] == 'status': emoji = "✨"
+                emoji = "🔮" if s_data.category == 'magic' else "👊"
+                if s_data.category == 'status': emoji = "✨"
                 
                 desc += f"### {s_name} {emoji}\n"
-                desc += f"**威力**: {s_data['power']} | **AP消耗**: {s_data['cost']} | **命中**: {s_data['accuracy']}%\n"
-                desc += f"_{s_data['description']}_\n"
+                desc += f"**威力**: {s_data.power} | **AP消耗**: {s_data.cost} | **命中**: {s_data.accuracy}%\n"
+                desc += f"_{s_data.description}_\n"
             else:
                 desc += f"### {s_name}\n(資料缺失)\n"
             desc += "──────────────\n"
             
         # Get Metadata for correct name
-        meta = self.cog.pet_types.get(pet['type'], {})
-        display_name = pet.get('nickname') or meta.get('name', pet['name'])
+        meta = config.pet(pet['type'])
+        display_name = pet.get('nickname') or (meta.name if meta else pet['name'])
             
         embed = discord.Embed(title=f"📚 {display_name} 的技能書", description=desc, color=0x3498DB)
         await interaction.response.send_message(embed=embed, ephemeral=True)
@@ -210,3 +213,40 @@ class PetDashboardView(discord.ui.View):
     @discord.ui.button(label="改名", style=discord.ButtonStyle.secondary, emoji="✏️", row=0)
     async def rename_btn(self, interaction: discord.Interaction, button: discord.ui.Button):
         await interaction.response.send_modal(RenameModal(self.cog, self.user_id))
+
+class PetRankView(discord.ui.View):
+    """寵物戰力排行榜的上一頁 / 下一頁按鈕。"""
+    def __init__(self, cog, owner_id: int, page: int):
+        super().__init__(timeout=120)
+        self.cog = cog
+        self.owner_id = owner_id
+        self.page = max(1, page)
+        self.message = None
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        if interaction.user.id != self.owner_id:
+            await interaction.response.send_message("請自己輸入 `!petrank` 來翻頁喔！", ephemeral=True)
+            return False
+        return True
+
+    async def _show(self, interaction: discord.Interaction, page: int):
+        total_pages = max(1, -(-len(self.cog.ranking) // PETRANK_PAGE_SIZE))
+        self.page = min(max(1, page), total_pages)
+        await interaction.response.edit_message(embed=self.cog.build_petrank_embed(self.page, self.owner_id), view=self)
+
+    @discord.ui.button(label="上一頁", style=discord.ButtonStyle.secondary, emoji="◀️")
+    async def prev_btn(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self._show(interaction, self.page - 1)
+
+    @discord.ui.button(label="下一頁", style=discord.ButtonStyle.secondary, emoji="▶️")
+    async def next_btn(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self._show(interaction, self.page + 1)
+
+    async def on_timeout(self):
+        for item in self.children:
+            item.disabled = True
+        if self.message:
+            try:
+                await self.message.edit(view=self)
+            except discord.NotFound:
+                pass